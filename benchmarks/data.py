@@ -0,0 +1,95 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SCALES = {
+    "tiny": dict(rows=2_000, columns=6, wide_columns=50, files=20, sheets=2),
+    "small": dict(rows=200_000, columns=8, wide_columns=200, files=500, sheets=3),
+    "large": dict(rows=5_000_000, columns=10, wide_columns=500, files=5_000, sheets=5),
+}
+FILES_PER_FOLDER = 25
+SHEET_ROWS = 10_000
+
+
+def make_table(rows: int, columns: int, seed: int = 0) -> pd.DataFrame:
+    """Returns a table with integer, float, categorical, date and text columns
+    in turns.
+
+    Args:
+        rows (int): Number of rows.
+        columns (int): Number of columns.
+        seed (int, optional): Seed of the random values. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: Synthetic table.
+    """
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(columns):
+        kind = i % 5
+        if kind == 0:
+            data[f"id_{i}"] = np.arange(rows)
+        elif kind == 1:
+            data[f"amount_{i}"] = rng.normal(100, 25, rows).round(2)
+        elif kind == 2:
+            data[f"category_{i}"] = rng.choice(["red", "green", "blue", "gray"], rows)
+        elif kind == 3:
+            data[f"date_{i}"] = (
+                np.datetime64("2020-01-01") + rng.integers(0, 1_500, rows)
+            ).astype(str)
+        else:
+            data[f"text_{i}"] = np.char.add(
+                "item_", rng.integers(0, 10**6, rows).astype(str)
+            )
+    return pd.DataFrame(data)
+
+
+def make_tree(root: str | Path, scale: str = "small", seed: int = 0) -> Path:
+    """Writes a folder of synthetic files to explore.
+
+    The folder has a tall table as CSV, TSV and pipe separated files, a wide
+    table, a workbook with several sheets and many small files in nested
+    folders.
+
+    Args:
+        root (str | Path): Folder to write the files to.
+        scale (str, optional): `tiny`, `small` or `large` from SCALES.
+            Defaults to "small".
+        seed (int, optional): Seed of the random values. Defaults to 0.
+
+    Raises:
+        Exception: If the scale is not valid.
+
+    Returns:
+        Path: Folder with the files.
+    """
+    if scale not in SCALES:
+        raise Exception(f"scale {scale} not valid.")
+    params = SCALES[scale]
+    root = Path(root)
+
+    tall = make_table(params["rows"], params["columns"], seed)
+    (root / "tall").mkdir(parents=True, exist_ok=True)
+    tall.to_csv(root / "tall" / "tall.csv", index=False)
+    tall.to_csv(root / "tall" / "tall.tab", sep="\t", index=False)
+    tall.to_csv(root / "tall" / "tall_pipe.txt", sep="|", index=False)
+
+    wide = make_table(max(params["rows"] // 20, 1), params["wide_columns"], seed + 1)
+    (root / "wide").mkdir(exist_ok=True)
+    wide.to_csv(root / "wide" / "wide.csv", index=False)
+
+    sheet_rows = min(params["rows"] // 10, SHEET_ROWS)
+    (root / "workbooks").mkdir(exist_ok=True)
+    with pd.ExcelWriter(root / "workbooks" / "book.xlsx", engine="openpyxl") as writer:
+        for i in range(params["sheets"]):
+            make_table(sheet_rows, params["columns"], seed + 2 + i).to_excel(
+                writer, sheet_name=f"sheet_{i}", index=False
+            )
+
+    small = make_table(10, params["columns"], seed)
+    for i in range(params["files"]):
+        folder = root / "many" / f"folder_{i // FILES_PER_FOLDER:04d}"
+        folder.mkdir(parents=True, exist_ok=True)
+        small.to_csv(folder / f"file_{i:05d}.csv", index=False)
+    return root
@@ -0,0 +1,238 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Callable
+
+BASELINES_DIR = Path(__file__).parent / "baselines"
+TOLERANCE = 0.2  # Slowdown over the baseline reported as a regression
+
+
+def _peak_rss() -> int:
+    """Returns the peak resident memory of the current process in bytes."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def _size(files) -> int:
+    return sum(Path(f).stat().st_size for f in files)
+
+
+def bench_get_row_count(root: Path, workdir: Path) -> tuple[Callable, int, int]:
+    from afes.utils import get_row_count
+
+    f = root / "tall" / "tall.csv"
+    return lambda: get_row_count(f), _size([f]), 1
+
+
+def bench_get_separator(root: Path, workdir: Path) -> tuple[Callable, int, int]:
+    from afes.config import SEPARATOR_SAMPLE
+    from afes.utils import get_separator
+
+    f = root / "tall" / "tall.csv"
+    return lambda: get_separator(f), min(_size([f]), SEPARATOR_SAMPLE), 1
+
+
+def bench__get_descriptions(root: Path, workdir: Path) -> tuple[Callable, int, int]:
+    from afes.afe import _get_descriptions, _get_files
+
+    files = list(_get_files(root))
+    return lambda: _get_descriptions(files), _size(files), len(files)
+
+
+def bench_explore_files(root: Path, workdir: Path) -> tuple[Callable, int, int]:
+    from afes.afe import _get_files, explore_files
+
+    files = list(_get_files(root))
+    return lambda: explore_files(root), _size(files), len(files)
+
+
+def bench_generate_pandas_code(root: Path, workdir: Path) -> tuple[Callable, int, int]:
+    from afes.afe import explore_files
+    from afes.generate import generate_pandas_code
+
+    df = explore_files(root)
+    return (
+        lambda: generate_pandas_code(
+            df, verbose=False, python_file=workdir / "code.txt"
+        ),
+        0,
+        len(df),
+    )
+
+
+def bench_profile_files(root: Path, workdir: Path) -> tuple[Callable, int, int]:
+    from afes.afe import explore_files, profile_files
+
+    df = explore_files(root)
+    return (
+        lambda: profile_files(
+            df, output_path=workdir / "reports", profile_tool="afes", overwrite=True
+        ),
+        int(df["size"].sum()),
+        len(df),
+    )
+
+
+def bench_cli_startup(root: Path, workdir: Path) -> tuple[Callable, int, int]:
+    command = [sys.executable, "-m", "afes", "--help"]
+    return lambda: subprocess.run(command, capture_output=True, check=True), 0, 1
+
+
+BENCHMARKS = {
+    "get_row_count": bench_get_row_count,
+    "get_separator": bench_get_separator,
+    "_get_descriptions": bench__get_descriptions,
+    "explore_files": bench_explore_files,
+    "generate_pandas_code": bench_generate_pandas_code,
+    "profile_files": bench_profile_files,
+    "cli_startup": bench_cli_startup,
+}
+
+
+def run_benchmark(name: str, root: Path, workdir: Path, repeat: int = 3) -> dict:
+    """Runs a benchmark `repeat` times and returns its fastest time,
+    throughput and the peak memory of the process.
+
+    Args:
+        name (str): Benchmark from BENCHMARKS.
+        root (Path): Folder with the synthetic files.
+        workdir (Path): Folder for the outputs of the benchmark.
+        repeat (int, optional): Number of runs. Defaults to 3.
+
+    Returns:
+        dict: `seconds`, `mb_per_s`, `files_per_s` and `peak_rss_mib`.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        function, size, files = BENCHMARKS[name](root, workdir)
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+    seconds = min(times)
+    return {
+        "seconds": seconds,
+        "mb_per_s": size / 1024**2 / seconds if size else None,
+        "files_per_s": files / seconds,
+        "peak_rss_mib": _peak_rss() / 1024**2,
+    }
+
+
+def run_benchmarks(
+    scale: str = "small",
+    repeat: int = 3,
+    names: list[str] | None = None,
+    data_dir: str | Path | None = None,
+    isolate: bool = True,
+) -> dict[str, dict]:
+    """Generates the synthetic files and runs the benchmarks.
+
+    Args:
+        scale (str, optional): Scale of the synthetic files. Defaults to
+            "small".
+        repeat (int, optional): Runs of each benchmark. Defaults to 3.
+        names (list[str] | None, optional): Benchmarks to run. Defaults to
+            None, all of them.
+        data_dir (str | Path | None, optional): Folder to keep the synthetic
+            files between runs. Defaults to None, a temporary folder.
+        isolate (bool, optional): Run each benchmark in a new process, so the
+            peak memory is the memory of the benchmark. Defaults to True.
+
+    Returns:
+        dict[str, dict]: Results of each benchmark.
+    """
+    from benchmarks.data import make_tree
+
+    names = names or list(BENCHMARKS)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(data_dir) / scale if data_dir else Path(tmp) / "data"
+        if not root.exists():
+            make_tree(root, scale=scale)
+        results = {}
+        for name in names:
+            workdir = Path(tmp) / name
+            workdir.mkdir(parents=True, exist_ok=True)
+            if not isolate:
+                results[name] = run_benchmark(name, root, workdir, repeat)
+                continue
+            with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as pool:
+                results[name] = pool.submit(
+                    run_benchmark, name, root, workdir, repeat
+                ).result()
+    return results
+
+
+def compare(
+    results: dict[str, dict], baseline: dict[str, dict], tolerance: float = TOLERANCE
+) -> list[str]:
+    """Returns the benchmarks that are slower than the baseline by more than
+    `tolerance`.
+
+    Args:
+        results (dict[str, dict]): Results of `run_benchmarks`.
+        baseline (dict[str, dict]): Results saved as baseline.
+        tolerance (float, optional): Allowed slowdown. Defaults to TOLERANCE.
+
+    Returns:
+        list[str]: Names of the benchmarks with regressions.
+    """
+    return [
+        name
+        for name, result in results.items()
+        if name in baseline
+        and result["seconds"] > baseline[name]["seconds"] * (1 + tolerance)
+    ]
+
+
+def _format(name: str, result: dict, baseline: dict | None) -> str:
+    line = f"{name:<22} {result['seconds']:>9.3f}s"
+    line += f" {result['mb_per_s']:>9.1f} MB/s" if result["mb_per_s"] else " " * 15
+    line += f" {result['files_per_s']:>10.1f} files/s"
+    line += f" {result['peak_rss_mib']:>8.1f} MiB"
+    if baseline is not None:
+        line += f" {result['seconds'] / baseline['seconds']:>6.2f}x baseline"
+    return line
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks of afes.")
+    parser.add_argument("--scale", default="small", choices=["tiny", "small", "large"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--bench", action="append", choices=list(BENCHMARKS))
+    parser.add_argument("--data-dir", help="Folder to reuse the synthetic files.")
+    parser.add_argument("--save", action="store_true", help="Save as baseline.")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args(argv)
+
+    os.environ["TQDM_DISABLE"] = "1"
+    results = run_benchmarks(
+        scale=args.scale, repeat=args.repeat, names=args.bench, data_dir=args.data_dir
+    )
+    baseline_file = BASELINES_DIR / f"{args.scale}.json"
+    baseline = json.loads(baseline_file.read_text()) if baseline_file.exists() else {}
+    for name, result in results.items():
+        print(_format(name, result, baseline.get(name)))
+    if args.save:
+        BASELINES_DIR.mkdir(exist_ok=True)
+        baseline_file.write_text(json.dumps(baseline | results, indent=2) + "\n")
+        print(f'Baseline saved to "{baseline_file}"')
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"Slower than the baseline: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
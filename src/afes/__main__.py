@@ -1,19 +1,81 @@
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import pandas as pd
 import typer
 
-from afes.afe import explore_files, generate_code, profile_files
+from afes.config import CACHE_DIR, CHUNK_ROWS
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+# pandas, NumPy and the rest of afes are imported by the commands that use
+# them, so `afes --help` and the startup of each command do not wait for them.
 app = typer.Typer()
 
 
 @app.command()
-def explore(path: str) -> pd.DataFrame:
+def explore(
+    path: str,
+    workers: int | None = None,
+    executor: str = "thread",
+    cache: bool = False,
+    cache_dir: str = str(CACHE_DIR),
+    cache_hash: bool = False,
+    incremental: str | None = None,
+    include: list[str] | None = None,
+    exclude: list[str] | None = None,
+    hidden: bool = False,
+    max_depth: int | None = None,
+    follow_symlinks: bool = False,
+    stats: bool = False,
+    trace: str | None = None,
+    cprofile: str | None = None,
+    dedupe: bool = False,
+    datasets: bool = False,
+    out: str | None = None,
+):
     """Explore files from the command line.
 
     Args:
         path (str): Path to the structured data files.
+        workers (int | None, optional): Number of files explored in
+            parallel. Defaults to None, 1 or 64 with the `async` executor.
+        executor (str, optional): `thread`, `process` or `async`, for
+            network storage. Defaults to "thread".
+        cache (bool, optional): Reuse the results of previous explorations for
+            the files that did not change. Defaults to False.
+        cache_dir (str, optional): Folder to store the cache. Defaults to
+            CACHE_DIR.
+        cache_hash (bool, optional): Also compare the content hash of the
+            files with the cache. Defaults to False.
+        incremental (str | None, optional): `.parquet`, `.json` or `.sqlite`
+            catalog with the result of the previous exploration. Only new and
+            modified files are explored and the result is saved back to this
+            catalog. Defaults to None.
+        include (list[str] | None, optional): Glob patterns of the files to
+            explore. Defaults to None.
+        exclude (list[str] | None, optional): Glob patterns of the files and
+            folders to skip. Defaults to None.
+        hidden (bool, optional): Explore hidden files and folders. Defaults to
+            False.
+        max_depth (int | None, optional): Maximum number of subfolders to walk
+            down. Defaults to None.
+        follow_symlinks (bool, optional): Walk symbolic links to folders.
+            Defaults to False.
+        stats (bool, optional): Add the seconds, bytes read and peak memory of
+            each stage of the exploration and print a summary. Defaults to
+            False.
+        trace (str | None, optional): JSON file to save the trace of the
+            stages. Defaults to None.
+        cprofile (str | None, optional): File to save the `cProfile` stats.
+            Defaults to None.
+        dedupe (bool, optional): Find the files with the same content.
+            Defaults to False.
+        datasets (bool, optional): Group the files with the same schema in
+            datasets. Defaults to False.
+        out (str | None, optional): `.parquet`, `.json` or `.sqlite` file to
+            save the catalog of the files, to be used by `--catalog`. Defaults
+            to None.
 
     Raises:
         Exception: Files not found.
@@ -21,42 +83,242 @@ def explore(path: str) -> pd.DataFrame:
     Returns:
         pd.DataFrame: List with metadata about the files explored.
     """
+    from afes.afe import explore_files
+    from afes.catalog import load_catalog, save_catalog
+
     path_to_explore = Path(path)
+    since = None
+    if incremental is not None and Path(incremental).exists():
+        since = load_catalog(incremental)
     if path_to_explore.exists():
-        df = explore_files(path_to_explore)
+        df = explore_files(
+            path_to_explore,
+            workers=workers,
+            executor=executor,
+            cache=cache,
+            cache_dir=cache_dir,
+            cache_hash=cache_hash,
+            since=since,
+            include=include,
+            exclude=exclude,
+            hidden=hidden,
+            max_depth=max_depth,
+            follow_symlinks=follow_symlinks,
+            instrument=stats,
+            trace_file=trace,
+            cprofile_file=cprofile,
+            dedupe=dedupe,
+            datasets=datasets,
+        )
     else:
         raise Exception(f"Path {path} not valid")
+    if incremental is not None:
+        save_catalog(df, incremental)
+    if out is not None:
+        save_catalog(df, out)
     print(df)
     return df
 
 
+def _get_files(
+    path: str | None,
+    catalog: str | None,
+    cache: bool,
+    cache_dir: str,
+    cache_hash: bool,
+    dedupe: bool,
+    datasets: bool,
+) -> "pd.DataFrame":
+    """Returns the files from the catalog if there is one, exploring `path`
+    otherwise."""
+    if catalog is not None:
+        from afes.catalog import load_catalog
+
+        return load_catalog(catalog)
+    if path is None:
+        raise Exception("path or catalog not valid.")
+    return explore(
+        path,
+        cache=cache,
+        cache_dir=cache_dir,
+        cache_hash=cache_hash,
+        dedupe=dedupe,
+        datasets=datasets,
+    )
+
+
 @app.command()
-def generate(path: str, output_file: str = "code.txt") -> None:
+def generate(
+    path: str | None = typer.Argument(None),
+    output_file: str = "code.txt",
+    cache: bool = False,
+    cache_dir: str = str(CACHE_DIR),
+    cache_hash: bool = False,
+    typed: bool = False,
+    pyarrow: bool = False,
+    target: str = "pandas",
+    database: str = "afes.sqlite",
+    engine: str = "pandas",
+    dedupe: bool = False,
+    datasets: bool = False,
+    catalog: str | None = None,
+) -> None:
     """Generate pandas code to load the files.
 
     Args:
         path (str): Path to the structured data files.
         output_file (str, optional): Path to the file to save the generated
             code. Defaults to "code.txt".
+        cache (bool, optional): Reuse the results of previous explorations for
+            the files that did not change. Defaults to False.
+        cache_dir (str, optional): Folder to store the cache. Defaults to
+            CACHE_DIR.
+        cache_hash (bool, optional): Also compare the content hash of the
+            files with the cache. Defaults to False.
+        typed (bool, optional): Generate code with the dtypes inferred from
+            the first rows of each file. Defaults to False.
+        pyarrow (bool, optional): Generate code that loads the files with
+            pyarrow. Defaults to False.
+        target (str, optional): `pandas`, `postgres` or `sqlite`. Defaults to
+            "pandas".
+        database (str, optional): Database loaded by the `sqlite` code.
+            Defaults to "afes.sqlite".
+        engine (str, optional): `pandas`, `pandas-chunked`, `pyarrow-dataset`,
+            `duckdb` or `polars-lazy` for the files bigger than `BIG_FILE`.
+            Defaults to "pandas".
+        dedupe (bool, optional): Skip the files with the same content as
+            another file. Defaults to False.
+        datasets (bool, optional): Load the files with the same schema
+            together. Defaults to False.
+        catalog (str | None, optional): Catalog saved by `afes explore --out`
+            to use instead of exploring `path`. Defaults to None.
     """
-    df = explore(path)
-    generate_code(df=df, python_file=output_file)
+    from afes.afe import generate_code
+
+    df = _get_files(path, catalog, cache, cache_dir, cache_hash, dedupe, datasets)
+    generate_code(
+        df=df,
+        python_file=output_file,
+        typed=typed,
+        pyarrow=pyarrow,
+        target=target,
+        database=database,
+        engine=engine,
+    )
 
 
 @app.command()
 def profile(
-    path: str, output_path: str = ".", profile_tool: str = "ydata-profiling"
+    path: str | None = typer.Argument(None),
+    output_path: str = ".",
+    profile_tool: str = "ydata-profiling",
+    cache: bool = False,
+    cache_dir: str = str(CACHE_DIR),
+    cache_hash: bool = False,
+    sample_rows: int | None = None,
+    sample_strategy: str = "reservoir",
+    stratify_by: str | None = None,
+    workers: int = 1,
+    max_memory: str | None = None,
+    overwrite: bool = False,
+    dedupe: bool = False,
+    datasets: bool = False,
+    catalog: str | None = None,
 ) -> None:
     """Profile the structured data.
 
     Args:
         path (str): Path to the structured data files.
         output_path (str): Path to save the HTML reports.
-        profile_tool (str, optional): `ydata-profiling` or `sweetviz`.
+        profile_tool (str, optional): `ydata-profiling`, `sweetviz` or `afes`.
             Defaults to "ydata-profiling".
+        sample_rows (int | None, optional): Profile a sample of this number of
+            rows of the bigger files. Defaults to None.
+        sample_strategy (str, optional): `head`, `reservoir` or `stratified`.
+            Defaults to "reservoir".
+        stratify_by (str | None, optional): Column used by the `stratified`
+            strategy. Defaults to None, the last column.
+        cache (bool, optional): Reuse the results of previous explorations for
+            the files that did not change. Defaults to False.
+        cache_dir (str, optional): Folder to store the cache. Defaults to
+            CACHE_DIR.
+        cache_hash (bool, optional): Also compare the content hash of the
+            files with the cache. Defaults to False.
+        dedupe (bool, optional): Skip the files with the same content as
+            another file. Defaults to False.
+        datasets (bool, optional): Profile the files with the same schema
+            together. Defaults to False.
+        catalog (str | None, optional): Catalog saved by `afes explore --out`
+            to use instead of exploring `path`. Defaults to None.
     """
-    df = explore(path)
-    profile_files(df=df, output_path=output_path, profile_tool=profile_tool)
+    from afes.afe import profile_files
+
+    df = _get_files(path, catalog, cache, cache_dir, cache_hash, dedupe, datasets)
+    profile_files(
+        df=df,
+        output_path=output_path,
+        profile_tool=profile_tool,
+        sample_rows=sample_rows,
+        sample_strategy=sample_strategy,
+        stratify_by=stratify_by,
+        workers=workers,
+        max_memory=max_memory,
+        overwrite=overwrite,
+    )
+
+
+@app.command()
+def convert(
+    path: str,
+    output_path: str = ".",
+    to: str = "parquet",
+    compression: str | None = None,
+    row_group_size: int = CHUNK_ROWS,
+    partition_by: list[str] | None = None,
+    overwrite: bool = False,
+    output_file: str | None = None,
+    cache: bool = False,
+    cache_dir: str = str(CACHE_DIR),
+    cache_hash: bool = False,
+) -> None:
+    """Convert the structured data to Parquet or Feather.
+
+    Args:
+        path (str): Path to the structured data files.
+        output_path (str, optional): Path to save the converted files.
+            Defaults to ".".
+        to (str, optional): `parquet` or `feather`. Defaults to "parquet".
+        compression (str | None, optional): Compression codec, as `snappy`,
+            `zstd` or `lz4`. Defaults to None.
+        row_group_size (int, optional): Rows per row group. Defaults to
+            CHUNK_ROWS.
+        partition_by (list[str] | None, optional): Columns to partition
+            Parquet files by. Defaults to None.
+        overwrite (bool, optional): Convert the files again even if the
+            converted files are newer. Defaults to False.
+        output_file (str | None, optional): Path to save the pandas code to
+            load the converted files. Defaults to None.
+        cache (bool, optional): Reuse the results of previous explorations for
+            the files that did not change. Defaults to False.
+        cache_dir (str, optional): Folder to store the cache. Defaults to
+            CACHE_DIR.
+        cache_hash (bool, optional): Also compare the content hash of the
+            files with the cache. Defaults to False.
+    """
+    from afes.afe import convert_files, generate_code
+
+    df = explore(path, cache=cache, cache_dir=cache_dir, cache_hash=cache_hash)
+    convert_files(
+        df=df,
+        output_path=output_path,
+        to=to,
+        compression=compression,
+        row_group_size=row_group_size,
+        partition_by=partition_by,
+        overwrite=overwrite,
+    )
+    if output_file is not None:
+        generate_code(df=df, python_file=output_file)
 
 
 if __name__ == "__main__":
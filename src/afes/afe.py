@@ -1,176 +1,1546 @@
+import asyncio
+import cProfile
+import os
+import tracemalloc
+import zipfile
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
+from fnmatch import fnmatch
+from functools import partial
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator
 
 import pandas as pd
 from tqdm.auto import tqdm
 
-from afes.config import PLAIN_FORMATS, SUPPORTED_FORMATS
-from afes.generate import generate_pandas_code
+from afes.cache import ExplorationCache
+from afes.config import (
+    ARCHIVE_FORMATS,
+    ASYNC_CONCURRENCY,
+    BIG_FILE,
+    CACHE_DIR,
+    CHUNK_ROWS,
+    CONVERT_FORMATS,
+    ENCODING_DETECTOR,
+    ENCODING_MIN_CONFIDENCE,
+    MEMORY_FACTOR,
+    PARTIAL_HASH_BLOCK,
+    PLAIN_FORMATS,
+    ROW_COUNT_SAMPLE,
+    SUPPORTED_FORMATS,
+)
+from afes.convert import convert_file, get_converted_path
+from afes.generate import (
+    generate_pandas_code,
+    generate_sql_code,
+    get_dataset_name,
+    get_datasets,
+    get_schema_fingerprint,
+)
 from afes.profile import (
+    REPORT_SUFFIXES,
+    get_report_path,
+    iter_file_chunks,
     load_file_with_pandas,
+    load_sample_with_pandas,
+    profile_with_afes,
     profile_with_sweetviz,
     profile_with_ydata_profiling,
 )
-from afes.utils import get_human_readable_size, get_row_count, get_separator
+from afes.stats import (
+    STAT_COLUMNS,
+    FileStats,
+    iter_with_stats,
+    record,
+    stage,
+    summarize_stats,
+    write_trace,
+)
+from afes.utils import (
+    get_extension,
+    get_file_hash,
+    get_human_readable_size,
+    get_partial_hash,
+    get_record_count,
+    get_sheet_row_count,
+    get_stem,
+    is_supported,
+    open_binary,
+    parse_human_readable_size,
+    scan_file,
+    split_archive_path,
+)
+
+EXECUTORS = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+COLUMNS = [
+    "path",
+    "name",
+    "extension",
+    "compression",
+    "size",
+    "human_readable",
+    "uncompressed_size",
+    "rows",
+    "rows_exact",
+    "separator",
+    "encoding",
+    "mtime_ns",
+]
+
+
+def _matches(path: Path, root: Path, patterns: list[str] | None) -> bool:
+    """Returns True if the name of the path, or the path relative to the root,
+    matches any of the glob patterns.
+    """
+    if not patterns:
+        return False
+    relative = path.relative_to(root).as_posix()
+    return any(fnmatch(relative, p) or fnmatch(path.name, p) for p in patterns)
 
 
-def _get_files(path: Path) -> Iterable:
-    """Returns all the files in a directory.
+def _scan_folder(
+    folder: Path,
+    root: Path,
+    depth: int,
+    include: list[str] | None = None,
+    exclude: list[str] | None = None,
+    hidden: bool = False,
+    max_depth: int | None = None,
+    follow_symlinks: bool = False,
+) -> tuple[list[tuple[Path, os.stat_result]], list[tuple[Path, tuple | None]]]:
+    """Lists a folder with the filters of `_walk_files`.
+
+    Args:
+        folder (Path): Folder to list.
+        root (Path): Folder where the walk started.
+        depth (int): Number of subfolders between `root` and `folder`.
+        **filters: The filters of `_walk_files`.
+
+    Returns:
+        tuple[list[tuple[Path, os.stat_result]], list[tuple[Path, tuple | None]]]:
+            Supported files with their stat result, and subfolders to walk with
+            the device and inode of the symbolic links, sorted by name. Both
+            are empty if the folder can not be listed.
+    """
+    try:
+        with os.scandir(folder) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+    except OSError as e:
+        print(e)
+        print(f"Error with {folder}")
+        return [], []
+    files = []
+    subfolders = []
+    for entry in entries:
+        if not hidden and entry.name.startswith("."):
+            continue
+        entry_path = Path(entry.path)
+        if entry.is_dir(follow_symlinks=follow_symlinks):
+            if max_depth is not None and depth >= max_depth:
+                continue
+            if _matches(entry_path, root, exclude):
+                continue
+            inode = None
+            if entry.is_symlink():
+                link_stat = entry.stat()
+                inode = (link_stat.st_dev, link_stat.st_ino)
+            subfolders.append((entry_path, inode))
+        elif entry.is_file():
+            if not is_supported(entry.name):
+                continue
+            if include and not _matches(entry_path, root, include):
+                continue
+            if _matches(entry_path, root, exclude):
+                continue
+            with stage("stat"):
+                files.append((entry_path, entry.stat()))
+    return files, subfolders
+
+
+def _walk_files(
+    path: Path,
+    include: list[str] | None = None,
+    exclude: list[str] | None = None,
+    hidden: bool = False,
+    max_depth: int | None = None,
+    follow_symlinks: bool = False,
+) -> Iterator[tuple[Path, os.stat_result]]:
+    """Yields the supported files in a directory with their stat result, as the
+    directory is walked. The folders that can not be listed are reported and
+    skipped.
 
     Args:
         path (Path): Path to read files.
+        include (list[str] | None, optional): Glob patterns, matched against
+            the file name or the path relative to `path`, that the files must
+            match. Defaults to None, all the supported files.
+        exclude (list[str] | None, optional): Glob patterns of files and
+            folders to skip. Excluded folders are not walked. Defaults to None.
+        hidden (bool, optional): Include files and folders starting with a dot.
+            Defaults to False.
+        max_depth (int | None, optional): Maximum number of subfolders to walk
+            down, 0 only reads the files in `path`. Defaults to None.
+        follow_symlinks (bool, optional): Walk symbolic links to folders.
+            Links to files are always included. Defaults to False.
 
     Raises:
         Exception: If the path is not valid.
 
+    Yields:
+        Iterator[tuple[Path, os.stat_result]]: Files in the folder and
+            subfolders and their stat result, sorted by name in each folder.
+    """
+    if path.is_file():
+        with stage("stat"):
+            path_stat = path.stat()
+        yield path, path_stat
+        return
+    elif not path.is_dir():
+        raise Exception("path not valid.")
+
+    root_stat = path.stat()
+    visited = {(root_stat.st_dev, root_stat.st_ino)}
+    folders = [(path, 0)]
+    while folders:
+        folder, depth = folders.pop()
+        files, subfolders = _scan_folder(
+            folder,
+            path,
+            depth,
+            include=include,
+            exclude=exclude,
+            hidden=hidden,
+            max_depth=max_depth,
+            follow_symlinks=follow_symlinks,
+        )
+        yield from files
+        subfolders = [
+            (subfolder, depth + 1)
+            for subfolder, inode in subfolders
+            if _visit(visited, inode)
+        ]
+        folders.extend(reversed(subfolders))
+
+
+def _visit(visited: set, inode: tuple | None) -> bool:
+    """Returns False if the folder linked by a symbolic link was visited, and
+    marks it as visited."""
+    if inode is None:
+        return True
+    if inode in visited:
+        return False
+    visited.add(inode)
+    return True
+
+
+def _walk_order(path: Path, root: Path) -> tuple:
+    """Returns a key to sort the files in the order of `_walk_files`, the
+    files of a folder before the files of its subfolders."""
+    parts = path.relative_to(root).parts
+    return tuple((1, part) for part in parts[:-1]) + ((0, parts[-1]),)
+
+
+def _get_files(path: Path, **kwargs) -> Iterator[Path]:
+    """Returns all the supported files in a directory.
+
+    Args:
+        path (Path): Path to read files.
+        **kwargs: Filters passed to `_walk_files`.
+
+    Raises:
+        Exception: If the path is not valid.
+
+    Returns:
+        Iterator[Path]: The files in the folder and subfolders.
+    """
+    return (f for f, _ in _walk_files(path, **kwargs))
+
+
+def _get_cache_options(estimate_rows: bool) -> str:
+    """Returns the options of the descriptions stored in the cache, so the
+    cached descriptions are not used after the columns or the encoding
+    detection change."""
+    return (
+        f"columns={','.join(COLUMNS)};estimate_rows={estimate_rows};"
+        f"encoding_detector={ENCODING_DETECTOR}"
+    )
+
+
+def _describe_file(
+    f: Path, estimate_rows: bool = False, stat: os.stat_result | None = None
+) -> list[dict]:
+    """Returns the description of a file, one record per table in the file with
+    the values of `COLUMNS`.
+
+    Plain files are read once to get the rows, separator and encoding, and the
+    records of JSON, XML and ARFF files are counted with streaming parsers.
+    Compressed files are decompressed while they are read, and ZIP archives
+    are described member by member.
+
+    Args:
+        f (Path): File to describe.
+        estimate_rows (bool, optional): Estimate the number of rows of plain
+            files bigger than `BIG_FILE` from a sample of the file instead of
+            reading them completely. Defaults to False.
+        stat (os.stat_result | None, optional): Stat result of the file if it
+            is already known. Defaults to None.
+
     Returns:
-        Iterable: An iterable with all the files in the folder and subfolders.
+        list[dict]: Descriptions of the tables in the file, empty if the file
+            is not supported.
     """
-    if path.is_dir():
-        return path.rglob("*")
-    elif path.is_file():
-        return [path]
+    if not is_supported(f):
+        return []
+    file_extension, compression = get_extension(f)
+    if stat is None:
+        with stage("stat"):
+            stat = f.stat()
+    if file_extension.lower() in ARCHIVE_FORMATS:
+        return _describe_archive(f, estimate_rows=estimate_rows, stat=stat)
+    description = dict.fromkeys(COLUMNS)
+    description.update(
+        path=f,
+        name=get_stem(f),
+        extension=file_extension,
+        compression=compression,
+        size=stat.st_size,
+        human_readable=get_human_readable_size(stat.st_size),
+        uncompressed_size=None if compression else stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+    )
+
+    if file_extension in PLAIN_FORMATS:
+        big_file = estimate_rows and stat.st_size > BIG_FILE
+        scan = scan_file(f, max_bytes=ROW_COUNT_SAMPLE if big_file else None)
+        description.update(
+            rows=scan.rows,
+            rows_exact=scan.rows_exact,
+            separator=scan.separator,
+            encoding=scan.encoding,
+            uncompressed_size=scan.uncompressed_size,
+        )
+        if scan.encoding_confidence < ENCODING_MIN_CONFIDENCE:
+            print(
+                f"Low confidence ({scan.encoding_confidence:.0%}) in the encoding "
+                f"{scan.encoding} of {f}"
+            )
+        return [description]
+    elif file_extension == ".xlsx":
+        descriptions = []
+        with (
+            stage("excel"),
+            open_binary(f) as source,
+            pd.ExcelFile(source, engine="openpyxl") as excel_file,
+        ):
+            for worksheet in excel_file.book.worksheets:
+                rows, rows_exact = get_sheet_row_count(worksheet)
+                descriptions.append(
+                    description
+                    | {"name": worksheet.title, "rows": rows, "rows_exact": rows_exact}
+                )
+        return descriptions
     else:
-        raise Exception("path not valid.")
+        with stage("records"):
+            rows = get_record_count(f, file_extension)
+        description.update(rows=rows, rows_exact=None if rows is None else True)
+        return [description]
+
 
+def _describe_archive(
+    f: Path, estimate_rows: bool = False, stat: os.stat_result | None = None
+) -> list[dict]:
+    """Returns the descriptions of the supported files in a ZIP archive,
+    reading each member as a stream without extracting it.
 
-def _get_descriptions(all_files: Iterable) -> pd.DataFrame:
-    """Returns a list with ["path", "name", "extension", "size",
-    "human_readable", "rows"]
+    The path of each member is the path of the archive followed by the name of
+    the member, as `data.zip/folder/file.csv`, and its size is the compressed
+    size in the archive.
 
     Args:
-        all_files (Iterable): List for files to describe.
+        f (Path): Archive to describe.
+        estimate_rows (bool, optional): Passed to `_describe_file`. Defaults
+            to False.
+        stat (os.stat_result | None, optional): Stat result of the archive.
+            Defaults to None.
 
     Returns:
-        pd.DataFrame: DataFrame with description of the files.
+        list[dict]: Descriptions of the tables in the archive.
     """
-    files = []
-    pbar = tqdm(enumerate(list(all_files)), total=len(list(all_files)), unit="files")
-    for _, f in pbar:
+    stat = stat or f.stat()
+    descriptions = []
+    with zipfile.ZipFile(f) as archive:
+        members = archive.infolist()
+    for info in members:
+        extension, compression = get_extension(info.filename)
+        if (
+            info.is_dir()
+            or compression is not None
+            or extension.lower() not in SUPPORTED_FORMATS
+        ):
+            continue
+        for description in _describe_file(f / info.filename, estimate_rows, stat):
+            description.update(
+                compression="zip",
+                size=info.compress_size,
+                human_readable=get_human_readable_size(info.compress_size),
+                uncompressed_size=info.file_size,
+            )
+            descriptions.append(description)
+    return descriptions
+
+
+def _safe_describe_file(
+    f: Path, estimate_rows: bool = False, stat: os.stat_result | None = None
+) -> list[dict] | None:
+    """Returns the description of a file, or None if the file cannot be
+    described.
+
+    Args:
+        f (Path): File to describe.
+        estimate_rows (bool, optional): Estimate the number of rows of big
+            plain files. Defaults to False.
+        stat (os.stat_result | None, optional): Stat result of the file.
+            Defaults to None.
+
+    Returns:
+        list[dict] | None: Descriptions of the tables in the file.
+    """
+    try:
+        return _describe_file(f, estimate_rows=estimate_rows, stat=stat)
+    except Exception as e:
+        print(e)
+        print(f"Error with {f}")
+        return None
+
+
+def _describe_file_with_stats(
+    f: Path, estimate_rows: bool = False, stat: os.stat_result | None = None
+) -> tuple[list[dict] | None, FileStats]:
+    """Returns the description of a file and the stats of each stage.
+
+    Args:
+        f (Path): File to describe.
+        estimate_rows (bool, optional): Estimate the number of rows of big
+            plain files. Defaults to False.
+        stat (os.stat_result | None, optional): Stat result of the file.
+            Defaults to None.
+
+    Returns:
+        tuple[list[dict] | None, FileStats]: Descriptions of the tables in the
+            file and the stats of the stages.
+    """
+    if not tracemalloc.is_tracing():
+        # Worker processes trace their own memory.
+        tracemalloc.start()
+    with record(FileStats()) as file_stats:
+        description = _safe_describe_file(f, estimate_rows, stat)
+    return description, file_stats
+
+
+def _get_descriptions(
+    all_files: Iterable,
+    estimate_rows: bool = False,
+    workers: int = 1,
+    executor: str = "thread",
+    cache: ExplorationCache | None = None,
+    instrument: bool = False,
+    trace_file: str | Path | None = None,
+) -> pd.DataFrame:
+    """Returns a DataFrame with the `COLUMNS` describing each file.
+
+    The files are described as they are consumed from `all_files`, so a
+    generator can still be walking the folders while the first files are
+    described.
+
+    Args:
+        all_files (Iterable): Files to describe, as paths or as tuples with the
+            path and its stat result.
+        estimate_rows (bool, optional): Estimate the number of rows of plain
+            files bigger than `BIG_FILE` from a sample of the file instead of
+            reading them completely. Defaults to False.
+        workers (int, optional): Number of files described in parallel.
+            Defaults to 1.
+        executor (str, optional): `thread` or `process` pool used when
+            `workers` is greater than 1. Defaults to "thread".
+        cache (ExplorationCache | None, optional): Cache to reuse the
+            descriptions of the files that did not change. Defaults to None.
+        instrument (bool, optional): Add the `STAT_COLUMNS` with the seconds,
+            bytes read and peak memory of each stage. Defaults to False.
+        trace_file (str | Path | None, optional): JSON file to save the trace
+            of the stages when instrumented. Defaults to None.
+
+    Raises:
+        Exception: If the executor is not valid.
+
+    Returns:
+        pd.DataFrame: DataFrame with description of the files, in the same
+            order as `all_files`.
+    """
+    if executor not in EXECUTORS:
+        raise Exception(f"executor {executor} not valid.")
+    descriptions: dict[int, list[dict]] = {}
+    stats: dict[int, tuple[Path, FileStats]] = {}
+    options = _get_cache_options(estimate_rows)
+    describe = _describe_file_with_stats if instrument else _safe_describe_file
+    pbar = tqdm(total=0, unit="files")
+
+    def _store(i: int, f: Path, result) -> None:
         pbar.set_description(f.name)
-        file_name = f.stem
-        file_extension = f.suffix
-        file_size = f.stat().st_size
-        hr_size = get_human_readable_size(file_size)
-
-        if file_extension.lower() in SUPPORTED_FORMATS:
-            if file_extension in PLAIN_FORMATS:
-                row_count: int | None = get_row_count(f)
-                files.append(
-                    (f, file_name, file_extension, file_size, hr_size, row_count)
-                )
-            elif file_extension == ".xlsx":
-                excel_file = pd.ExcelFile(f)
-                for sheet_name in excel_file.sheet_names:
-                    df_sheet = pd.read_excel(f, sheet_name=sheet_name)
-                    files.append(
-                        (
-                            f,
-                            sheet_name,
-                            file_extension,
-                            file_size,
-                            hr_size,
-                            len(df_sheet),
-                        )
-                    )
-            else:
-                row_count = None
-                files.append(
-                    (f, file_name, file_extension, file_size, hr_size, row_count)
+        pbar.update()
+        description = result
+        if instrument:
+            description, file_stats = result
+            stats[i][1].merge(file_stats)
+        if description is not None:
+            descriptions[i] = description
+            if cache is not None:
+                cache.put(f, description, options=options)
+
+    tracing = instrument and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    try:
+        with (
+            EXECUTORS[executor](max_workers=workers) if workers > 1 else nullcontext()
+        ) as pool:
+            futures = {}
+            for i, (item, walk_stats) in enumerate(
+                iter_with_stats(all_files, "walk", enabled=instrument)
+            ):
+                f, stat = item if isinstance(item, tuple) else (item, None)
+                if not is_supported(f):
+                    continue
+                pbar.total += 1
+                if instrument:
+                    stats[i] = (f, walk_stats)
+                cached = (
+                    cache.get(f, options=options, stat=stat)
+                    if cache is not None
+                    else None
                 )
-        else:
-            pass
+                if cached is not None:
+                    descriptions[i] = cached
+                    pbar.update()
+                elif pool is None:
+                    _store(i, f, describe(f, estimate_rows, stat))
+                else:
+                    future = pool.submit(describe, f, estimate_rows, stat)
+                    futures[future] = (i, f)
+            for future in as_completed(futures):
+                _store(*futures[future], future.result())
+    finally:
+        if tracing:
+            tracemalloc.stop()
+    pbar.close()
 
     # Creates a dataframe with the results of the files exploration.
-    columns = ["path", "name", "extension", "size", "human_readable", "rows"]
+    columns = COLUMNS + STAT_COLUMNS if instrument else COLUMNS
+    files = [
+        row | stats[i][1].to_columns() if instrument else row
+        for i in sorted(descriptions)
+        for row in descriptions[i]
+    ]
+    df = _to_dataframe(files, columns=columns)
+    if instrument:
+        for column in STAT_COLUMNS:
+            if not column.endswith("_seconds"):
+                df[column] = df[column].astype("Int64")
+    if trace_file is not None and instrument:
+        write_trace(((str(f), s) for f, s in stats.values()), trace_file)
+    return df
+
+
+def _to_dataframe(files: list[dict], columns: list[str] = COLUMNS) -> pd.DataFrame:
+    """Returns the descriptions of the files as a DataFrame."""
     df = pd.DataFrame(files, columns=columns)
+    df["rows"] = df["rows"].astype("Int64")
+    df["uncompressed_size"] = df["uncompressed_size"].astype("Int64")
     return df
 
 
-def explore_files(path: str | Path) -> pd.DataFrame:
+def _get_file_key(path: str | Path) -> str:
+    """Returns the path of the file found in the folders for a row of the
+    exploration, the archive for the files in archives."""
+    return str(split_archive_path(path)[0])
+
+
+def _get_changes(
+    all_files: Iterable, since: pd.DataFrame
+) -> tuple[list[tuple[Path, os.stat_result]], dict[str, str]]:
+    """Compares the files found with a previous exploration.
+
+    Args:
+        all_files (Iterable): Files found in the current exploration, as paths
+            or as tuples with the path and its stat result.
+        since (pd.DataFrame): DataFrame returned by a previous exploration.
+
+    Returns:
+        tuple[list[tuple[Path, os.stat_result]], dict[str, str]]: Files that
+            are new or modified and the status of each file: `new`, `modified`,
+            `unchanged` or `deleted`.
+    """
+    previous = {}
+    if "mtime_ns" in since.columns:
+        for path, size, mtime_ns in (
+            since[["path", "size", "mtime_ns"]]
+            .drop_duplicates(subset="path")
+            .itertuples(index=False)
+        ):
+            # The size of a file in an archive is not the size of the archive.
+            archive, member = split_archive_path(path)
+            previous[str(archive)] = (None if member else size, mtime_ns)
+    status = {_get_file_key(path): "deleted" for path in since["path"]}
+    changed = []
+    for item in all_files:
+        f, stat = item if isinstance(item, tuple) else (item, None)
+        if not is_supported(f):
+            continue
+        stat = stat or f.stat()
+        key = str(f)
+        size, mtime_ns = previous.get(key, (None, None))
+        if key not in status:
+            status[key] = "new"
+            changed.append((f, stat))
+        elif mtime_ns == stat.st_mtime_ns and size in (None, stat.st_size):
+            status[key] = "unchanged"
+        else:
+            status[key] = "modified"
+            changed.append((f, stat))
+    return changed, status
+
+
+def _hash_files(keys: list[str]) -> dict[str, str]:
+    """Returns the content hash of the files that may be duplicates of
+    another file.
+
+    The files are grouped by size, the groups by the hash of the first and
+    last blocks of the files, and only the files that still collide are hashed
+    completely. Files of up to two blocks are hashed completely at once. The
+    files with a unique size or a unique first and last blocks are not
+    duplicates and are not hashed.
+
+    Args:
+        keys (list[str]): Paths of the files.
+
+    Returns:
+        dict[str, str]: Content hash of each file that may be a duplicate.
+    """
+    by_size: dict[int, list[str]] = {}
+    for key in keys:
+        try:
+            by_size.setdefault(Path(key).stat().st_size, []).append(key)
+        except Exception as e:
+            print(e)
+            print(f"Error with {key}")
+    hashes = {}
+    groups = [group for group in by_size.values() if len(group) > 1]
+    for group in tqdm(groups, unit="sizes"):
+        small = Path(group[0]).stat().st_size <= 2 * PARTIAL_HASH_BLOCK
+        by_partial_hash: dict[str, list[str]] = {}
+        for key in group:
+            partial_hash = get_partial_hash(key, block_size=PARTIAL_HASH_BLOCK)
+            by_partial_hash.setdefault(partial_hash, []).append(key)
+        for partial_hash, files in by_partial_hash.items():
+            if small:
+                hashes.update(dict.fromkeys(files, partial_hash))
+            elif len(files) > 1:
+                hashes.update({key: get_file_hash(key) for key in files})
+    return hashes
+
+
+def _add_duplicates(df: pd.DataFrame) -> pd.DataFrame:
+    """Adds the `content_hash` and `duplicate_of` columns to an exploration.
+
+    The first file with a content is the original, the next files with the
+    same content are duplicates of it. The tables of a duplicated archive are
+    duplicates of the same tables in the original archive.
+
+    Args:
+        df (pd.DataFrame): DataFrame with description of the files.
+
+    Returns:
+        pd.DataFrame: The same DataFrame with the new columns.
+    """
+    existing = df if "status" not in df.columns else df[df["status"] != "deleted"]
+    keys = list(dict.fromkeys(existing["path"].map(_get_file_key)))
+    hashes = _hash_files(keys)
+    originals: dict[str, str] = {}
+    duplicates: dict[str, str] = {}
+    for key in keys:
+        if key in hashes:
+            original = originals.setdefault(hashes[key], key)
+            if original != key:
+                duplicates[key] = original
+
+    def duplicate_of(path: str | Path) -> Path | None:
+        archive, member = split_archive_path(path)
+        original = duplicates.get(str(archive))
+        if original is None:
+            return None
+        return Path(original) / member if member else Path(original)
+
+    df["content_hash"] = df["path"].map(_get_file_key).map(hashes)
+    df["duplicate_of"] = df["path"].map(duplicate_of)
+    print(f"{len(duplicates)} duplicates of {len(set(duplicates.values()))} files")
+    return df
+
+
+def _add_datasets(df: pd.DataFrame) -> pd.DataFrame:
+    """Adds the `fingerprint` and `dataset` columns to an exploration.
+
+    The files with the same fingerprint, the same format, separator, columns
+    and kind of values in their first rows, are parts of the same dataset,
+    named after the common prefix of their names. The files with a schema of
+    their own are a dataset of one file with their own name.
+
+    Args:
+        df (pd.DataFrame): DataFrame with description of the files.
+
+    Returns:
+        pd.DataFrame: The same DataFrame with the new columns.
+    """
+    fingerprints = []
+    for _, r in tqdm(df.iterrows(), total=len(df), desc="Fingerprints"):
+        valid = (
+            pd.notna(r.rows)
+            and r.rows > 0
+            and r.get("status") != "deleted"
+            and pd.isna(r.get("duplicate_of"))
+        )
+        fingerprints.append(get_schema_fingerprint(r) if valid else None)
+    df["fingerprint"] = fingerprints
+    datasets: dict[str, str] = {}
+    names: set[str] = set()
+    for fingerprint, rows in df.dropna(subset="fingerprint").groupby(
+        "fingerprint", sort=False
+    ):
+        name = get_dataset_name([Path(path).name.split(".")[0] for path in rows.path])
+        unique_name, i = name, 1
+        while unique_name in names:
+            i += 1
+            unique_name = f"{name}_{i}"
+        names.add(unique_name)
+        datasets[fingerprint] = unique_name
+    df["dataset"] = df["fingerprint"].map(datasets)
+    counts = df["dataset"].value_counts()
+    print(
+        f"{(counts > 1).sum()} datasets of more than one file, "
+        f"{counts[counts > 1].sum()} files"
+    )
+    return df
+
+
+def explore_files(
+    path: str | Path,
+    estimate_rows: bool = False,
+    workers: int | None = None,
+    executor: str = "thread",
+    cache: bool = False,
+    cache_dir: str | Path = CACHE_DIR,
+    cache_hash: bool = False,
+    since: pd.DataFrame | None = None,
+    include: list[str] | None = None,
+    exclude: list[str] | None = None,
+    hidden: bool = False,
+    max_depth: int | None = None,
+    follow_symlinks: bool = False,
+    instrument: bool = False,
+    trace_file: str | Path | None = None,
+    cprofile_file: str | Path | None = None,
+    dedupe: bool = False,
+    datasets: bool = False,
+) -> pd.DataFrame:
     """Return a dataframe with all the files.
 
     Args:
         path (str | Path): Path the file or to the directory with files.
+        estimate_rows (bool, optional): Estimate the number of rows of plain
+            files bigger than `BIG_FILE` instead of counting them. Defaults to
+            False.
+        workers (int | None, optional): Number of files explored in parallel.
+            Defaults to None, 1 or `ASYNC_CONCURRENCY` with the `async`
+            executor.
+        executor (str, optional): `thread`, `process` or `async`. Threads are
+            better when the files are on slow storage, processes when the files
+            are big and local. `async` walks the folders concurrently with
+            `explore_files_async`, for network storage with high latency, and
+            runs `workers` operations at a time. Defaults to "thread".
+        cache (bool, optional): Reuse the descriptions of the files that did
+            not change since the last exploration. Defaults to False.
+        cache_dir (str | Path, optional): Folder to store the cache. Defaults
+            to CACHE_DIR.
+        cache_hash (bool, optional): Also compare the content hash of the
+            files with the cache, for storage where the modification times are
+            not reliable. Defaults to False.
+        since (pd.DataFrame | None, optional): Result of a previous
+            exploration. Only the new and modified files are explored, the
+            rest are taken from `since`, and a `status` column tells if each
+            file is `new`, `modified`, `unchanged` or `deleted`. Defaults to
+            None.
+        include (list[str] | None, optional): Glob patterns of the files to
+            explore. Defaults to None.
+        exclude (list[str] | None, optional): Glob patterns of the files and
+            folders to skip. Defaults to None.
+        hidden (bool, optional): Explore hidden files and folders. Defaults to
+            False.
+        max_depth (int | None, optional): Maximum number of subfolders to walk
+            down. Defaults to None.
+        follow_symlinks (bool, optional): Walk symbolic links to folders.
+            Defaults to False.
+        instrument (bool, optional): Add the seconds, bytes read and peak
+            memory of each stage of the exploration of each file as
+            `<stage>_seconds`, `<stage>_bytes` and `<stage>_peak_memory`
+            columns, and print a summary of the stages. The stages are `walk`,
+            `stat`, `count`, `separator`, `excel` and `records`. Memory is
+            traced with `tracemalloc`, which slows down the exploration, and
+            the peaks of files explored by threads overlap. Defaults to False.
+        trace_file (str | Path | None, optional): JSON file to save the trace
+            of the stages, to be opened with `chrome://tracing` or Perfetto.
+            Implies `instrument`. Defaults to None.
+        cprofile_file (str | Path | None, optional): File to save the
+            `cProfile` stats of the exploration. Only the main thread is
+            profiled, use `workers=1`. Defaults to None.
+        dedupe (bool, optional): Find the files with the same content, adding
+            a `content_hash` column, set for the files that share their size
+            and their first and last blocks with another file, and a
+            `duplicate_of` column with the path of the first file with the
+            same content. Duplicates are skipped when generating code and
+            profiling. Defaults to False.
+        datasets (bool, optional): Group the files with the same schema in
+            datasets, adding a `fingerprint` column with a hash of the format,
+            separator, columns and kinds of values of each file and a
+            `dataset` column with the name of its group. The files of a
+            dataset are loaded together by the generated code and profiled as
+            one table. Defaults to False.
 
     Returns:
         pd.DataFrame: DataFrame with description of the files.
     """
     path = Path(path)
-    all_files = _get_files(path)
-    df = _get_descriptions(all_files=all_files)
-
-    # Determine the separator
-    df["separator"] = None
-    pbar = tqdm(range(len(df)), total=len(df))
-    for i in pbar:
-        pbar.set_description(f"{df.iloc[i]['name']} ({df.iloc[i]['rows']:,} records)")
-        if df.iloc[i]["extension"] in PLAIN_FORMATS:
-            sep = get_separator(df.iloc[i]["path"])
-            df.at[i, "separator"] = sep
-
+    instrument = instrument or trace_file is not None
+    if executor == "async":
+        if since is not None or instrument or cprofile_file is not None:
+            raise Exception("executor async with since or instrument not valid.")
+        df = asyncio.run(
+            explore_files_async(
+                path,
+                estimate_rows=estimate_rows,
+                concurrency=ASYNC_CONCURRENCY if workers is None else workers,
+                cache=cache,
+                cache_dir=cache_dir,
+                cache_hash=cache_hash,
+                include=include,
+                exclude=exclude,
+                hidden=hidden,
+                max_depth=max_depth,
+                follow_symlinks=follow_symlinks,
+            )
+        )
+        if dedupe:
+            df = _add_duplicates(df)
+        return _add_datasets(df) if datasets else df
+    all_files: Iterable = _walk_files(
+        path,
+        include=include,
+        exclude=exclude,
+        hidden=hidden,
+        max_depth=max_depth,
+        follow_symlinks=follow_symlinks,
+    )
+    if since is not None:
+        if "status" in since.columns:
+            since = since[since["status"] != "deleted"]
+        all_files, status = _get_changes(all_files, since)
+    exploration_cache = (
+        ExplorationCache(cache_dir, use_hash=cache_hash) if cache else None
+    )
+    profiler = cProfile.Profile() if cprofile_file is not None else None
+    try:
+        if profiler is not None:
+            profiler.enable()
+        df = _get_descriptions(
+            all_files=all_files,
+            estimate_rows=estimate_rows,
+            workers=1 if workers is None else workers,
+            executor=executor,
+            cache=exploration_cache,
+            instrument=instrument,
+            trace_file=trace_file,
+        )
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(cprofile_file)
+        if exploration_cache is not None:
+            exploration_cache.close()
+    if exploration_cache is not None:
+        print(
+            f"Cache: {exploration_cache.hits} hits, "
+            f"{exploration_cache.misses} misses"
+        )
+    if since is not None:
+        previous = since[
+            since["path"].map(_get_file_key).map(status).isin(["unchanged", "deleted"])
+        ]
+        df = pd.concat([previous.drop(columns="status", errors="ignore"), df])
+        df["status"] = df["path"].map(_get_file_key).map(status)
+        df = df.sort_values(
+            by="path", key=lambda paths: paths.astype(str), kind="stable"
+        ).reset_index(drop=True)
+        counts = df.drop_duplicates(subset="path")["status"].value_counts()
+        print(", ".join(f"{count} {label}" for label, count in counts.items()))
+    if instrument and df[STAT_COLUMNS].notna().any().any():
+        print(summarize_stats(df).to_string())
+    if dedupe:
+        df = _add_duplicates(df)
+    if datasets:
+        df = _add_datasets(df)
     return df
 
 
+async def explore_files_async(
+    path: str | Path,
+    estimate_rows: bool = False,
+    concurrency: int = ASYNC_CONCURRENCY,
+    queue_size: int | None = None,
+    cache: bool = False,
+    cache_dir: str | Path = CACHE_DIR,
+    cache_hash: bool = False,
+    include: list[str] | None = None,
+    exclude: list[str] | None = None,
+    hidden: bool = False,
+    max_depth: int | None = None,
+    follow_symlinks: bool = False,
+) -> pd.DataFrame:
+    """Return a dataframe with all the files, walking the folders and
+    describing the files concurrently.
+
+    On network storage each `stat`, `scandir` and read waits for a round trip,
+    so keeping many of them in flight uses the bandwidth that a sequential
+    exploration leaves idle. The folders are listed concurrently and the files
+    found are put in a queue of `queue_size` files, which pauses the walk
+    when the files are not described as fast as they are found. The blocking
+    calls run in a pool of `concurrency` threads.
+
+    Use `await explore_files_async(path)` where an event loop is already
+    running, as in notebooks, and `explore_files(path, executor="async")`
+    elsewhere.
+
+    Args:
+        path (str | Path): Path the file or to the directory with files.
+        estimate_rows (bool, optional): Estimate the number of rows of plain
+            files bigger than `BIG_FILE` instead of counting them. Defaults to
+            False.
+        concurrency (int, optional): Maximum number of folders listed and
+            files described at the same time. Defaults to ASYNC_CONCURRENCY.
+        queue_size (int | None, optional): Maximum number of files found and
+            waiting to be described. Defaults to None, 4 times `concurrency`.
+        cache (bool, optional): Reuse the descriptions of the files that did
+            not change since the last exploration. Defaults to False.
+        cache_dir (str | Path, optional): Folder to store the cache. Defaults
+            to CACHE_DIR.
+        cache_hash (bool, optional): Also compare the content hash of the
+            files with the cache, for storage where the modification times are
+            not reliable. Defaults to False.
+        include (list[str] | None, optional): Glob patterns of the files to
+            explore. Defaults to None.
+        exclude (list[str] | None, optional): Glob patterns of the files and
+            folders to skip. Defaults to None.
+        hidden (bool, optional): Explore hidden files and folders. Defaults to
+            False.
+        max_depth (int | None, optional): Maximum number of subfolders to walk
+            down. Defaults to None.
+        follow_symlinks (bool, optional): Walk symbolic links to folders.
+            Defaults to False.
+
+    Raises:
+        Exception: If the path or the concurrency is not valid.
+
+    Returns:
+        pd.DataFrame: DataFrame with description of the files, in the same
+            order as `explore_files`.
+    """
+    if concurrency < 1:
+        raise Exception(f"concurrency {concurrency} not valid.")
+    path = Path(path)
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size or 4 * concurrency)
+    options = _get_cache_options(estimate_rows)
+    descriptions: dict[Path, list[dict]] = {}
+    exploration_cache = (
+        ExplorationCache(cache_dir, use_hash=cache_hash) if cache else None
+    )
+    pbar = tqdm(total=0, unit="files")
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+
+        def run(function, *args):
+            return loop.run_in_executor(pool, function, *args)
+
+        async def walk() -> None:
+            if await run(path.is_file):
+                await queue.put((path, await run(path.stat)))
+                return
+            elif not await run(path.is_dir):
+                raise Exception("path not valid.")
+            root_stat = await run(path.stat)
+            visited = {(root_stat.st_dev, root_stat.st_ino)}
+
+            async def scan(folder: Path, depth: int) -> None:
+                files, subfolders = await run(
+                    partial(
+                        _scan_folder,
+                        folder,
+                        path,
+                        depth,
+                        include=include,
+                        exclude=exclude,
+                        hidden=hidden,
+                        max_depth=max_depth,
+                        follow_symlinks=follow_symlinks,
+                    )
+                )
+                for item in files:
+                    await queue.put(item)
+                await asyncio.gather(
+                    *(
+                        scan(subfolder, depth + 1)
+                        for subfolder, inode in subfolders
+                        if _visit(visited, inode)
+                    )
+                )
+
+            await scan(path, 0)
+
+        async def describe() -> None:
+            while (item := await queue.get()) is not None:
+                f, stat = item
+                pbar.total += 1
+                description = (
+                    exploration_cache.get(f, options=options, stat=stat)
+                    if exploration_cache is not None
+                    else None
+                )
+                if description is None:
+                    description = await run(_safe_describe_file, f, estimate_rows, stat)
+                    if description is not None and exploration_cache is not None:
+                        exploration_cache.put(f, description, options=options)
+                if description is not None:
+                    descriptions[f] = description
+                pbar.set_description(f.name)
+                pbar.update()
+
+        describers = [asyncio.create_task(describe()) for _ in range(concurrency)]
+        try:
+            await walk()
+        finally:
+            for _ in describers:
+                await queue.put(None)
+            await asyncio.gather(*describers)
+            pbar.close()
+            if exploration_cache is not None:
+                exploration_cache.close()
+
+    if exploration_cache is not None:
+        print(
+            f"Cache: {exploration_cache.hits} hits, "
+            f"{exploration_cache.misses} misses"
+        )
+    order = (
+        sorted(descriptions, key=lambda f: _walk_order(f, path))
+        if path.is_dir()
+        else list(descriptions)
+    )
+    return _to_dataframe([row for f in order for row in descriptions[f]])
+
+
 def generate_code(
     df: pd.DataFrame,
     python_file: str = "code.txt",
     verbose: bool = True,
+    typed: bool = False,
+    pyarrow: bool = False,
+    target: str = "pandas",
+    database: str = "afes.sqlite",
+    engine: str = "pandas",
 ):
-    """Generate pandas code to load the files.
+    """Generate pandas code to load the files, or SQL code to load them in a
+    database.
 
     Args:
         df (pd.DataFrame): DataFrame with the explored files.
         python_file (str, optional): Name of the file to save the code.
             Defaults to "code.txt".
         verbose (bool, optional): Flag to print the code. Defaults to True.
+        typed (bool, optional): Generate code with explicit `dtype` and
+            `parse_dates` inferred from the first rows of each file, and add
+            them to a `schema` column of `df`. Defaults to False.
+        pyarrow (bool, optional): Generate code that loads the files with the
+            pyarrow engine and dtypes. Defaults to False.
+        target (str, optional): `pandas`, or `postgres` and `sqlite` to
+            generate the tables and bulk load commands. Defaults to "pandas".
+        database (str, optional): Database loaded by the `sqlite` code.
+            Defaults to "afes.sqlite".
+        engine (str, optional): `pandas-chunked`, `pyarrow-dataset`, `duckdb`
+            or `polars-lazy` to read the files bigger than `BIG_FILE` in chunks
+            or lazily. Defaults to "pandas", loading all the files at once.
+    """
+    if target != "pandas":
+        generate_sql_code(
+            df,
+            target=target,
+            python_file=python_file,
+            verbose=verbose,
+            database=database,
+        )
+        return
+    generate_pandas_code(
+        df,
+        python_file=python_file,
+        verbose=verbose,
+        typed=typed,
+        pyarrow=pyarrow,
+        engine=engine,
+    )
+
+
+def _is_workbook(record: dict) -> bool:
+    """Returns True for the sheets of Excel files that can be opened once for
+    all their sheets, the compressed ones are streamed sheet by sheet."""
+    return record["extension"] == ".xlsx" and not record.get("compression")
+
+
+def _get_data_rows(record: dict) -> int:
+    """Returns the rows of data of a file, or of the files of a dataset,
+    without the header line counted in the `rows` of plain files. The rows of
+    sheets and records are already counted without a header."""
+    rows = record["rows"]
+    if record["extension"] in PLAIN_FORMATS:
+        files = len(record["path"]) if isinstance(record["path"], list) else 1
+        rows -= files
+    return max(rows, 0)
+
+
+def _profile_file(
+    record: dict,
+    output_path: Path,
+    report_name: str,
+    profile_tool: str = "ydata-profiling",
+    sample_rows: int | None = None,
+    sample_strategy: str = "reservoir",
+    stratify_by: str | None = None,
+    excel_file: pd.ExcelFile | None = None,
+) -> float:
+    """Loads a file, or a sample of it, and saves its profile report.
+
+    The `afes` profiler streams the file in chunks instead of loading it.
+
+    Args:
+        record (dict): Row of the exploration DataFrame describing the file.
+        output_path (Path): Folder to save the HTML report.
+        report_name (str): Name of the report.
+        profile_tool (str, optional): `ydata-profiling`, `sweetviz` or `afes`.
+            Defaults to "ydata-profiling".
+        sample_rows (int | None, optional): Profile a sample of this number of
+            rows if the file has more rows. Defaults to None.
+        sample_strategy (str, optional): `head`, `reservoir` or `stratified`.
+            Defaults to "reservoir".
+        stratify_by (str | None, optional): Column used by the `stratified`
+            strategy. Defaults to None.
+        excel_file (pd.ExcelFile | None, optional): Workbook already opened.
+            Defaults to None.
+
+    Returns:
+        float: Fraction of the rows of the file that were profiled.
+    """
+    fraction = 1.0
+    if sample_rows is not None and _get_data_rows(record) > sample_rows:
+        df_to_profile, fraction = load_sample_with_pandas(
+            file_path=record["path"],
+            file_name=record["name"],
+            extension=record["extension"],
+            sep=record["separator"],
+            encoding=record.get("encoding"),
+            rows=_get_data_rows(record),
+            sample_rows=sample_rows,
+            sample_strategy=sample_strategy,
+            stratify_by=stratify_by,
+            excel_file=excel_file,
+        )
+    elif profile_tool == "afes":
+        df_to_profile = None
+    else:
+        df_to_profile = load_file_with_pandas(
+            file_path=record["path"],
+            file_name=record["name"],
+            extension=record["extension"],
+            sep=record["separator"],
+            encoding=record.get("encoding"),
+            excel_file=excel_file,
+        )
+    if profile_tool == "ydata-profiling":
+        profile_with_ydata_profiling(
+            output_path=output_path,
+            df_to_profile=df_to_profile,
+            file_name=report_name,
+            file_size=record["size"],
+        )
+    elif profile_tool == "sweetviz":
+        profile_with_sweetviz(
+            df_to_profile=df_to_profile,
+            output_path=output_path,
+            file_name=report_name,
+        )
+    elif profile_tool == "afes":
+        profile_with_afes(
+            chunks=(
+                [df_to_profile]
+                if df_to_profile is not None
+                else iter_file_chunks(
+                    file_path=record["path"],
+                    file_name=record["name"],
+                    extension=record["extension"],
+                    sep=record["separator"],
+                    encoding=record.get("encoding"),
+                    excel_file=excel_file,
+                )
+            ),
+            output_path=output_path,
+            file_name=report_name,
+        )
+    return fraction
+
+
+def _profile_in_parallel(
+    tasks: list[tuple[int, dict, str]],
+    workers: int,
+    max_memory: int | None,
+    sample_rows: int | None,
+    **kwargs,
+) -> dict[int, float]:
+    """Profiles files in a process pool, largest files first, without going
+    over a memory budget.
+
+    The memory of each report is estimated as `MEMORY_FACTOR` times the size of
+    the file, or of its sample. A report bigger than the budget runs alone. If
+    a worker process dies, the pool is restarted and the reports that were
+    running are retried once.
+
+    Args:
+        tasks (list[tuple[int, dict, str]]): Index, record and report name of
+            each file.
+        workers (int): Number of worker processes.
+        max_memory (int | None): Memory budget in bytes for the reports
+            running at the same time.
+        sample_rows (int | None): Number of rows sampled from big files.
+        **kwargs: Arguments passed to `_profile_file`.
+
+    Returns:
+        dict[int, float]: Fraction profiled of each file that succeeded.
     """
-    generate_pandas_code(df, python_file=python_file, verbose=verbose)
+
+    def estimate(task: tuple[int, dict, str]) -> float:
+        _, record, _ = task
+        fraction = 1.0
+        if sample_rows is not None and _get_data_rows(record) > sample_rows:
+            fraction = sample_rows / _get_data_rows(record)
+        # Compressed files take the memory of their content.
+        size = record.get("uncompressed_size")
+        if size is None or pd.isna(size):
+            size = record["size"]
+        return size * MEMORY_FACTOR * fraction
+
+    pending = sorted(tasks, key=estimate, reverse=True)
+    attempts = {i: 0 for i, _, _ in tasks}
+    fractions = {}
+    pbar = tqdm(total=len(tasks), unit="reports")
+    while pending:
+        running: dict = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while pending or running:
+                used = sum(estimate(task) for task in running.values())
+                for task in list(pending):
+                    if len(running) >= workers:
+                        break
+                    if max_memory and running and used + estimate(task) > max_memory:
+                        continue
+                    pending.remove(task)
+                    attempts[task[0]] += 1
+                    future = pool.submit(
+                        _profile_file,
+                        task[1],
+                        report_name=task[2],
+                        sample_rows=sample_rows,
+                        **kwargs,
+                    )
+                    running[future] = task
+                    used += estimate(task)
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                broken = False
+                for future in done:
+                    if isinstance(future.exception(), BrokenProcessPool):
+                        broken = True
+                        continue
+                    i, record, _ = running.pop(future)
+                    try:
+                        fractions[i] = future.result()
+                    except Exception as e:
+                        print(e)
+                        print(f"Error with {record['path']}")
+                    pbar.set_description(record["name"])
+                    pbar.update()
+                if broken:
+                    break
+        # A worker process died: retry once the reports that were running.
+        for i, record, report_name in running.values():
+            if attempts[i] < 2:
+                pending.append((i, record, report_name))
+            else:
+                print(f"Error with {record['path']}: the worker process died")
+                pbar.update()
+        pending.sort(key=estimate, reverse=True)
+    pbar.close()
+    return fractions
+
+
+def _dataset_record(rows: pd.DataFrame) -> dict:
+    """Returns a record describing the files of a dataset as one file, with
+    the list of their paths and the total of their rows and sizes."""
+    record = rows.iloc[0].to_dict()
+    record["name"] = record["dataset"]
+    record["path"] = list(rows["path"])
+    for column in ["rows", "size", "uncompressed_size"]:
+        if column in rows.columns:
+            record[column] = rows[column].sum(min_count=1)
+    return record
 
 
 def profile_files(
     df: pd.DataFrame,
     output_path: str | Path = ".",
     profile_tool: str = "ydata-profiling",
+    sample_rows: int | None = None,
+    sample_strategy: str = "reservoir",
+    stratify_by: str | None = None,
+    workers: int = 1,
+    max_memory: int | str | None = None,
+    overwrite: bool = False,
 ):
     """Profile the structured data.
 
+    The files of each dataset found by `explore_files(path, datasets=True)`
+    are profiled together, in a report named after the dataset.
+
     Args:
         df (pd.DataFrame): DataFrame with the files to be profiled.
         output_path (str | Path, optional): Folder to save the HTML reports.
             Defaults to ".".
-        profile_tool (str, optional): Select which profiling too to use.
+        profile_tool (str, optional): Select which profiling too to use,
+            `ydata-profiling`, `sweetviz` or the built-in `afes` profiler.
             Defaults to "ydata-profiling".
+        sample_rows (int | None, optional): Profile a sample of this number of
+            rows of the files with more rows, reading them in chunks. The
+            fraction sampled is added to the name of the report and to a
+            `sample_fraction` column of `df`. Defaults to None.
+        sample_strategy (str, optional): `head`, `reservoir` or `stratified`.
+            Defaults to "reservoir".
+        stratify_by (str | None, optional): Column used by the `stratified`
+            strategy. Defaults to None, the last column.
+        workers (int, optional): Number of reports generated in parallel, each
+            one in its own process, starting with the biggest files. Defaults
+            to 1.
+        max_memory (int | str | None, optional): Memory budget for the reports
+            generated in parallel, in bytes or like `16GiB`. Defaults to None.
+        overwrite (bool, optional): Generate the reports again even if they
+            are newer than the files. Defaults to False.
     """
+    if profile_tool not in REPORT_SUFFIXES:
+        raise Exception(f"profile_tool {profile_tool} not valid.")
     output_path = Path(output_path)
     output_path.mkdir(parents=True, exist_ok=True)
-    df.sort_values(by="size", inplace=True)
+    df.sort_values(by="size", inplace=True, kind="stable")
     print(
         f"Profiling files with {profile_tool} and generating reports in folder {output_path}"
     )
-    pbar = tqdm(df.iterrows(), total=len(df))
-    for _, r in pbar:
-        pbar.set_description(f"Profiling {r['name']} ({r['rows']:,} records)")
-        if r.rows > 0:
-            df_to_profile = load_file_with_pandas(
-                file_path=r["path"],
-                file_name=r["name"],
-                extension=r["extension"],
-                sep=r["separator"],
+    if sample_rows is not None:
+        df["sample_fraction"] = 1.0
+
+    tasks = []
+    up_to_date = 0
+    duplicates = 0
+    datasets = get_datasets(df)
+    dataset_files = {i for rows in datasets.values() for i in rows.index}
+    records = [(i, r.to_dict()) for i, r in df.iterrows() if i not in dataset_files] + [
+        (rows.index[0], _dataset_record(rows)) for rows in datasets.values()
+    ]
+    for i, r in records:
+        if pd.isna(r["rows"]) or r["rows"] <= 0 or r.get("status") == "deleted":
+            continue
+        if pd.notna(r.get("duplicate_of")):
+            duplicates += 1
+            continue
+        report_name = r["name"]
+        # Named after the fraction of the rows counted in the exploration, before
+        # sampling, so the rows sampled by `reservoir` and `stratified` can
+        # differ when the count was estimated.
+        data_rows = _get_data_rows(r)
+        if sample_rows is not None and data_rows > sample_rows:
+            report_name += f"_{sample_strategy}_{sample_rows / data_rows * 100:.2f}pct"
+        report_path = get_report_path(output_path, report_name, profile_tool)
+        paths = r["path"] if isinstance(r["path"], list) else [r["path"]]
+        if (
+            not overwrite
+            and report_path.exists()
+            and report_path.stat().st_mtime
+            >= max(split_archive_path(p)[0].stat().st_mtime for p in paths)
+        ):
+            up_to_date += 1
+            continue
+        tasks.append((i, r, report_name))
+    if up_to_date:
+        print(f"Skipping {up_to_date} reports that are up to date")
+    if duplicates:
+        print(f"Skipping {duplicates} duplicated files")
+
+    kwargs = dict(
+        output_path=output_path,
+        profile_tool=profile_tool,
+        sample_strategy=sample_strategy,
+        stratify_by=stratify_by,
+    )
+    if workers > 1:
+        if max_memory is not None:
+            max_memory = parse_human_readable_size(max_memory)
+        fractions = _profile_in_parallel(
+            tasks, workers, max_memory, sample_rows=sample_rows, **kwargs
+        )
+    else:
+        fractions = {}
+        excel_file, excel_path = None, None
+        pbar = tqdm(tasks, total=len(tasks))
+        for i, record, report_name in pbar:
+            pbar.set_description(
+                f"Profiling {record['name']} ({record['rows']:,} records)"
             )
-            if profile_tool == "ydata-profiling":
-                profile_with_ydata_profiling(
-                    output_path=output_path,
-                    df_to_profile=df_to_profile,
-                    file_name=r["name"],
-                    file_size=r["size"],
-                )
-            elif profile_tool == "sweetviz":
-                profile_with_sweetviz(
-                    df_to_profile=df_to_profile,
-                    output_path=output_path,
-                    file_name=r["name"],
+            try:
+                if _is_workbook(record) and excel_path != record["path"]:
+                    if excel_file is not None:
+                        excel_file.close()
+                    excel_file, excel_path = None, record["path"]
+                    excel_file = pd.ExcelFile(record["path"], engine="openpyxl")
+                fractions[i] = _profile_file(
+                    record,
+                    report_name=report_name,
+                    sample_rows=sample_rows,
+                    excel_file=excel_file if _is_workbook(record) else None,
+                    **kwargs,
                 )
+            except Exception as e:
+                print(e)
+                print(f"Error with {record['path']}")
+        if excel_file is not None:
+            excel_file.close()
 
+    if sample_rows is not None:
+        for i, fraction in fractions.items():
+            df.at[i, "sample_fraction"] = fraction
     print(f'\nCheck out all the reports in "{output_path.resolve()}"\n')
     return
+
+
+def convert_files(
+    df: pd.DataFrame,
+    output_path: str | Path = ".",
+    to: str = "parquet",
+    compression: str | None = None,
+    row_group_size: int = CHUNK_ROWS,
+    partition_by: list[str] | None = None,
+    overwrite: bool = False,
+):
+    """Converts the explored files to Parquet or Feather, reading them in
+    chunks.
+
+    The paths of the converted files are added to a `converted_path` column
+    of `df`, so `generate_code` emits loaders that read them instead of the
+    original files.
+
+    Args:
+        df (pd.DataFrame): DataFrame with the files to be converted.
+        output_path (str | Path, optional): Folder to save the converted
+            files, with the same subfolders as the explored files. Defaults to
+            ".".
+        to (str, optional): `parquet` or `feather`. Defaults to "parquet".
+        compression (str | None, optional): Compression codec, as `snappy`,
+            `zstd` or `lz4`. Defaults to None, the default of pyarrow.
+        row_group_size (int, optional): Rows per row group, and rows read at a
+            time. Defaults to CHUNK_ROWS.
+        partition_by (list[str] | None, optional): Columns to partition
+            Parquet files by. Defaults to None.
+        overwrite (bool, optional): Convert the files again even if the
+            converted files are newer. Defaults to False.
+
+    Raises:
+        Exception: If the format is not valid.
+    """
+    if to not in CONVERT_FORMATS:
+        raise Exception(f"to {to} not valid.")
+    output_path = Path(output_path)
+    print(f"Converting files to {to} in folder {output_path}")
+    if "converted_path" not in df.columns:
+        df["converted_path"] = None
+    records = [
+        (i, r.to_dict())
+        for i, r in df.iterrows()
+        if pd.notna(r.rows) and r.rows > 0 and r.get("status") != "deleted"
+    ]
+    if not records:
+        return
+    root = Path(os.path.commonpath([Path(r["path"]).parent for _, r in records]))
+
+    excel_file, excel_path = None, None
+    up_to_date = 0
+    pbar = tqdm(records, total=len(records))
+    for i, record in pbar:
+        converted_path = get_converted_path(output_path, record, to=to, root=root)
+        if (
+            not overwrite
+            and converted_path.exists()
+            and converted_path.stat().st_mtime
+            >= split_archive_path(record["path"])[0].stat().st_mtime
+        ):
+            up_to_date += 1
+            df.at[i, "converted_path"] = converted_path
+            continue
+        pbar.set_description(
+            f"Converting {record['name']} ({record['rows']:,} records)"
+        )
+        try:
+            if _is_workbook(record) and excel_path != record["path"]:
+                if excel_file is not None:
+                    excel_file.close()
+                excel_file, excel_path = None, record["path"]
+                excel_file = pd.ExcelFile(record["path"], engine="openpyxl")
+            df.at[i, "converted_path"] = convert_file(
+                record,
+                converted_path,
+                to=to,
+                compression=compression,
+                row_group_size=row_group_size,
+                partition_by=partition_by,
+                excel_file=excel_file if _is_workbook(record) else None,
+            )
+        except Exception as e:
+            print(e)
+            print(f"Error with {record['path']}")
+    if excel_file is not None:
+        excel_file.close()
+    if up_to_date:
+        print(f"Skipping {up_to_date} files that are up to date")
+    print(f'\nCheck out all the converted files in "{output_path.resolve()}"\n')
@@ -0,0 +1,146 @@
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+from afes.config import CACHE_DIR, CACHE_MAX_ENTRIES
+from afes.utils import get_file_hash
+
+
+class ExplorationCache:
+    """SQLite cache with the descriptions of the explored files.
+
+    Entries are keyed by the path of the file and the exploration options, and
+    are valid while the size and modification time of the file (and optionally
+    its content hash) do not change. When there are more than `max_entries`
+    entries the least recently used are evicted.
+
+    Args:
+        cache_dir (str | Path, optional): Folder for the cache database.
+            Defaults to CACHE_DIR.
+        max_entries (int, optional): Maximum number of files kept in the
+            cache. Defaults to CACHE_MAX_ENTRIES.
+        use_hash (bool, optional): Also compare the content hash of the files.
+            Defaults to False.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | Path = CACHE_DIR,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        use_hash: bool = False,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.use_hash = use_hash
+        self.hits = 0
+        self.misses = 0
+        self._keys: dict[str, tuple[int, int, str | None]] = {}
+        self.connection = sqlite3.connect(self.cache_dir / "exploration.sqlite")
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS files (
+                path TEXT,
+                options TEXT,
+                size INTEGER,
+                mtime_ns INTEGER,
+                hash TEXT,
+                descriptions TEXT,
+                last_used REAL,
+                PRIMARY KEY (path, options)
+            )""")
+
+    def _key(
+        self, f: Path, stat: os.stat_result | None = None
+    ) -> tuple[int, int, str | None]:
+        stat = stat or f.stat()
+        file_hash = get_file_hash(f) if self.use_hash else None
+        return stat.st_size, stat.st_mtime_ns, file_hash
+
+    def get(
+        self, f: Path, options: str = "", stat: os.stat_result | None = None
+    ) -> list[dict] | None:
+        """Returns the cached descriptions of a file if they are still valid.
+
+        Args:
+            f (Path): File to look up.
+            options (str, optional): Exploration options used to describe the
+                file. Defaults to "".
+            stat (os.stat_result | None, optional): Stat result of the file if
+                it is already known. Defaults to None.
+
+        Returns:
+            list[dict] | None: Descriptions of the file, None when the file is
+                not in the cache or it changed since it was cached.
+        """
+        path = str(f.resolve())
+        key = self._keys[path] = self._key(f, stat)
+        row = self.connection.execute(
+            "SELECT size, mtime_ns, hash, descriptions FROM files "
+            "WHERE path = ? AND options = ?",
+            (path, options),
+        ).fetchone()
+        descriptions = json.loads(row[3]) if row is not None else []
+        # Entries saved without the paths of the members are not valid.
+        if (
+            row is None
+            or tuple(row[:2]) != key[:2]
+            or (self.use_hash and row[2] != key[2])
+            or any("path" not in description for description in descriptions)
+        ):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.connection.execute(
+            "UPDATE files SET last_used = ? WHERE path = ? AND options = ?",
+            (time.time(), path, options),
+        )
+        return [
+            description | {"path": f / description["path"]}
+            for description in descriptions
+        ]
+
+    def put(self, f: Path, descriptions: list[dict], options: str = "") -> None:
+        """Stores the descriptions of a file with the size and modification
+        time it had when it was looked up with `get`.
+
+        Args:
+            f (Path): File described.
+            descriptions (list[dict]): Descriptions of the file, the path in
+                each description is stored relative to `f`, as the members of
+                an archive are described with the path of the archive.
+            options (str, optional): Exploration options used to describe the
+                file. Defaults to "".
+        """
+        path = str(f.resolve())
+        key = self._keys.pop(path, None) or self._key(f)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                path,
+                options,
+                *key,
+                json.dumps(
+                    [
+                        description
+                        | {"path": str(Path(description["path"]).relative_to(f))}
+                        for description in descriptions
+                    ]
+                ),
+                time.time(),
+            ),
+        )
+
+    def evict(self) -> None:
+        """Removes the least recently used entries above `max_entries`."""
+        self.connection.execute(
+            "DELETE FROM files WHERE rowid IN (SELECT rowid FROM files "
+            "ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def close(self) -> None:
+        """Evicts the old entries, saves the cache and closes it."""
+        self.evict()
+        self.connection.commit()
+        self.connection.close()
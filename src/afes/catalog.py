@@ -0,0 +1,115 @@
+import json
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+from afes.config import CATALOG_FORMATS
+
+PATH_COLUMNS = ("path", "duplicate_of", "converted_path")
+JSON_COLUMNS = ("schema",)
+DTYPES = {
+    "size": "int64",
+    "uncompressed_size": "Int64",
+    "rows": "Int64",
+    "rows_exact": "boolean",
+    "mtime_ns": "int64",
+}
+
+
+def _get_format(catalog_file: str | Path) -> str:
+    suffix = Path(catalog_file).suffix.lower()
+    if suffix not in CATALOG_FORMATS:
+        raise Exception(f"catalog_file {catalog_file} not valid.")
+    return CATALOG_FORMATS[suffix]
+
+
+def save_catalog(df: pd.DataFrame, catalog_file: str | Path) -> Path:
+    """Saves the result of an exploration to be loaded by `load_catalog`
+    instead of exploring the files again.
+
+    Paths are saved as strings and the schemas as JSON, so the catalog can be
+    read by other tools. Parquet catalogs require the `parquet` extra.
+
+    Args:
+        df (pd.DataFrame): DataFrame returned by `explore_files`.
+        catalog_file (str | Path): `.parquet`, `.json` or `.sqlite` file.
+
+    Raises:
+        Exception: If the format of the file is not valid.
+
+    Returns:
+        Path: Path to the catalog.
+    """
+    catalog_file = Path(catalog_file)
+    catalog_format = _get_format(catalog_file)
+    catalog = df.copy()
+    for column in PATH_COLUMNS:
+        if column in catalog.columns:
+            catalog[column] = catalog[column].map(
+                lambda path: str(path) if pd.notna(path) else None
+            )
+    for column in JSON_COLUMNS:
+        if column in catalog.columns:
+            catalog[column] = catalog[column].map(
+                lambda value: json.dumps(value) if value is not None else None
+            )
+    catalog_file.parent.mkdir(parents=True, exist_ok=True)
+    if catalog_format == "parquet":
+        catalog.to_parquet(catalog_file, index=False)
+    elif catalog_format == "json":
+        catalog.to_json(catalog_file, orient="records", indent=2)
+    else:
+        with sqlite3.connect(catalog_file) as connection:
+            catalog.to_sql("catalog", connection, if_exists="replace", index=False)
+        connection.close()
+    print(f'Catalog of {len(catalog)} files saved to "{catalog_file}"')
+    return catalog_file
+
+
+def load_catalog(catalog_file: str | Path) -> pd.DataFrame:
+    """Loads an exploration saved by `save_catalog`, with the same columns and
+    types as the DataFrame returned by `explore_files`.
+
+    Args:
+        catalog_file (str | Path): `.parquet`, `.json` or `.sqlite` file.
+
+    Raises:
+        Exception: If the format of the file or the file are not valid.
+
+    Returns:
+        pd.DataFrame: DataFrame with description of the files.
+    """
+    catalog_file = Path(catalog_file)
+    catalog_format = _get_format(catalog_file)
+    if not catalog_file.is_file():
+        raise Exception(f"catalog_file {catalog_file} not valid.")
+    if catalog_format == "parquet":
+        df = pd.read_parquet(catalog_file)
+    elif catalog_format == "json":
+        df = pd.read_json(
+            catalog_file, orient="records", dtype=False, convert_dates=False
+        )
+    else:
+        with sqlite3.connect(catalog_file) as connection:
+            df = pd.read_sql("SELECT * FROM catalog", connection)
+        connection.close()
+    for column, dtype in DTYPES.items():
+        if column in df.columns:
+            df[column] = df[column].astype(dtype)
+    # Missing values of text columns are None, as in the exploration.
+    for column in df.columns[df.dtypes == object]:
+        df[column] = df[column].where(df[column].notna(), None)
+    for column in PATH_COLUMNS:
+        if column in df.columns:
+            df[column] = (
+                df[column]
+                .map(lambda path: Path(path) if isinstance(path, str) else None)
+                .astype(object)
+            )
+    for column in JSON_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].map(
+                lambda value: json.loads(value) if isinstance(value, str) else None
+            )
+    return df
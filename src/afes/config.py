@@ -5,10 +5,53 @@ TEST_DIR = ROOT_DIR / "tests"
 
 SUPPORTED_FORMATS = (".txt", ".csv", ".tab", ".dat", ".json", ".arff", ".xml", ".xlsx")
 PLAIN_FORMATS = (".txt", ".csv", ".tab", ".dat")
+COMPRESSIONS = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz", ".zst": "zstd"}
+ARCHIVE_FORMATS = (".zip",)
 SIZE_UNITS = ["B", "KiB", "MiB", "GiB", "TiB", "PiB", "EiB", "ZiB"]
 SEPARATORS = ["\t", " ", ",", ";", "|"]
 SEPARATOR_NAMES = ["tab", "space", "comma", "semi_colon", "pipe"]
 BIG_FILE = 104_857_600  # 100MB
+CHUNK_SIZE = 1_048_576  # 1MiB
+ROW_COUNT_SAMPLE = 10_485_760  # 10MiB
+SEPARATOR_SAMPLE = 1_048_576  # 1MiB
+SEPARATOR_SAMPLE_LINES = 10_000
+ENCODING_SAMPLE = 65_536  # 64KiB to tell UTF-16 and UTF-32 files
+# Encodings scored when a sample is not UTF-8, preferred first on ties
+ENCODINGS = ("latin-1", "cp1252", "cp1251", "cp1253", "shift_jis", "gb18030")
+ENCODING_DETECTOR = 2  # Version of `detect_encoding`, part of the cache options
+ENCODING_MIN_CONFIDENCE = 0.8
+ENCODING_SCORE_CHARS = 4_096  # Non-ASCII characters scored per encoding
+ACCENT_RATIO = 0.5  # Maximum accented letters per letter of plausible text
+UTF16_NULL_RATIO = 0.6  # Null bytes in a position of UTF-16 without BOM
+POSTGRES_ENCODINGS = {
+    "utf-8": "UTF8",
+    "utf-8-sig": "UTF8",
+    "latin-1": "LATIN1",
+    "cp1252": "WIN1252",
+    "cp1251": "WIN1251",
+    "cp1253": "WIN1253",
+    "shift_jis": "SJIS",
+    "gb18030": "GB18030",
+}
+CHUNK_ROWS = 100_000
+CHUNK_MEMORY = 268_435_456  # 256MiB of memory per chunk of generated loaders
+ENGINES = ("pandas", "pandas-chunked", "pyarrow-dataset", "duckdb", "polars-lazy")
+PARTIAL_HASH_BLOCK = 65_536  # 64KiB read from each end of a file to hash it
+SAMPLE_STRATEGIES = ("head", "reservoir", "stratified")
+CONVERT_FORMATS = {"parquet": ".parquet", "feather": ".feather"}
+SCHEMA_SAMPLE_ROWS = 10_000
+FINGERPRINT_ROWS = 100
+CATEGORY_RATIO = 0.5  # Maximum distinct values per row of a category column
+MEMORY_FACTOR = 5  # Memory used by pandas per byte of file
+CACHE_DIR = Path.home() / ".cache" / "afes"
+CACHE_MAX_ENTRIES = 1_000_000
+ASYNC_CONCURRENCY = 64  # Folders listed and files described at a time by async
+CATALOG_FORMATS = {
+    ".parquet": "parquet",
+    ".json": "json",
+    ".sqlite": "sqlite",
+    ".db": "sqlite",
+}
 
 DATA_TYPE_CONVERSION = {
     "postgres": {
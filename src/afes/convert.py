@@ -0,0 +1,230 @@
+import os
+import shutil
+from pathlib import Path
+from typing import Iterable
+
+import pandas as pd
+
+from afes.config import CHUNK_ROWS, CONVERT_FORMATS
+from afes.profile import iter_file_chunks
+from afes.utils import get_stem
+
+
+def get_converted_path(
+    output_path: str | Path,
+    record: dict,
+    to: str = "parquet",
+    root: Path | None = None,
+) -> Path:
+    """Returns the path of the converted file, mirroring the folders of the
+    file below `root`.
+
+    Args:
+        output_path (str | Path): Folder to save the converted files.
+        record (dict): Row of the exploration DataFrame describing the file.
+        to (str, optional): `parquet` or `feather`. Defaults to "parquet".
+        root (Path, optional): Folder of the explored files. Defaults to None,
+            the folder of the file.
+
+    Returns:
+        Path: Path to the converted file.
+    """
+    path = Path(record["path"])
+    relative = path.parent.relative_to(root) if root is not None else Path()
+    name = get_stem(path)
+    if record["extension"] in [".xlsx", ".xls"]:
+        name += "_" + record["name"]
+    return Path(output_path) / relative / f"{name}{CONVERT_FORMATS[to]}"
+
+
+def _remove(path: Path) -> None:
+    """Removes a converted file, or the folder of a partitioned file."""
+    if path.is_dir():
+        shutil.rmtree(path)
+    elif path.exists():
+        path.unlink()
+
+
+def _common_type(a, b):
+    """Returns the type that can hold the values of the types `a` and `b`:
+    floats for integers and floats, and strings for the rest."""
+    import pyarrow as pa
+
+    if a == b or pa.types.is_null(b):
+        return a
+    if pa.types.is_null(a):
+        return b
+    if all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in (a, b)):
+        return pa.float64()
+    return pa.string()
+
+
+def _widen_schema(schema, table):
+    """Returns `schema` with the types of its fields widened to hold the
+    values of `table`."""
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            field.with_type(
+                _common_type(field.type, table.schema.field(field.name).type)
+                if field.name in table.schema.names
+                else field.type
+            )
+            for field in schema
+        ]
+    )
+
+
+def _write_chunks(
+    chunks: Iterable[pd.DataFrame],
+    converted_path: Path,
+    to: str,
+    compression: str | None,
+    row_group_size: int,
+    partition_by: list[str] | None,
+    schema=None,
+):
+    """Writes the chunks of a file with the column types of `schema`, or of
+    the first chunk if it is None.
+
+    Returns:
+        pa.Schema | None: None if all the chunks were written, or the schema
+            widened to hold a chunk that did not fit in `schema`, to write the
+            file again.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for i, chunk in enumerate(chunks):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if schema is None:
+                schema = table.schema
+            try:
+                table = table.cast(schema)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+                widened = _widen_schema(schema, table)
+                if widened == schema:
+                    raise
+                return widened
+            if partition_by:
+                ds.write_dataset(
+                    table,
+                    converted_path,
+                    format="parquet",
+                    partitioning=partition_by,
+                    partitioning_flavor="hive",
+                    basename_template=f"part-{i}-{{i}}.parquet",
+                    existing_data_behavior="overwrite_or_ignore",
+                    max_rows_per_group=row_group_size,
+                    file_options=ds.ParquetFileFormat().make_write_options(
+                        compression=compression or "snappy"
+                    ),
+                )
+                continue
+            if writer is None:
+                if to == "parquet":
+                    writer = pq.ParquetWriter(
+                        converted_path, schema, compression=compression or "snappy"
+                    )
+                else:
+                    writer = pa.ipc.new_file(
+                        converted_path,
+                        schema,
+                        options=pa.ipc.IpcWriteOptions(compression=compression),
+                    )
+            if to == "parquet":
+                writer.write_table(table, row_group_size=row_group_size)
+            else:
+                writer.write_table(table, max_chunksize=row_group_size)
+    finally:
+        if writer is not None:
+            writer.close()
+    return None
+
+
+def convert_file(
+    record: dict,
+    converted_path: str | Path,
+    to: str = "parquet",
+    compression: str | None = None,
+    row_group_size: int = CHUNK_ROWS,
+    partition_by: list[str] | None = None,
+    excel_file: pd.ExcelFile | None = None,
+) -> Path:
+    """Converts a file to Parquet or Feather reading `row_group_size` rows at
+    a time, so the memory used does not depend on the size of the file.
+
+    Each chunk is written as a row group with the column types of the first
+    chunk. When a later chunk does not fit in them, as an integer column with
+    text further down, the types are widened, to floats or strings, and the
+    file is written again. The file is written to a temporary path that
+    replaces `converted_path` only when the conversion succeeds, so a failed
+    conversion does not leave a truncated file. Partitioned Parquet files are
+    written as a folder with a subfolder per value of the `partition_by`
+    columns.
+
+    Args:
+        record (dict): Row of the exploration DataFrame describing the file.
+        converted_path (str | Path): Path of the converted file.
+        to (str, optional): `parquet` or `feather`. Defaults to "parquet".
+        compression (str | None, optional): Compression codec, as `snappy`,
+            `zstd` or `lz4`. Defaults to None, the default of pyarrow.
+        row_group_size (int, optional): Rows per row group. Defaults to
+            CHUNK_ROWS.
+        partition_by (list[str] | None, optional): Columns to partition
+            Parquet files by. Defaults to None.
+        excel_file (pd.ExcelFile | None, optional): Workbook already opened.
+            Defaults to None.
+
+    Raises:
+        Exception: If the format is not valid, or if partitioning is used with
+            Feather.
+
+    Returns:
+        Path: Path of the converted file.
+    """
+    if to not in CONVERT_FORMATS:
+        raise Exception(f"to {to} not valid.")
+    if partition_by and to != "parquet":
+        raise Exception(f"partition_by with {to} not valid.")
+    converted_path = Path(converted_path)
+    converted_path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = converted_path.with_name(f".{converted_path.name}.tmp")
+
+    schema = None
+    try:
+        while True:
+            _remove(temporary_path)
+            chunks = iter_file_chunks(
+                file_path=record["path"],
+                file_name=record["name"],
+                extension=record["extension"],
+                sep=record["separator"],
+                encoding=record.get("encoding"),
+                chunksize=row_group_size,
+                excel_file=excel_file,
+            )
+            schema = _write_chunks(
+                chunks,
+                temporary_path,
+                to,
+                compression,
+                row_group_size,
+                partition_by,
+                schema,
+            )
+            if schema is None:
+                break
+    except BaseException:
+        _remove(temporary_path)
+        raise
+    if not temporary_path.exists():
+        return converted_path
+    if temporary_path.is_dir() or converted_path.is_dir():
+        _remove(converted_path)
+    os.replace(temporary_path, converted_path)
+    return converted_path
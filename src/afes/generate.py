@@ -1,13 +1,120 @@
+import hashlib
+import json
+import os
+from fnmatch import fnmatch
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 from tqdm.auto import tqdm
 
-from afes.config import PLAIN_FORMATS
+from afes.config import (
+    BIG_FILE,
+    CATEGORY_RATIO,
+    CHUNK_MEMORY,
+    CHUNK_ROWS,
+    CHUNK_SIZE,
+    DATA_TYPE_CONVERSION,
+    ENGINES,
+    FINGERPRINT_ROWS,
+    MEMORY_FACTOR,
+    PLAIN_FORMATS,
+    POSTGRES_ENCODINGS,
+    SCHEMA_SAMPLE_ROWS,
+    SEPARATOR_NAMES,
+    SEPARATORS,
+)
+from afes.profile import load_sample_with_pandas
+from afes.utils import (
+    get_extension,
+    get_json_layout,
+    is_compressed,
+    read_arff_header,
+    split_archive_path,
+)
+
+
+def infer_schema(df: pd.DataFrame, complete: bool = False) -> dict:
+    """Infers the smallest dtypes to load the columns of a sample of a file.
+
+    Integers are downcast to the smallest dtype that fits the sample, nullable
+    if they have nulls, floats to `float32` when they do not lose precision,
+    strings with few distinct values to `category` and strings with dates are
+    parsed as dates.
+
+    Args:
+        df (pd.DataFrame): Sample of the file.
+        complete (bool, optional): The sample has all the rows of the file.
+            Otherwise the rest of the file may have bigger values, nulls or
+            decimals, so the types of numbers and booleans are left to pandas
+            and only categories and dates are typed. Defaults to False.
+
+    Returns:
+        dict: `dtype` and `parse_dates` of the file.
+    """
+    dtype = {}
+    parse_dates = []
+    for column in df.columns:
+        values = df[column].dropna()
+        if values.empty:
+            continue
+        nullable = len(values) < len(df)
+        if not complete and (
+            pd.api.types.is_bool_dtype(values) or pd.api.types.is_numeric_dtype(values)
+        ):
+            continue
+        if pd.api.types.is_bool_dtype(values):
+            dtype[column] = "boolean" if nullable else "bool"
+        elif pd.api.types.is_numeric_dtype(values):
+            numbers = values.to_numpy(dtype=np.float64)
+            if np.isfinite(numbers).all() and (numbers == np.round(numbers)).all():
+                integers = pd.to_numeric(values.astype(np.int64), downcast="integer")
+                name = integers.dtype.name
+                dtype[column] = name.capitalize() if nullable else name
+            elif (numbers.astype(np.float32).astype(np.float64) == numbers).all():
+                dtype[column] = "float32"
+        elif pd.api.types.is_datetime64_any_dtype(values):
+            continue
+        elif (
+            pd.to_datetime(values.astype(str), errors="coerce", format="mixed")
+            .notna()
+            .all()
+        ):
+            parse_dates.append(column)
+        elif values.nunique() <= CATEGORY_RATIO * len(values):
+            dtype[column] = "category"
+    return {
+        "dtype": {str(column): name for column, name in dtype.items()},
+        "parse_dates": [str(column) for column in parse_dates],
+    }
+
+
+def _schema_options(schema: dict | None, extension: str, pyarrow: bool) -> str:
+    """Returns the keyword arguments of the pandas reader for a schema."""
+    options = ""
+    if schema is not None:
+        options += f""", dtype = {schema["dtype"]}"""
+        if schema["parse_dates"]:
+            if extension == ".json":
+                options += f""", convert_dates = {schema["parse_dates"]}"""
+            else:
+                options += f""", parse_dates = {schema["parse_dates"]}"""
+    if pyarrow:
+        if extension in PLAIN_FORMATS:
+            options += """, engine = 'pyarrow'"""
+        options += """, dtype_backend = 'pyarrow'"""
+    return options
 
 
 def generate_code(
-    file_path: str, file_name: str, extension: str, sep: str | None = None, prefix="df_"
+    file_path: str,
+    file_name: str,
+    extension: str,
+    sep: str | None = None,
+    prefix="df_",
+    schema: dict | None = None,
+    pyarrow: bool = False,
+    encoding: str | None = None,
 ):
     """This function returns generated python code to load the files to memory
     using pandas.
@@ -18,7 +125,26 @@ def generate_code(
         extension (str): Extension of the file.
         sep (str | None, optional): Separator used in the plain file. Defaults to None.
         prefix (str, optional): Prefix to name the dataframes. Defaults to "df_".
+        schema (dict | None, optional): Schema returned by `infer_schema` to
+            load the file with explicit dtypes. Defaults to None.
+        pyarrow (bool, optional): Load the file with the pyarrow engine and
+            dtypes. Defaults to False.
+        encoding (str | None, optional): Encoding of plain and ARFF files,
+            added to the code when it is not UTF-8. Defaults to None.
     """
+    options = _schema_options(schema, extension, pyarrow)
+    if (
+        isinstance(encoding, str)
+        and encoding != "utf-8"
+        and extension in PLAIN_FORMATS + (".arff",)
+    ):
+        options = f""", encoding = '{encoding}'""" + options
+    # Pandas decompresses the compressed files from their suffix, the files in
+    # archives are read from the archive.
+    archive, member = split_archive_path(file_path)
+    source = f"'{file_path}'"
+    if member is not None:
+        source = f"zipfile.ZipFile('{archive}').open('{member}')"
 
     def get_separator_char(sep):
         if sep == "space":
@@ -40,28 +166,500 @@ def generate_code(
     )
     if extension in PLAIN_FORMATS:
         separator = get_separator_char(sep)
-        code = (
-            f"""{prefix}{df_name} = pd.read_csv('{file_path}', sep = '{separator}')\n"""
-        )
+        code = f"""{prefix}{df_name} = pd.read_csv({source}, sep = '{separator}'{options})\n"""
         return code
     elif extension in [".xlsx", ".xls"]:
         excel_name = Path(file_path).name.split(".")[0]
         excel_name += "_" + file_name
         code = """"""
         excel_name = excel_name.replace(" ", "_").replace("-", "_").replace(",", "_")
-        code = f"""{prefix}{excel_name} = pd.read_excel('{file_path}', sheet_name = '{file_name}')\n"""
+        code = f"""{prefix}{excel_name} = pd.read_excel({source}, sheet_name = '{file_name}'{options})\n"""
+        return code
+    elif extension == ".json":
+        lines = archive.is_file() and get_json_layout(file_path) == "lines"
+        code = f"""{prefix}{df_name} = pd.read_json({source}, lines = {lines}{options})\n"""
+        return code
+    elif extension == ".xml":
+        code = f"""{prefix}{df_name} = pd.read_xml({source}, parser = 'etree'{options})\n"""
+        return code
+    elif extension == ".parquet":
+        code = f"""{prefix}{df_name} = pd.read_parquet('{file_path}'{options})\n"""
+        return code
+    elif extension == ".feather":
+        code = f"""{prefix}{df_name} = pd.read_feather('{file_path}'{options})\n"""
+        return code
+    elif extension == ".arff":
+        names, header_lines = read_arff_header(file_path)
+        code = (
+            f"""{prefix}{df_name} = pd.read_csv({source}, """
+            f"""skiprows = {header_lines}, names = {names}, comment = '%', """
+            f"""quotechar = "'", na_values = ['?'], skipinitialspace = True{options})\n"""
+        )
         return code
     else:
         return ""
 
 
+def get_chunksize(rows: int | None, size: int) -> int:
+    """Returns the number of rows of a file that take about `CHUNK_MEMORY` of
+    memory once loaded, estimating the bytes per row from its size and rows.
+
+    Args:
+        rows (int | None): Number of rows of the file.
+        size (int): Size in bytes of the content of the file.
+
+    Returns:
+        int: Rows per chunk, a multiple of 1,000, or CHUNK_ROWS if the number
+            of rows is unknown.
+    """
+    if rows is None or pd.isna(rows) or rows <= 0:
+        return CHUNK_ROWS
+    bytes_per_row = max(size / rows, 1)
+    chunksize = int(CHUNK_MEMORY / (bytes_per_row * MEMORY_FACTOR))
+    return max(chunksize // 1_000 * 1_000, 1_000)
+
+
+def _pandas_chunked_code(code: str, chunksize: int) -> str | None:
+    """Adds `chunksize` to the pandas code of a file that can be read in
+    chunks, returns None for the rest."""
+    if "pd.read_csv(" not in code and "lines = True" not in code:
+        return None
+    return code.rstrip()[:-1] + f", chunksize = {chunksize})\n"
+
+
+LAZY_TYPES = {
+    "pyarrow-dataset": {
+        "int64": "'int64'",
+        "float64": "'float64'",
+        "bool": "'bool'",
+        "string": "'string'",
+    },
+    "duckdb": {
+        "int64": "'BIGINT'",
+        "float64": "'DOUBLE'",
+        "bool": "'BOOLEAN'",
+        "string": "'VARCHAR'",
+    },
+    "polars-lazy": {
+        "int64": "pl.Int64",
+        "float64": "pl.Float64",
+        "bool": "pl.Boolean",
+        "string": "pl.Utf8",
+    },
+}
+
+
+def _get_column_types(schema: dict | None, engine: str) -> str | None:
+    """Returns the code of the column types of a schema for a lazy engine, as
+    64 bits integers and floats, booleans and strings, None without schema."""
+    if schema is None or not schema["dtype"]:
+        return None
+    types = {}
+    for column, name in schema["dtype"].items():
+        name = name.lower()
+        if name.startswith("int"):
+            types[column] = "int64"
+        elif name.startswith("float"):
+            types[column] = "float64"
+        elif name.startswith("bool"):
+            types[column] = "bool"
+        elif name == "category":
+            types[column] = "string"
+    items = [f"'{column}': {LAZY_TYPES[engine][t]}" for column, t in types.items()]
+    return "{" + ", ".join(items) + "}" if items else None
+
+
+def generate_big_file_code(
+    file_path: str,
+    file_name: str,
+    extension: str,
+    engine: str,
+    rows: int | None,
+    size: int,
+    sep: str | None = None,
+    prefix: str = "df_",
+    schema: dict | None = None,
+    encoding: str | None = None,
+    column_schema: dict | None = None,
+) -> str:
+    """Returns code to load a file bigger than the memory without loading it
+    all at once.
+
+    `pandas-chunked` returns an iterator of DataFrames, `pyarrow-dataset` an
+    Arrow dataset to scan, `duckdb` a relation and `polars-lazy` a LazyFrame,
+    the last three reading only the columns and row groups used by the query.
+    The files that the engine cannot read are read in chunks with pandas, and
+    the files that cannot be read in chunks, as Excel sheets, are loaded at
+    once.
+
+    Args:
+        file_path (str): Path to the file.
+        file_name (str): Name of the file.
+        extension (str): Extension of the file.
+        engine (str): Engine from ENGINES.
+        rows (int | None): Number of rows of the file.
+        size (int): Size in bytes of the content of the file.
+        sep (str | None, optional): Separator of the plain file. Defaults to
+            None.
+        prefix (str, optional): Prefix to name the dataframes. Defaults to
+            "df_".
+        schema (dict | None, optional): Schema used by the pandas code.
+            Defaults to None.
+        encoding (str | None, optional): Encoding of plain and ARFF files.
+            Defaults to None.
+        column_schema (dict | None, optional): Schema with the column types of
+            the lazy scans of plain files, which otherwise infer them from the
+            first block of the first file. Defaults to None, `schema`.
+
+    Returns:
+        str: Code of the loader, with a comment about the chunks.
+    """
+    code = generate_code(
+        file_path,
+        file_name,
+        extension,
+        sep=sep,
+        prefix=prefix,
+        schema=schema,
+        encoding=encoding,
+    )
+    df_name, _ = code.split(" = ", 1)
+    chunksize = get_chunksize(rows, size)
+    compression = get_extension(file_path)[1]
+    in_archive = split_archive_path(file_path)[1] is not None
+    utf8 = not isinstance(encoding, str) or encoding in ["utf-8", "utf-8-sig"]
+    separator = (
+        SEPARATORS[SEPARATOR_NAMES.index(sep)] if sep in SEPARATOR_NAMES else ","
+    )
+    separator = separator.replace("\t", "\\t")
+    lines = extension == ".json" and "lines = True" in code
+    column_types = (
+        _get_column_types(column_schema or schema, engine)
+        if engine in LAZY_TYPES
+        else None
+    )
+    lazy = None
+    if engine == "pyarrow-dataset" and not in_archive:
+        if extension in PLAIN_FORMATS:
+            block_size = chunksize * max(int(size // rows), 1) if rows else CHUNK_SIZE
+            options = f"block_size = {block_size}"
+            if not utf8:
+                options += f", encoding = '{encoding}'"
+            convert = (
+                f", convert_options = pa_csv.ConvertOptions(column_types = {column_types})"
+                if column_types
+                else ""
+            )
+            lazy = (
+                f"ds.dataset('{file_path}', format = ds.CsvFileFormat("
+                f"parse_options = pa_csv.ParseOptions(delimiter = '{separator}'), "
+                f"read_options = pa_csv.ReadOptions({options}){convert}))"
+            )
+        elif extension in [".parquet", ".feather"]:
+            lazy = f"ds.dataset('{file_path}', format = '{extension[1:]}')"
+    elif (
+        engine == "duckdb" and not in_archive and compression in [None, "gzip", "zstd"]
+    ):
+        if extension in PLAIN_FORMATS and utf8:
+            lazy = f"duckdb.read_csv('{file_path}', sep = '{separator}', header = True"
+            lazy += f", dtype = {column_types})" if column_types else ")"
+        elif lines:
+            lazy = f"duckdb.read_json('{file_path}', format = 'newline_delimited')"
+        elif extension == ".parquet":
+            lazy = f"duckdb.read_parquet('{file_path}')"
+    elif engine == "polars-lazy" and not in_archive and compression is None:
+        if extension in PLAIN_FORMATS and utf8:
+            lazy = f"pl.scan_csv('{file_path}', separator = '{separator}'"
+            lazy += f", schema_overrides = {column_types})" if column_types else ")"
+        elif lines:
+            lazy = f"pl.scan_ndjson('{file_path}')"
+        elif extension == ".parquet":
+            lazy = f"pl.scan_parquet('{file_path}')"
+        elif extension == ".feather":
+            lazy = f"pl.scan_ipc('{file_path}')"
+    if lazy is not None:
+        return f"# Scanned lazily with {engine}\n{df_name} = {lazy}\n"
+    chunked = _pandas_chunked_code(code, chunksize)
+    if chunked is None:
+        return code
+    return f"# Iterator of chunks of {chunksize:,} rows\n{chunked}"
+
+
+def _read_head(
+    r: pd.Series, sample_rows: int | None = None
+) -> tuple[pd.DataFrame | None, bool]:
+    """Reads the first rows of a file.
+
+    Args:
+        r (pd.Series): Row of the exploration DataFrame describing the file.
+        sample_rows (int | None, optional): Number of rows. Defaults to None,
+            SCHEMA_SAMPLE_ROWS.
+
+    Returns:
+        tuple[pd.DataFrame | None, bool]: First rows, None if the file could
+            not be read, and a flag that is True when they are all the rows.
+    """
+    sample_rows = sample_rows or SCHEMA_SAMPLE_ROWS
+    try:
+        sample, _ = load_sample_with_pandas(
+            file_path=r.path,
+            file_name=r["name"],
+            extension=r.extension,
+            sep=r.separator,
+            encoding=r.get("encoding"),
+            sample_rows=sample_rows,
+            sample_strategy="head",
+            chunksize=sample_rows,
+        )
+    except Exception as e:
+        print(e)
+        print(f"Error with {r.path}")
+        return None, False
+    # The head sample stops before the limit only at the end of the file.
+    return sample, sample is not None and len(sample) < sample_rows
+
+
+def _sample_schema(r: pd.Series) -> dict | None:
+    """Infers the schema of a file from its first rows."""
+    sample, complete = _read_head(r)
+    if sample is None:
+        return None
+    return infer_schema(sample, complete=complete)
+
+
+def _sample_dataset_schema(rows: pd.DataFrame) -> dict | None:
+    """Infers the schema of the files of a dataset from the first rows of
+    each file, SCHEMA_SAMPLE_ROWS rows in total, so the dtypes hold the values
+    of all the files."""
+    sample_rows = max(SCHEMA_SAMPLE_ROWS // len(rows), FINGERPRINT_ROWS)
+    samples = []
+    complete = True
+    for _, r in rows.iterrows():
+        sample, file_complete = _read_head(r, sample_rows)
+        if sample is None:
+            return None
+        samples.append(sample)
+        complete = complete and file_complete
+    return infer_schema(pd.concat(samples, ignore_index=True), complete=complete)
+
+
+def _get_content_size(r: pd.Series) -> int:
+    """Returns the size of the content of a file, uncompressed."""
+    size = r.get("uncompressed_size")
+    return r["size"] if size is None or pd.isna(size) else size
+
+
+def get_schema_fingerprint(r: pd.Series) -> str | None:
+    """Returns a hash of the columns of a file, their kind (`number`,
+    `boolean`, `date` or `string`) in its first rows, and its format and
+    separator, to find the files with the same schema.
+
+    Args:
+        r (pd.Series): Row of the exploration DataFrame describing the file.
+
+    Returns:
+        str | None: Hexadecimal digest, None for workbooks, files in archives
+            and files that could not be read.
+    """
+    if r.extension in [".xlsx", ".xls"] or split_archive_path(r.path)[1]:
+        return None
+    try:
+        sample, _ = load_sample_with_pandas(
+            file_path=r.path,
+            file_name=r["name"],
+            extension=r.extension,
+            sep=r.separator,
+            encoding=r.get("encoding"),
+            sample_rows=FINGERPRINT_ROWS,
+            sample_strategy="head",
+            chunksize=FINGERPRINT_ROWS,
+        )
+    except Exception as e:
+        print(e)
+        print(f"Error with {r.path}")
+        return None
+    if sample is None:
+        return None
+    columns = []
+    for column in sample.columns:
+        values = sample[column].dropna()
+        if pd.api.types.is_bool_dtype(values):
+            kind = "boolean"
+        elif pd.api.types.is_numeric_dtype(values):
+            kind = "number"
+        elif not values.empty and (
+            pd.api.types.is_datetime64_any_dtype(values)
+            or pd.to_datetime(values.astype(str), errors="coerce", format="mixed")
+            .notna()
+            .all()
+        ):
+            kind = "date"
+        else:
+            kind = "string"
+        columns.append([str(column), kind])
+    extension = "plain" if r.extension in PLAIN_FORMATS else r.extension
+    fingerprint = json.dumps([extension, r.separator, columns])
+    return hashlib.blake2b(fingerprint.encode(), digest_size=16).hexdigest()
+
+
+def get_dataset_name(names: list[str]) -> str:
+    """Returns the name of a dataset from the names of its files, their common
+    prefix without the trailing digits and separators, as `sales` for
+    `sales_2026-01-01` and `sales_2026-01-02`."""
+    name = os.path.commonprefix(names).rstrip("0123456789_-. ")
+    return name or names[0]
+
+
+def get_datasets(df: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """Returns the rows of each dataset of more than one file.
+
+    Args:
+        df (pd.DataFrame): DataFrame from `explore_files(path, datasets=True)`.
+
+    Returns:
+        dict[str, pd.DataFrame]: Rows of the files of each dataset, without
+            empty, deleted, duplicated and converted files.
+    """
+    if "dataset" not in df.columns:
+        return {}
+    valid = df["dataset"].notna() & (df["rows"].fillna(0) > 0)
+    for column, keep in [
+        ("status", lambda values: values != "deleted"),
+        ("duplicate_of", pd.isna),
+        ("converted_path", pd.isna),
+    ]:
+        if column in df.columns:
+            valid &= keep(df[column])
+    files = df[valid]
+    return {
+        dataset: rows
+        for dataset, rows in files.groupby("dataset", sort=False)
+        if len(rows) > 1
+    }
+
+
+def _get_glob(paths: list[Path], all_paths: list[Path]) -> str | None:
+    """Returns a glob pattern matching the files of a dataset and none of the
+    other explored files, None if the files are in different folders."""
+    paths = [Path(path) for path in paths]
+    if len({path.parent for path in paths}) > 1:
+        return None
+    names = [path.name for path in paths]
+    prefix = os.path.commonprefix(names)
+    suffix = os.path.commonprefix([name[::-1] for name in names])[::-1]
+    suffix = suffix[max(len(prefix) + len(suffix) - min(map(len, names)), 0) :]
+    pattern = str(paths[0].parent / f"{prefix}*{suffix}")
+    matches = [path for path in all_paths if fnmatch(str(path), pattern)]
+    if sorted(map(str, matches)) != sorted(map(str, paths)):
+        return None
+    return pattern
+
+
+def generate_dataset_code(
+    rows: pd.DataFrame,
+    dataset: str,
+    all_paths: list[Path],
+    prefix: str = "df_",
+    schema: dict | None = None,
+    pyarrow: bool = False,
+    engine: str = "pandas",
+    column_schema: dict | None = None,
+) -> str:
+    """Returns code loading the files of a dataset as one DataFrame, reading
+    the files matched by a glob pattern, or listed when there is no pattern
+    matching only them.
+
+    Datasets bigger than `BIG_FILE` are read in chunks or lazily with the
+    `engine`, as in `generate_big_file_code`, over all their files.
+
+    Args:
+        rows (pd.DataFrame): Rows of the files of the dataset.
+        dataset (str): Name of the dataset.
+        all_paths (list[Path]): Paths of all the explored files.
+        prefix (str, optional): Prefix to name the dataframes. Defaults to "df_".
+        schema (dict | None, optional): Schema of the files. Defaults to None.
+        pyarrow (bool, optional): Load the files with pyarrow. Defaults to
+            False.
+        engine (str, optional): Engine from ENGINES. Defaults to "pandas".
+        column_schema (dict | None, optional): Schema of all the files, with
+            the column types of the lazy scans. Defaults to None.
+
+    Returns:
+        str: Code of the loader.
+    """
+    first = rows.iloc[0]
+    paths = list(rows["path"])
+    pattern = _get_glob(paths, all_paths)
+    files = (
+        f"sorted(glob.glob('{pattern}'))"
+        if pattern is not None
+        else str([str(path) for path in paths])
+    )
+    name = dataset.replace(" ", "_").replace("-", "_").replace(",", "_")
+    size = rows.apply(_get_content_size, axis=1).sum()
+    if engine != "pandas" and size > BIG_FILE:
+        code = generate_big_file_code(
+            first.path,
+            first["name"],
+            first.extension,
+            engine,
+            rows=rows["rows"].sum(),
+            size=size,
+            sep=first.separator,
+            prefix=prefix,
+            schema=schema,
+            encoding=first.get("encoding"),
+            column_schema=column_schema,
+        )
+        *comments, loader = code.splitlines()
+        reader = loader.split(" = ", 1)[1]
+        comment = "".join(f"{line}\n" for line in comments)
+        if "chunksize = " in reader:
+            reader = reader.replace(f"'{first.path}'", "f", 1)
+            return (
+                f"{comment}{prefix}{name} = (\n"
+                f"    chunk\n"
+                f"    for f in {files}\n"
+                f"    for chunk in {reader}\n"
+                f")\n"
+            )
+        if comments:
+            reader = reader.replace(f"'{first.path}'", files, 1)
+            return f"{comment}{prefix}{name} = {reader}\n"
+    reader = generate_code(
+        first.path,
+        first["name"],
+        first.extension,
+        sep=first.separator,
+        schema=schema,
+        pyarrow=pyarrow,
+        encoding=first.get("encoding"),
+    )
+    reader = reader.split(" = ", 1)[1].strip().replace(f"'{first.path}'", "f", 1)
+    return (
+        f"{prefix}{name} = pd.concat(\n"
+        f"    ({reader} for f in {files}),\n"
+        f"    ignore_index = True,\n"
+        f")\n"
+    )
+
+
 def generate_pandas_code(
-    df: pd.DataFrame, verbose: bool = True, python_file: str = "code.txt"
+    df: pd.DataFrame,
+    verbose: bool = True,
+    python_file: str = "code.txt",
+    typed: bool = False,
+    pyarrow: bool = False,
+    engine: str = "pandas",
 ) -> None:
     """This functions receives the dataframe generated by `explore()` and
     generates pandas code to read each file.
     It writes a `code.txt` file with the scripts.
     The verbose option is to print the code to the standard output.
+    Files with a `converted_path` from `convert_files` are read from the
+    converted Parquet or Feather file, which already has the dtypes, and the
+    files with a `duplicate_of` from `explore_files(path, dedupe=True)` are
+    skipped.
 
     Args:
         df (pd.DataFrame): DataFrame with description of the files.
@@ -69,12 +667,111 @@ def generate_pandas_code(
             the code generated.
         python_file (str): [Optional (default: "code.txt")] File name for output
             of the code generated.
+        typed (bool): [Optional (default: False)] read the first rows of each
+            file to generate code with explicit `dtype` and `parse_dates`. The
+            schemas are saved in a `schema` column of `df`.
+        pyarrow (bool): [Optional (default: False)] generate code that loads
+            the files with the pyarrow engine and dtypes.
+        engine (str): [Optional (default: "pandas")] `pandas-chunked`,
+            `pyarrow-dataset`, `duckdb` or `polars-lazy` to generate code that
+            reads the files bigger than `BIG_FILE` in chunks or lazily, with
+            `generate_big_file_code`. `pandas` loads all the files at once.
     """
+    if engine not in ENGINES:
+        raise Exception(f"engine {engine} not valid.")
     print(f'Generating python code and saving it to "{python_file}"')
     code = """import pandas as pd\n\n"""
+    schemas = []
+    datasets = get_datasets(df)
+    dataset_schemas: dict[str, dict | None] = {}
+    all_paths = list(df["path"]) if datasets else []
     for i, r in tqdm(df.iterrows(), total=len(df)):
-        if r.rows > 0:
-            code += generate_code(r.path, r["name"], r.extension, sep=r.separator)
+        schema = None
+        dataset = r.get("dataset")
+        if pd.notna(r.get("duplicate_of")):
+            code += f"# '{r.path}' is a duplicate of '{r.duplicate_of}'\n"
+        elif dataset in datasets and i in datasets[dataset].index:
+            if dataset not in dataset_schemas:
+                rows = datasets[dataset]
+                # The lazy scans take the column types of the first file
+                # unless they are given.
+                column_schema = (
+                    _sample_dataset_schema(rows)
+                    if typed or engine in LAZY_TYPES
+                    else None
+                )
+                dataset_schemas[dataset] = column_schema if typed else None
+                code += generate_dataset_code(
+                    rows,
+                    dataset,
+                    all_paths,
+                    schema=dataset_schemas[dataset],
+                    pyarrow=pyarrow,
+                    engine=engine,
+                    column_schema=column_schema,
+                )
+            schema = dataset_schemas[dataset]
+        elif pd.notna(r.rows) and r.rows > 0 and r.get("status") != "deleted":
+            converted_path = r.get("converted_path")
+            size = _get_content_size(r)
+            big_file = engine != "pandas" and size > BIG_FILE
+            if pd.notna(converted_path):
+                if big_file:
+                    code += generate_big_file_code(
+                        converted_path,
+                        Path(converted_path).stem,
+                        Path(converted_path).suffix,
+                        engine,
+                        rows=r.rows,
+                        size=size,
+                    )
+                else:
+                    code += generate_code(
+                        converted_path,
+                        Path(converted_path).stem,
+                        Path(converted_path).suffix,
+                        pyarrow=pyarrow,
+                    )
+                schemas.append(schema)
+                continue
+            if typed:
+                schema = _sample_schema(r)
+            if big_file:
+                code += generate_big_file_code(
+                    r.path,
+                    r["name"],
+                    r.extension,
+                    engine,
+                    rows=r.rows,
+                    size=size,
+                    sep=r.separator,
+                    schema=schema,
+                    encoding=r.get("encoding"),
+                )
+            else:
+                code += generate_code(
+                    r.path,
+                    r["name"],
+                    r.extension,
+                    sep=r.separator,
+                    schema=schema,
+                    pyarrow=pyarrow,
+                    encoding=r.get("encoding"),
+                )
+        schemas.append(schema)
+    if typed:
+        df["schema"] = schemas
+
+    if "zipfile." in code:
+        code = "import zipfile\n\n" + code
+    if "glob.glob(" in code:
+        code = "import glob\n\n" + code
+    if "ds.dataset(" in code:
+        code = "import pyarrow.csv as pa_csv\nimport pyarrow.dataset as ds\n\n" + code
+    if "duckdb.read_" in code:
+        code = "import duckdb\n\n" + code
+    if "pl.scan_" in code:
+        code = "import polars as pl\n\n" + code
 
     with open(python_file, "w") as f:
         f.write(code)
@@ -84,3 +781,178 @@ def generate_pandas_code(
         print("### End of the code ###")
 
     print(f'\n"{python_file}" has the generated Python code to load the files.\n')
+
+
+def _get_sql_type(values: pd.Series, target: str, complete: bool = False) -> str:
+    """Returns the SQL type of a column from a sample of its values.
+
+    Args:
+        values (pd.Series): Sample of the column.
+        target (str): `postgres` or `sqlite`.
+        complete (bool, optional): The sample has all the rows of the file.
+            Otherwise `VARCHAR` columns are sized to the next power of two
+            above twice the longest value of the sample. Defaults to False.
+
+    Returns:
+        str: SQL type from DATA_TYPE_CONVERSION.
+    """
+    types = DATA_TYPE_CONVERSION[target]
+    if pd.api.types.is_bool_dtype(values):
+        return types["bool"]
+    if pd.api.types.is_integer_dtype(values):
+        return types["int64"]
+    if pd.api.types.is_float_dtype(values):
+        return types["float64"]
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return types["datetime64[ns]"]
+    non_null = values.dropna()
+    if len(non_null) and (
+        pd.to_datetime(non_null.astype(str), errors="coerce", format="mixed")
+        .notna()
+        .all()
+    ):
+        return types["datetime64[ns]"]
+    length = int(non_null.astype(str).str.len().max()) if len(non_null) else 1
+    if not complete:
+        length = 1 << (2 * length - 1).bit_length()
+    return types["object"].format(max(length, 1))
+
+
+def _quote(identifier) -> str:
+    """Returns a quoted SQL identifier."""
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+def generate_ddl(
+    table: str, sample: pd.DataFrame, target: str, complete: bool = False
+) -> str:
+    """Returns the `CREATE TABLE` statement of a file.
+
+    Args:
+        table (str): Name of the table.
+        sample (pd.DataFrame): First rows of the file.
+        target (str): `postgres` or `sqlite`.
+        complete (bool, optional): The sample has all the rows of the file.
+            Defaults to False.
+
+    Returns:
+        str: SQL statement.
+    """
+    columns = ",\n".join(
+        f"    {_quote(column)} {_get_sql_type(sample[column], target, complete)}"
+        for column in sample.columns
+    )
+    return f"CREATE TABLE IF NOT EXISTS {_quote(table)} (\n{columns}\n);\n"
+
+
+def _postgres_load(r: pd.Series, table: str) -> str:
+    """Returns the `COPY` command to load a plain file in Postgres, with the
+    absolute path as the server reads it from its own working directory."""
+    encoding = r.get("encoding")
+    if (
+        r.extension not in PLAIN_FORMATS
+        or is_compressed(r.path)
+        or (isinstance(encoding, str) and encoding not in POSTGRES_ENCODINGS)
+    ):
+        return f"-- Load '{r.path}' with the pandas code of `afes generate`.\n"
+    separator = (
+        SEPARATORS[SEPARATOR_NAMES.index(r.separator)]
+        if r.separator in SEPARATOR_NAMES
+        else ","
+    ).replace("\t", "\\t")
+    options = f"FORMAT csv, HEADER true, DELIMITER E'{separator}'"
+    if isinstance(encoding, str):
+        options += f", ENCODING '{POSTGRES_ENCODINGS[encoding]}'"
+    return f"COPY {_quote(table)} FROM '{Path(r.path).resolve()}' WITH ({options});\n"
+
+
+def _sqlite_load(r: pd.Series, table: str, ddl: str, columns: int) -> str:
+    """Returns Python code to load a file in SQLite in batches."""
+    loader = generate_code(
+        r.path, r["name"], r.extension, sep=r.separator, encoding=r.get("encoding")
+    )
+    loader = loader.split(" = ", 1)[1].strip()
+    if r.extension in PLAIN_FORMATS + (".arff",):
+        loader = f"{loader[:-1]}, chunksize = {CHUNK_ROWS})"
+    else:
+        loader = f"[{loader}]"
+    placeholders = ", ".join(["?"] * columns)
+    return (
+        f'con.execute("""{ddl}""")\n'
+        f"for chunk in {loader}:\n"
+        f"    con.executemany(\n"
+        f"        'INSERT INTO {_quote(table)} VALUES ({placeholders})',\n"
+        f"        chunk.astype(object).where(chunk.notna(), None).itertuples(index=False),\n"
+        f"    )\n"
+        f"con.commit()\n\n"
+    )
+
+
+def generate_sql_code(
+    df: pd.DataFrame,
+    target: str = "postgres",
+    verbose: bool = True,
+    python_file: str = "code.txt",
+    database: str = "afes.sqlite",
+) -> None:
+    """Generates the `CREATE TABLE` statements and the bulk load commands of
+    the explored files, one table per file.
+
+    The column types come from DATA_TYPE_CONVERSION and the first rows of each
+    file. For Postgres it writes a SQL script with `COPY ... FROM` commands
+    for the plain files. For SQLite it writes a Python script that creates the
+    tables and inserts the rows with `executemany`, one chunk at a time.
+
+    Args:
+        df (pd.DataFrame): DataFrame with description of the files.
+        target (str, optional): `postgres` or `sqlite`. Defaults to
+            "postgres".
+        verbose (bool, optional): Flag to print the code. Defaults to True.
+        python_file (str, optional): File name for the output of the code
+            generated. Defaults to "code.txt".
+        database (str, optional): SQLite database used by the SQLite script.
+            Defaults to "afes.sqlite".
+
+    Raises:
+        Exception: If the target is not valid.
+    """
+    if target not in DATA_TYPE_CONVERSION:
+        raise Exception(f"target {target} not valid.")
+    print(f'Generating {target} code and saving it to "{python_file}"')
+    if target == "sqlite":
+        code = "import sqlite3\n\nimport pandas as pd\n\n"
+        code += f"con = sqlite3.connect('{database}')\n\n"
+    else:
+        code = ""
+    for i, r in tqdm(df.iterrows(), total=len(df)):
+        if pd.isna(r.rows) or r.rows <= 0 or r.get("status") == "deleted":
+            continue
+        if pd.notna(r.get("duplicate_of")):
+            comment = "#" if target == "sqlite" else "--"
+            code += f"{comment} '{r.path}' is a duplicate of '{r.duplicate_of}'\n\n"
+            continue
+        sample, complete = _read_head(r)
+        if sample is None:
+            continue
+        table = generate_code(r.path, r["name"], r.extension, prefix="")
+        table = table.split(" = ", 1)[0]
+        ddl = generate_ddl(table, sample, target, complete=complete)
+        if target == "sqlite":
+            code += _sqlite_load(r, table, ddl, len(sample.columns))
+        else:
+            code += ddl + _postgres_load(r, table) + "\n"
+    if target == "sqlite":
+        code += "con.close()\n"
+        if "zipfile." in code:
+            code = code.replace(
+                "import sqlite3\n", "import sqlite3\nimport zipfile\n", 1
+            )
+
+    with open(python_file, "w") as f:
+        f.write(code)
+    if verbose:
+        print("### Start of the code ###")
+        print(code)
+        print("### End of the code ###")
+
+    print(f'\n"{python_file}" has the generated {target} code to load the files.\n')
@@ -1,8 +1,19 @@
+import json
 from pathlib import Path
+from typing import Iterable, Iterator
 
+import numpy as np
 import pandas as pd
 
-from afes.config import BIG_FILE, PLAIN_FORMATS, SEPARATOR_NAMES, SEPARATORS
+from afes.config import (
+    BIG_FILE,
+    CHUNK_ROWS,
+    PLAIN_FORMATS,
+    SAMPLE_STRATEGIES,
+    SEPARATOR_NAMES,
+    SEPARATORS,
+)
+from afes.utils import get_json_layout, open_source, read_arff_header
 
 
 def _get_separator_char(sep: str | None) -> str:
@@ -20,6 +31,29 @@ def _get_separator_char(sep: str | None) -> str:
     return ","
 
 
+def _get_encoding(encoding: str | None) -> str | None:
+    """Returns the encoding to read a file with, None for the default of pandas
+    when the encoding is missing."""
+    return encoding if isinstance(encoding, str) else None
+
+
+REPORT_SUFFIXES = {"ydata-profiling": "ydata", "sweetviz": "sweetviz", "afes": "afes"}
+
+
+def get_report_path(output_path: str | Path, file_name: str, profile_tool: str) -> Path:
+    """Returns the path of the HTML report of a file.
+
+    Args:
+        output_path (str | Path): Folder to save the report.
+        file_name (str): Name of the report.
+        profile_tool (str): Tool used to profile the file.
+
+    Returns:
+        Path: Path to the report.
+    """
+    return Path(output_path) / f"{file_name}_{REPORT_SUFFIXES[profile_tool]}.html"
+
+
 def profile_with_ydata_profiling(
     df_to_profile: pd.DataFrame, output_path: str | Path, file_name: str, file_size: int
 ):
@@ -39,44 +73,360 @@ def profile_with_ydata_profiling(
         profile = ProfileReport(df_to_profile, minimal=True)
     else:
         profile = ProfileReport(df_to_profile)
-    report_path = output_path / f"{file_name}_ydata.html"
+    report_path = get_report_path(output_path, file_name, "ydata-profiling")
     profile.to_file(report_path)
     return
 
 
 def load_file_with_pandas(
-    file_path: str, file_name: str, extension: str, sep: str | None = None
+    file_path: str | list,
+    file_name: str,
+    extension: str,
+    sep: str | None = None,
+    excel_file: pd.ExcelFile | None = None,
+    encoding: str | None = None,
 ) -> pd.DataFrame:
     """Read data from file using pandas.
 
     Args:
-        file_path (str): Folder where the structure data is.
+        file_path (str | list): Folder where the structure data is, or the
+            paths of the files of a dataset, read as one DataFrame.
         file_name (str): Name of the file.
         extension (str): Extension of the file.
         sep (str | None, optional): Separator of the plain text file.. Defaults
             to None.
+        excel_file (pd.ExcelFile | None, optional): Workbook already opened to
+            read the sheet from, instead of opening `file_path` again. Defaults
+            to None.
+        encoding (str | None, optional): Encoding of plain and ARFF files.
+            Defaults to None, UTF-8.
 
     Returns:
         pd.DataFrame: DataFrame with the data read.
     """
+    if isinstance(file_path, list):
+        parts = [
+            load_file_with_pandas(f, file_name, extension, sep, encoding=encoding)
+            for f in file_path
+        ]
+        parts = [part for part in parts if part is not None]
+        return pd.concat(parts, ignore_index=True) if parts else None
     try:
-        if extension in PLAIN_FORMATS:
-            separator = _get_separator_char(sep)
-            df = pd.read_csv(file_path, sep=separator)
-            return df
-        elif extension in [".xlsx", ".xls"]:
-            excel_name = Path(file_path).name
-            excel_name += "_" + file_name
-            df = pd.read_excel(file_path, sheet_name=file_name)
-            return df
-        else:
-            return
+        if extension in [".xlsx", ".xls"] and excel_file is not None:
+            return pd.read_excel(excel_file, sheet_name=file_name)
+        with open_source(file_path) as source:
+            if extension in PLAIN_FORMATS:
+                separator = _get_separator_char(sep)
+                df = pd.read_csv(
+                    source, sep=separator, encoding=_get_encoding(encoding)
+                )
+                return df
+            elif extension in [".xlsx", ".xls"]:
+                df = pd.read_excel(source, sheet_name=file_name)
+                return df
+            elif extension == ".json":
+                lines = get_json_layout(file_path) == "lines"
+                df = pd.read_json(source, lines=lines)
+                return df
+            elif extension == ".xml":
+                df = pd.read_xml(source, parser="etree")
+                return df
+            elif extension == ".arff":
+                names, header_lines = read_arff_header(file_path)
+                df = pd.read_csv(
+                    source,
+                    skiprows=header_lines,
+                    names=names,
+                    comment="%",
+                    quotechar="'",
+                    na_values=["?"],
+                    skipinitialspace=True,
+                    encoding=_get_encoding(encoding),
+                )
+                return df
+            else:
+                return
     except Exception as e:
         print(e)
         print(f"Error with {file_path}")
         return
 
 
+def iter_file_chunks(
+    file_path: str | Path | list,
+    file_name: str,
+    extension: str,
+    sep: str | None = None,
+    chunksize: int = CHUNK_ROWS,
+    excel_file: pd.ExcelFile | None = None,
+    encoding: str | None = None,
+) -> Iterator[pd.DataFrame]:
+    """Reads a file in chunks of rows using pandas.
+
+    Plain, ARFF and JSON Lines files are streamed, decompressing them on the
+    fly, the rest of the formats are read at once and returned as a single
+    chunk.
+
+    Args:
+        file_path (str | Path | list): Path to the file, or the paths of the
+            files of a dataset, read one after the other.
+        file_name (str): Name of the file, or of the sheet for Excel files.
+        extension (str): Extension of the file.
+        sep (str | None, optional): Separator of the plain text file. Defaults
+            to None.
+        chunksize (int, optional): Number of rows per chunk. Defaults to
+            CHUNK_ROWS.
+        excel_file (pd.ExcelFile | None, optional): Workbook already opened.
+            Defaults to None.
+        encoding (str | None, optional): Encoding of plain and ARFF files.
+            Defaults to None, UTF-8.
+
+    Yields:
+        Iterator[pd.DataFrame]: Chunks of the file.
+    """
+    if isinstance(file_path, list):
+        for f in file_path:
+            yield from iter_file_chunks(
+                f, file_name, extension, sep, chunksize, encoding=encoding
+            )
+        return
+    if extension in PLAIN_FORMATS:
+        separator = _get_separator_char(sep)
+        with (
+            open_source(file_path) as source,
+            pd.read_csv(
+                source,
+                sep=separator,
+                chunksize=chunksize,
+                encoding=_get_encoding(encoding),
+            ) as reader,
+        ):
+            yield from reader
+    elif extension == ".arff":
+        names, header_lines = read_arff_header(file_path)
+        with (
+            open_source(file_path) as source,
+            pd.read_csv(
+                source,
+                skiprows=header_lines,
+                names=names,
+                comment="%",
+                quotechar="'",
+                na_values=["?"],
+                skipinitialspace=True,
+                chunksize=chunksize,
+                encoding=_get_encoding(encoding),
+            ) as reader,
+        ):
+            yield from reader
+    elif extension == ".json" and get_json_layout(file_path) == "lines":
+        with (
+            open_source(file_path) as source,
+            pd.read_json(source, lines=True, chunksize=chunksize) as reader,
+        ):
+            yield from reader
+    else:
+        df = load_file_with_pandas(
+            file_path=file_path,
+            file_name=file_name,
+            extension=extension,
+            sep=sep,
+            excel_file=excel_file,
+            encoding=encoding,
+        )
+        if df is not None:
+            yield df
+
+
+def _reservoir_update(
+    reservoir: pd.DataFrame | None,
+    chunk: pd.DataFrame,
+    seen: int,
+    sample_rows: int,
+    rng: np.random.Generator,
+) -> pd.DataFrame:
+    """Adds a chunk to a reservoir sample of `sample_rows` rows.
+
+    Each row in position `i` of the stream replaces a random slot of the
+    reservoir with probability `sample_rows / (i + 1)`, as in algorithm R, but
+    the random slots of the whole chunk are drawn at once.
+
+    Args:
+        reservoir (pd.DataFrame | None): Current sample, indexed by slot.
+        chunk (pd.DataFrame): Next rows of the stream.
+        seen (int): Number of rows already streamed before the chunk.
+        sample_rows (int): Size of the sample.
+        rng (np.random.Generator): Random generator.
+
+    Returns:
+        pd.DataFrame: Updated sample, indexed by slot.
+    """
+    positions = np.arange(seen, seen + len(chunk))
+    slots = np.where(positions < sample_rows, positions, rng.integers(0, positions + 1))
+    selected = np.flatnonzero(slots < sample_rows)
+    # When two rows of the chunk get the same slot the last one wins.
+    _, last = np.unique(slots[selected][::-1], return_index=True)
+    selected = selected[len(selected) - 1 - last]
+    new_rows = chunk.iloc[selected].set_axis(slots[selected])
+    if reservoir is None:
+        return new_rows
+    return pd.concat([reservoir.drop(index=new_rows.index, errors="ignore"), new_rows])
+
+
+def _allocate_strata(counts: pd.Series, sample_rows: int) -> pd.Series:
+    """Returns the rows sampled from each stratum, proportional to its rows
+    and `sample_rows` in total, rounding by largest remainder and taking a
+    row from the biggest strata for each stratum left without rows.
+
+    Args:
+        counts (pd.Series): Rows of each stratum, at most `sample_rows`
+            strata.
+        sample_rows (int): Size of the sample.
+
+    Returns:
+        pd.Series: Rows sampled from each stratum.
+    """
+    total = counts.sum()
+    if total <= sample_rows:
+        return counts.astype(int)
+    quotas = counts.to_numpy(dtype=np.float64) * sample_rows / total
+    allocation = np.floor(quotas).astype(int)
+    extra = sample_rows - allocation.sum()
+    allocation[np.argsort(allocation - quotas, kind="stable")[:extra]] += 1
+    for i in np.flatnonzero(allocation == 0):
+        allocation[np.argmax(allocation)] -= 1
+        allocation[i] += 1
+    return pd.Series(allocation, index=counts.index)
+
+
+def load_sample_with_pandas(
+    file_path: str | Path | list,
+    file_name: str,
+    extension: str,
+    sep: str | None = None,
+    rows: int | None = None,
+    sample_rows: int = CHUNK_ROWS,
+    sample_strategy: str = "reservoir",
+    stratify_by: str | None = None,
+    chunksize: int = CHUNK_ROWS,
+    excel_file: pd.ExcelFile | None = None,
+    seed: int | None = None,
+    encoding: str | None = None,
+) -> tuple[pd.DataFrame | None, float]:
+    """Reads a sample of at most `sample_rows` rows of a file, streaming it in
+    chunks so the memory used does not depend on the size of the file.
+
+    Args:
+        file_path (str | Path | list): Path to the file, or the paths of the
+            files of a dataset.
+        file_name (str): Name of the file, or of the sheet for Excel files.
+        extension (str): Extension of the file.
+        sep (str | None, optional): Separator of the plain text file. Defaults
+            to None.
+        rows (int | None, optional): Number of rows of the file, used to compute
+            the fraction of the `head` sample. Defaults to None.
+        sample_rows (int, optional): Size of the sample. Defaults to CHUNK_ROWS.
+        sample_strategy (str, optional): `head` takes the first rows,
+            `reservoir` a uniform random sample and `stratified` a random
+            sample with the same proportions of `stratify_by`. Defaults to
+            "reservoir".
+        stratify_by (str | None, optional): Column used by the `stratified`
+            strategy, with at most `sample_rows` distinct values. Defaults to
+            None, the last column.
+        chunksize (int, optional): Number of rows read at a time. Defaults to
+            CHUNK_ROWS.
+        excel_file (pd.ExcelFile | None, optional): Workbook already opened.
+            Defaults to None.
+        seed (int | None, optional): Seed of the random sample. Defaults to
+            None.
+        encoding (str | None, optional): Encoding of plain and ARFF files.
+            Defaults to None, UTF-8.
+
+    Raises:
+        Exception: If the sample strategy is not valid, or if the column of
+            the `stratified` strategy has more values than `sample_rows`.
+
+    Returns:
+        tuple[pd.DataFrame | None, float]: Sample and the fraction of the rows
+            of the file in the sample.
+    """
+    if sample_strategy not in SAMPLE_STRATEGIES:
+        raise Exception(f"sample_strategy {sample_strategy} not valid.")
+
+    def chunks() -> Iterator[pd.DataFrame]:
+        return iter_file_chunks(
+            file_path=file_path,
+            file_name=file_name,
+            extension=extension,
+            sep=sep,
+            chunksize=chunksize,
+            excel_file=excel_file,
+            encoding=encoding,
+        )
+
+    rng = np.random.default_rng(seed)
+    seen = 0
+    if sample_strategy == "head":
+        head = []
+        for chunk in chunks():
+            head.append(chunk.iloc[: sample_rows - seen])
+            seen += len(chunk)
+            if seen >= sample_rows:
+                break
+        if not head:
+            return None, 1.0
+        sample = pd.concat(head)
+        # The rows after the head are not read, so without the number of rows
+        # of the file the fraction is only an upper bound.
+        return sample, min(1.0, len(sample) / max(rows or seen, 1))
+
+    if sample_strategy == "reservoir":
+        sample = None
+        for chunk in chunks():
+            sample = _reservoir_update(sample, chunk, seen, sample_rows, rng)
+            seen += len(chunk)
+        if sample is None:
+            return None, 1.0
+        return sample.sort_index().reset_index(drop=True), min(
+            1.0, len(sample) / max(seen, 1)
+        )
+
+    # The first pass only keeps the counts of each stratum to allocate the
+    # sample, the second pass keeps a reservoir per stratum.
+    counts: pd.Series | None = None
+    for chunk in chunks():
+        column = stratify_by or chunk.columns[-1]
+        chunk_counts = chunk[column].value_counts(dropna=False)
+        counts = (
+            chunk_counts if counts is None else counts.add(chunk_counts, fill_value=0)
+        )
+        seen += len(chunk)
+        # A column with a stratum per few rows, as an id, cannot be sampled
+        # with a row per stratum within `sample_rows`.
+        if len(counts) > sample_rows:
+            raise Exception(
+                f"stratify_by {column} with more than {sample_rows} values not valid."
+            )
+    if counts is None:
+        return None, 1.0
+    allocation = _allocate_strata(counts, sample_rows)
+    reservoirs: dict = {}
+    strata_seen: dict = {}
+    for chunk in chunks():
+        column = stratify_by or chunk.columns[-1]
+        for stratum, rows in chunk.groupby(column, dropna=False, sort=False):
+            reservoirs[stratum] = _reservoir_update(
+                reservoirs.get(stratum),
+                rows,
+                strata_seen.get(stratum, 0),
+                int(allocation[stratum]),
+                rng,
+            )
+            strata_seen[stratum] = strata_seen.get(stratum, 0) + len(rows)
+    sample = pd.concat(reservoirs.values(), ignore_index=True)
+    return sample, min(1.0, len(sample) / seen)
+
+
 def profile_with_sweetviz(
     df_to_profile: pd.DataFrame, file_name: str, output_path: str | Path = "."
 ):
@@ -94,5 +444,38 @@ def profile_with_sweetviz(
 
     my_report = sv.analyze(df_to_profile)
     my_report.show_html(
-        filepath=output_path / f"{file_name}_sweetviz.html", open_browser=False
+        filepath=get_report_path(output_path, file_name, "sweetviz"),
+        open_browser=False,
+    )
+
+
+def profile_with_afes(
+    chunks: Iterable[pd.DataFrame], file_name: str, output_path: str | Path = "."
+) -> dict:
+    """Profiles a file one chunk at a time with the built-in profiler and
+    saves a JSON and a HTML report.
+
+    Only the sketches of each column are kept in memory, so files larger than
+    the memory can be profiled in a single pass.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Chunks of the file.
+        file_name (str): Name of the report.
+        output_path (str | Path, optional): Folder to save the reports.
+            Defaults to ".".
+
+    Returns:
+        dict: Statistics of the file.
+    """
+    from afes.sketches import TableProfile
+
+    profile = TableProfile()
+    for chunk in chunks:
+        profile.update(chunk)
+    report_path = get_report_path(output_path, file_name, "afes")
+    stats = profile.to_dict()
+    report_path.with_suffix(".json").write_text(
+        json.dumps(stats, indent=2, default=str)
     )
+    report_path.write_text(profile.to_html(file_name), encoding="utf-8")
+    return stats
@@ -0,0 +1,380 @@
+import html
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+
+def hash_values(values: pd.Series) -> np.ndarray:
+    """Returns a 64-bit hash of each value of a series.
+
+    Numbers are hashed as `float64` and the rest of the values as strings, so
+    the same value has the same hash in every chunk of a file even if pandas
+    infers a different dtype for each chunk.
+
+    Args:
+        values (pd.Series): Values without nulls.
+
+    Returns:
+        np.ndarray: Array of `uint64` hashes.
+    """
+    if pd.api.types.is_bool_dtype(values) or not pd.api.types.is_numeric_dtype(values):
+        values = values.astype(str)
+    else:
+        values = values.astype("float64")
+    return pd.util.hash_pandas_object(values, index=False).to_numpy()
+
+
+class HyperLogLog:
+    """HyperLogLog sketch to estimate the number of distinct values.
+
+    Args:
+        precision (int, optional): Number of bits used to select a register.
+            Defaults to 14, 16384 registers and around 1% of error.
+    """
+
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, hashes: np.ndarray) -> None:
+        """Adds the hashes of a chunk of values."""
+        if len(hashes) == 0:
+            return
+        p = self.precision
+        index = (hashes >> np.uint64(64 - p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - p)) - 1)
+        _, bit_length = np.frexp(rest.astype(np.float64))
+        rank = (64 - p - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """Adds the values counted by another sketch."""
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self) -> int:
+        """Returns the estimated number of distinct values."""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.exp2(-self.registers.astype(float)))
+        zeros = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+class CountMinSketch:
+    """Count-min sketch to estimate the frequency of the values.
+
+    Sketches with the same `width`, `depth` and `seed` can be merged.
+
+    Args:
+        width (int, optional): Counters per row. Defaults to 2048.
+        depth (int, optional): Number of rows. Defaults to 4.
+        seed (int, optional): Seed of the hash functions. Defaults to 0.
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.width = width
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.a = rng.integers(1, 2**63, size=depth, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2**63, size=depth, dtype=np.uint64)
+
+    def _columns(self, hashes: np.ndarray) -> np.ndarray:
+        mixed = hashes[None, :] * self.a[:, None] + self.b[:, None]
+        return ((mixed >> np.uint64(32)) % np.uint64(self.width)).astype(np.int64)
+
+    def update(self, hashes: np.ndarray) -> None:
+        """Adds the hashes of a chunk of values."""
+        for row, columns in enumerate(self._columns(hashes)):
+            self.table[row] += np.bincount(columns, minlength=self.width)
+
+    def merge(self, other: "CountMinSketch") -> None:
+        """Adds the values counted by another sketch."""
+        self.table += other.table
+
+    def query(self, hashes: np.ndarray) -> np.ndarray:
+        """Returns the estimated frequency of each hash."""
+        columns = self._columns(hashes)
+        rows = np.arange(len(self.table))[:, None]
+        return self.table[rows, columns].min(axis=0)
+
+
+class QuantileSketch:
+    """Quantile sketch with logarithmic buckets and relative error, as
+    DDSketch.
+
+    Args:
+        relative_accuracy (float, optional): Relative error of the quantiles.
+            Defaults to 0.01.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = np.log(self.gamma)
+        self.positive = pd.Series(dtype="int64")
+        self.negative = pd.Series(dtype="int64")
+        self.zeros = 0
+
+    def _buckets(self, values: np.ndarray) -> pd.Series:
+        keys, counts = np.unique(
+            np.ceil(np.log(values) / self.log_gamma).astype(np.int64),
+            return_counts=True,
+        )
+        return pd.Series(counts, index=keys)
+
+    def update(self, values: np.ndarray) -> None:
+        """Adds a chunk of finite values."""
+        self.zeros += int(np.count_nonzero(values == 0))
+        self.positive = self.positive.add(
+            self._buckets(values[values > 0]), fill_value=0
+        )
+        self.negative = self.negative.add(
+            self._buckets(-values[values < 0]), fill_value=0
+        )
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Adds the values of another sketch."""
+        self.zeros += other.zeros
+        self.positive = self.positive.add(other.positive, fill_value=0)
+        self.negative = self.negative.add(other.negative, fill_value=0)
+
+    def quantile(self, q: float) -> float | None:
+        """Returns the estimated `q` quantile, None if there are no values."""
+        negative = self.negative.sort_index(ascending=False)
+        positive = self.positive.sort_index()
+        total = negative.sum() + self.zeros + positive.sum()
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        counts = np.cumsum(
+            np.concatenate([negative.to_numpy(), [self.zeros], positive.to_numpy()])
+        )
+        i = int(np.searchsorted(counts, rank, side="right"))
+        if i < len(negative):
+            return -2 * self.gamma ** negative.index[i] / (self.gamma + 1)
+        if i == len(negative):
+            return 0.0
+        return (
+            2 * self.gamma ** positive.index[i - len(negative) - 1] / (self.gamma + 1)
+        )
+
+
+def _infer_type(values: pd.Series) -> str:
+    """Returns the type of a chunk of non-null values: `boolean`, `numeric`,
+    `datetime` or `text`."""
+    if pd.api.types.is_bool_dtype(values):
+        return "boolean"
+    if pd.api.types.is_numeric_dtype(values):
+        return "numeric"
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return "datetime"
+    sample = values.head(100).astype(str)
+    if len(sample) and pd.to_numeric(sample, errors="coerce").notna().mean() > 0.95:
+        return "numeric"
+    if len(sample) and (
+        pd.to_datetime(sample, errors="coerce", format="mixed").notna().mean() > 0.95
+    ):
+        return "datetime"
+    return "text"
+
+
+class ColumnProfile:
+    """Statistics of a column updated one chunk at a time.
+
+    Args:
+        name (str): Name of the column.
+        top_k (int, optional): Number of most frequent values. Defaults to 10.
+    """
+
+    def __init__(self, name: str, top_k: int = 10):
+        self.name = name
+        self.top_k = top_k
+        self.count = 0
+        self.nulls = 0
+        self.numeric_count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min: float | None = None
+        self.max: float | None = None
+        self.types: Counter = Counter()
+        self.distinct = HyperLogLog()
+        self.frequencies = CountMinSketch()
+        self.quantiles = QuantileSketch()
+        self.candidates: dict = {}
+
+    def _update_moments(self, count: int, mean: float, m2: float) -> None:
+        total = self.numeric_count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta**2 * self.numeric_count * count / total
+        self.numeric_count = total
+
+    def _update_candidates(self, candidates: dict) -> None:
+        self.candidates.update(candidates)
+        if not self.candidates:
+            return
+        values = list(self.candidates)
+        counts = self.frequencies.query(np.array(list(self.candidates.values())))
+        keep = np.argsort(-counts, kind="stable")[: 2 * self.top_k]
+        self.candidates = {values[i]: self.candidates[values[i]] for i in keep}
+
+    def update(self, series: pd.Series) -> None:
+        """Adds a chunk of the column."""
+        values = series.dropna()
+        self.nulls += len(series) - len(values)
+        self.count += len(values)
+        if len(values) == 0:
+            return
+        self.types[_infer_type(values)] += len(values)
+        hashes = hash_values(values)
+        self.distinct.update(hashes)
+        self.frequencies.update(hashes)
+        chunk_top = values.value_counts().head(2 * self.top_k)
+        self._update_candidates(
+            dict(zip(chunk_top.index, hash_values(chunk_top.index.to_series())))
+        )
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(
+            values
+        ):
+            numbers = values.to_numpy(dtype=np.float64)
+            numbers = numbers[np.isfinite(numbers)]
+            if len(numbers):
+                self._update_moments(
+                    len(numbers),
+                    numbers.mean(),
+                    ((numbers - numbers.mean()) ** 2).sum(),
+                )
+                self.min = min(
+                    numbers.min(), self.min if self.min is not None else np.inf
+                )
+                self.max = max(
+                    numbers.max(), self.max if self.max is not None else -np.inf
+                )
+                self.quantiles.update(numbers)
+
+    def merge(self, other: "ColumnProfile") -> None:
+        """Adds the statistics of the same column computed on other rows."""
+        self.count += other.count
+        self.nulls += other.nulls
+        self.types += other.types
+        self.distinct.merge(other.distinct)
+        self.frequencies.merge(other.frequencies)
+        self.quantiles.merge(other.quantiles)
+        if other.numeric_count:
+            self._update_moments(other.numeric_count, other.mean, other.m2)
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        self._update_candidates(other.candidates)
+
+    def to_dict(self) -> dict:
+        """Returns the statistics of the column."""
+        distinct = min(self.distinct.count(), self.count)
+        inferred_type = self.types.most_common(1)[0][0] if self.types else None
+        if inferred_type == "text" and distinct <= max(50, 0.05 * self.count):
+            inferred_type = "categorical"
+        top = []
+        if self.candidates:
+            counts = self.frequencies.query(np.array(list(self.candidates.values())))
+            # Counts below twice the expected overestimation of the sketch
+            # are noise, as in columns where every value is unique.
+            error = 2 * self.count / self.frequencies.width
+            top = sorted(
+                (
+                    [str(value), count]
+                    for value, count in zip(self.candidates, counts.tolist())
+                    if count > error
+                ),
+                key=lambda item: -item[1],
+            )[: self.top_k]
+        stats = {
+            "type": inferred_type,
+            "count": self.count,
+            "nulls": self.nulls,
+            "distinct": distinct,
+            "top": top,
+        }
+        if self.numeric_count:
+            stats.update(
+                min=float(self.min),
+                max=float(self.max),
+                mean=self.mean,
+                std=float(np.sqrt(self.m2 / self.numeric_count)),
+                quantiles={
+                    str(q): self.quantiles.quantile(q)
+                    for q in (0.05, 0.25, 0.5, 0.75, 0.95)
+                },
+            )
+        return stats
+
+
+class TableProfile:
+    """Statistics of all the columns of a table updated one chunk at a time."""
+
+    def __init__(self):
+        self.rows = 0
+        self.columns: dict[str, ColumnProfile] = {}
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Adds a chunk of rows."""
+        self.rows += len(chunk)
+        for column in chunk.columns:
+            name = str(column)
+            self.columns.setdefault(name, ColumnProfile(name)).update(chunk[column])
+
+    def merge(self, other: "TableProfile") -> None:
+        """Adds the statistics of the same table computed on other rows."""
+        self.rows += other.rows
+        for name, column in other.columns.items():
+            if name in self.columns:
+                self.columns[name].merge(column)
+            else:
+                self.columns[name] = column
+
+    def to_dict(self) -> dict:
+        """Returns the statistics of the table."""
+        return {
+            "rows": self.rows,
+            "columns": {name: c.to_dict() for name, c in self.columns.items()},
+        }
+
+    def to_html(self, title: str) -> str:
+        """Returns a HTML report with the statistics of the table."""
+        headers = ["column", "type", "count", "nulls", "distinct", "min", "mean"]
+        headers += ["std", "max", "median", "top values"]
+        rows = []
+        for name, stats in self.to_dict()["columns"].items():
+            median = stats.get("quantiles", {}).get("0.5")
+            cells = [name, stats["type"], stats["count"], stats["nulls"]]
+            cells += [stats["distinct"], stats.get("min"), stats.get("mean")]
+            cells += [stats.get("std"), stats.get("max"), median]
+            cells += [", ".join(f"{value} ({count})" for value, count in stats["top"])]
+            rows.append(
+                "<tr>"
+                + "".join(
+                    f"<td>{html.escape(_format_cell(cell))}</td>" for cell in cells
+                )
+                + "</tr>"
+            )
+        header = "".join(f"<th>{h}</th>" for h in headers)
+        return (
+            "<!DOCTYPE html>\n<html><head><meta charset='utf-8'>"
+            f"<title>{html.escape(title)}</title><style>"
+            "body{font-family:sans-serif}table{border-collapse:collapse}"
+            "td,th{border:1px solid #ccc;padding:4px 8px;text-align:left}"
+            "</style></head><body>"
+            f"<h1>{html.escape(title)}</h1><p>{self.rows:,} rows, "
+            f"{len(self.columns)} columns</p>"
+            f"<table><tr>{header}</tr>{''.join(rows)}</table></body></html>\n"
+        )
+
+
+def _format_cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:,.4g}"
+    if isinstance(value, int):
+        return f"{value:,}"
+    return str(value)
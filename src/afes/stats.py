@@ -0,0 +1,285 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator
+
+import pandas as pd
+
+STAGES = ("walk", "stat", "count", "separator", "excel", "records")
+STAT_COLUMNS = [
+    f"{stage}_{measure}"
+    for stage in STAGES
+    for measure in ("seconds", "bytes", "peak_memory")
+]
+
+_RECORDER: ContextVar["FileStats | None"] = ContextVar("afes_stats", default=None)
+
+
+class FileStats:
+    """Wall time, bytes read and peak memory of the stages of the exploration of
+    a file.
+
+    The time of a stage does not include the time of the stages inside it, and
+    its peak memory is measured with `tracemalloc` from the memory in use when
+    the stage started.
+    """
+
+    def __init__(self):
+        self.stages: dict[str, dict] = {}
+        self.events: list[dict] = []
+        self._stack: list[dict] = []
+
+    def enter(self, name: str) -> None:
+        if self._stack:
+            self._update_peak(self._stack[-1])
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        self._stack.append(
+            {
+                "name": name,
+                "start": time.perf_counter(),
+                "children": 0.0,
+                "bytes": 0,
+                "base": memory,
+                "peak": memory,
+            }
+        )
+
+    def exit(self) -> None:
+        frame = self._stack.pop()
+        elapsed = time.perf_counter() - frame["start"]
+        self._update_peak(frame)
+        peak_memory = max(frame["peak"] - frame["base"], 0)
+        stage = self.stages.setdefault(
+            frame["name"], {"seconds": 0.0, "bytes": 0, "peak_memory": 0}
+        )
+        stage["seconds"] += elapsed - frame["children"]
+        stage["bytes"] += frame["bytes"]
+        stage["peak_memory"] = max(stage["peak_memory"], peak_memory)
+        self.events.append(
+            {
+                "name": frame["name"],
+                "ph": "X",
+                "ts": frame["start"] * 1e6,
+                "dur": elapsed * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": {"bytes": frame["bytes"], "peak_memory": peak_memory},
+            }
+        )
+        if self._stack:
+            self._stack[-1]["children"] += elapsed
+
+    def add_bytes(self, n: int) -> None:
+        if self._stack:
+            self._stack[-1]["bytes"] += n
+
+    def merge(self, other: "FileStats") -> "FileStats":
+        for name, stage in other.stages.items():
+            current = self.stages.setdefault(
+                name, {"seconds": 0.0, "bytes": 0, "peak_memory": 0}
+            )
+            current["seconds"] += stage["seconds"]
+            current["bytes"] += stage["bytes"]
+            current["peak_memory"] = max(current["peak_memory"], stage["peak_memory"])
+        self.events.extend(other.events)
+        return self
+
+    def to_columns(self) -> dict:
+        """Returns the values of `STAT_COLUMNS`, None for the stages that did
+        not run."""
+        columns = dict.fromkeys(STAT_COLUMNS)
+        for name, stage in self.stages.items():
+            for measure, value in stage.items():
+                columns[f"{name}_{measure}"] = value
+        return columns
+
+    @staticmethod
+    def _update_peak(frame: dict) -> None:
+        frame["peak"] = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+
+
+@contextmanager
+def record(file_stats: FileStats | None):
+    """Context where the stages are recorded in `file_stats`, nothing is
+    recorded if it is None."""
+    if file_stats is None:
+        yield None
+        return
+    token = _RECORDER.set(file_stats)
+    try:
+        yield file_stats
+    finally:
+        _RECORDER.reset(token)
+
+
+def stage(name: str):
+    """Returns a context recording a stage of the exploration of a file, or an
+    empty context if the exploration is not instrumented.
+
+    Args:
+        name (str): Name of the stage, from STAGES.
+    """
+    file_stats = _RECORDER.get()
+    if file_stats is None:
+        return nullcontext()
+    return _stage(file_stats, name)
+
+
+@contextmanager
+def _stage(file_stats: FileStats, name: str):
+    file_stats.enter(name)
+    try:
+        yield
+    finally:
+        file_stats.exit()
+
+
+def iter_with_stats(
+    iterable: Iterable, name: str, enabled: bool = True
+) -> Iterator[tuple[object, FileStats | None]]:
+    """Yields the items of an iterable with the stats of the stage `name`
+    getting each item, or with None if it is not `enabled`.
+
+    Args:
+        iterable (Iterable): Items to get.
+        name (str): Name of the stage.
+        enabled (bool, optional): Record the stats. Defaults to True.
+
+    Yields:
+        Iterator[tuple[object, FileStats | None]]: Items and their stats.
+    """
+    iterator = iter(iterable)
+    while True:
+        file_stats = FileStats() if enabled else None
+        with record(file_stats), stage(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item, file_stats
+
+
+class _CountingStream:
+    """Binary stream counting the bytes read in the current stage."""
+
+    def __init__(self, stream: BinaryIO, file_stats: FileStats):
+        self._stream = stream
+        self._stats = file_stats
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        self._stats.add_bytes(len(data))
+        return data
+
+    def read1(self, size: int = -1) -> bytes:
+        data = self._stream.read1(size)
+        self._stats.add_bytes(len(data))
+        return data
+
+    def readinto(self, buffer) -> int:
+        n = self._stream.readinto(buffer)
+        self._stats.add_bytes(n or 0)
+        return n
+
+    def readline(self, size: int = -1) -> bytes:
+        line = self._stream.readline(size)
+        self._stats.add_bytes(len(line))
+        return line
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        line = next(self._stream)
+        self._stats.add_bytes(len(line))
+        return line
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._stream.close()
+
+    def __getattr__(self, name: str):
+        return getattr(self._stream, name)
+
+
+def track_reads(stream: BinaryIO) -> BinaryIO:
+    """Returns the stream counting the bytes read from it when the exploration
+    is instrumented, or the same stream otherwise."""
+    file_stats = _RECORDER.get()
+    if file_stats is None:
+        return stream
+    return _CountingStream(stream, file_stats)
+
+
+def summarize_stats(df: pd.DataFrame) -> pd.DataFrame:
+    """Returns the totals of each stage of an instrumented exploration.
+
+    Args:
+        df (pd.DataFrame): DataFrame returned by
+            `explore_files(path, instrument=True)`.
+
+    Raises:
+        Exception: If the exploration was not instrumented.
+
+    Returns:
+        pd.DataFrame: Files, total, mean and maximum seconds, bytes read,
+            throughput, maximum peak memory and slowest file of each stage.
+    """
+    from afes.utils import split_archive_path
+
+    if not set(STAT_COLUMNS).issubset(df.columns):
+        raise Exception("df without stats not valid.")
+    # The sheets of a workbook and the members of an archive share the stats.
+    files = df.assign(
+        path=df["path"].map(lambda path: split_archive_path(path)[0])
+    ).drop_duplicates(subset="path")
+    rows = []
+    for name in STAGES:
+        seconds = files[f"{name}_seconds"].dropna().astype(float)
+        if seconds.empty:
+            continue
+        total_bytes = files[f"{name}_bytes"].fillna(0).sum()
+        rows.append(
+            {
+                "stage": name,
+                "files": len(seconds),
+                "seconds": seconds.sum(),
+                "mean_seconds": seconds.mean(),
+                "max_seconds": seconds.max(),
+                "bytes": int(total_bytes),
+                "mb_per_s": (
+                    total_bytes / 1024**2 / seconds.sum()
+                    if total_bytes and seconds.sum()
+                    else None
+                ),
+                "peak_memory": int(files[f"{name}_peak_memory"].max()),
+                "slowest": files.loc[seconds.idxmax(), "path"],
+            }
+        )
+    return pd.DataFrame(rows).set_index("stage")
+
+
+def write_trace(stats: Iterable[tuple[str, FileStats]], trace_file: str | Path) -> None:
+    """Writes the stages of the exploration as a JSON trace, to be opened with
+    `chrome://tracing` or Perfetto.
+
+    Args:
+        stats (Iterable[tuple[str, FileStats]]): Path of each file and its
+            stats.
+        trace_file (str | Path): Path to the JSON file.
+    """
+    events = [
+        event | {"args": event["args"] | {"path": path}}
+        for path, file_stats in stats
+        for event in file_stats.events
+    ]
+    with open(trace_file, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
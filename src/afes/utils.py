@@ -1,9 +1,46 @@
+import bz2
+import codecs
+import gzip
+import hashlib
+import io
+import json
+import lzma
+import re
+import unicodedata
+import xml.etree.ElementTree as ET
+import zipfile
+from contextlib import nullcontext
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
+from typing import BinaryIO
 
 import numpy as np
-import pandas as pd
 
-from afes.config import SEPARATOR_NAMES, SEPARATORS, SIZE_UNITS
+from afes.config import (
+    ACCENT_RATIO,
+    ARCHIVE_FORMATS,
+    CHUNK_SIZE,
+    COMPRESSIONS,
+    ENCODING_SAMPLE,
+    ENCODING_SCORE_CHARS,
+    ENCODINGS,
+    PARTIAL_HASH_BLOCK,
+    ROW_COUNT_SAMPLE,
+    SEPARATOR_NAMES,
+    SEPARATOR_SAMPLE,
+    SEPARATOR_SAMPLE_LINES,
+    SEPARATORS,
+    SIZE_UNITS,
+    SUPPORTED_FORMATS,
+    UTF16_NULL_RATIO,
+)
+from afes.stats import stage, track_reads
+
+CONTROL_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]")
+NON_ASCII = re.compile("[^\x00-\x7f]")
+LETTERS = re.compile(r"[^\W\d_]")
 
 
 def get_human_readable_size(size: float, index: int = 0) -> str:
@@ -25,69 +62,898 @@ def get_human_readable_size(size: float, index: int = 0) -> str:
     return hr_size
 
 
+def parse_human_readable_size(size: str | int) -> int:
+    """Returns the number of bytes of a size like `16GiB` or `512 MiB`.
+
+    Args:
+        size (str | int): Size with one of the `SIZE_UNITS`, or in bytes.
+
+    Raises:
+        Exception: If the size is not valid.
+
+    Returns:
+        int: Size in bytes.
+    """
+    match = re.fullmatch(r"\s*([\d.]+)\s*([A-Za-z]*)\s*", str(size))
+    units = [unit.lower() for unit in SIZE_UNITS]
+    if match is None or match.group(2).lower() not in units + [""]:
+        raise Exception(f"size {size} not valid.")
+    index = units.index(match.group(2).lower()) if match.group(2) else 0
+    return int(float(match.group(1)) * 1024**index)
+
+
+def get_extension(file: str | Path) -> tuple[str, str | None]:
+    """Returns the extension of a file and its compression, looking at the
+    suffix before the compression suffix, as `.csv` and `gzip` for
+    `data.csv.gz`.
+
+    Args:
+        file (str | Path): Path to the file.
+
+    Returns:
+        tuple[str, str | None]: Extension and compression from COMPRESSIONS,
+            None if the file is not compressed.
+    """
+    name = Path(file).name
+    suffix = Path(name).suffix
+    compression = COMPRESSIONS.get(suffix.lower())
+    if compression is not None:
+        suffix = Path(Path(name).stem).suffix
+    return suffix, compression
+
+
+def get_stem(file: str | Path) -> str:
+    """Returns the name of a file without its extension and compression."""
+    name = Path(file).name
+    if get_extension(name)[1] is not None:
+        name = Path(name).stem
+    return Path(name).stem
+
+
+def is_supported(file: str | Path) -> bool:
+    """Returns True for the supported formats, compressed or not, and for the
+    archives with files to explore."""
+    extension, compression = get_extension(file)
+    if compression is None and extension.lower() in ARCHIVE_FORMATS:
+        return True
+    return extension.lower() in SUPPORTED_FORMATS
+
+
+def split_archive_path(file: str | Path) -> tuple[Path, str | None]:
+    """Splits the path of a file inside a ZIP archive, as
+    `data.zip/folder/file.csv`, into the archive and the name of the member.
+
+    Args:
+        file (str | Path): Path to the file.
+
+    Returns:
+        tuple[Path, str | None]: Path to the archive and name of the member,
+            or the path and None if the file is not in an archive.
+    """
+    file = Path(file)
+    for parent in file.parents:
+        if parent.suffix.lower() in ARCHIVE_FORMATS and parent.is_file():
+            return parent, file.relative_to(parent).as_posix()
+    return file, None
+
+
+def open_binary(file: str | Path) -> BinaryIO:
+    """Opens a file to read it as a binary stream, decompressing it on the fly
+    if it is compressed or reading the member if it is in a ZIP archive. Files
+    are never extracted to disk.
+
+    Args:
+        file (str | Path): Path to the file.
+
+    Returns:
+        BinaryIO: Binary file object, counting the bytes read when the
+            exploration is instrumented.
+    """
+    archive, member = split_archive_path(file)
+    compression = get_extension(file)[1]
+    if member is not None:
+        stream = zipfile.ZipFile(archive).open(member)
+    elif compression == "gzip":
+        stream = gzip.open(file, "rb")
+    elif compression == "bz2":
+        stream = bz2.open(file, "rb")
+    elif compression == "xz":
+        stream = lzma.open(file, "rb")
+    elif compression == "zstd":
+        import zstandard
+
+        stream = zstandard.ZstdDecompressor().stream_reader(open(file, "rb"))
+    else:
+        stream = open(file, "rb")
+    return track_reads(stream)
+
+
+def open_source(file: str | Path):
+    """Returns a context with a source for the pandas readers: a decompressed
+    stream for the compressed files and the files in archives, and the path
+    for the rest of the files.
+
+    Args:
+        file (str | Path): Path to the file.
+    """
+    if is_compressed(file):
+        return open_binary(file)
+    return nullcontext(file)
+
+
+def is_compressed(file: str | Path) -> bool:
+    """Returns True if the file is compressed or inside an archive, so its
+    size on disk is not the size of its content."""
+    return get_extension(file)[1] is not None or split_archive_path(file)[1] is not None
+
+
+def _count_newlines(
+    file: str | Path, max_bytes: int | None = None, chunk_size: int = CHUNK_SIZE
+) -> tuple[int, int, bool]:
+    """Counts the newline bytes of a file reading it in binary chunks, or the
+    newline characters for UTF-16 and UTF-32 files.
+
+    Args:
+        file (str | Path): Path to the file.
+        max_bytes (int | None, optional): Stop after reading this many bytes.
+            Defaults to None, reading the whole file.
+        chunk_size (int, optional): Size of each read. Defaults to CHUNK_SIZE.
+
+    Returns:
+        tuple[int, int, bool]: Number of newlines, number of bytes read and
+            whether the last byte read was a newline.
+    """
+    newlines = 0
+    bytes_read = 0
+    last_is_newline = False
+    buffer = bytearray(chunk_size)
+    decoder = None
+    with open_binary(file) as f:
+        while max_bytes is None or bytes_read < max_bytes:
+            to_read = chunk_size
+            if max_bytes is not None:
+                to_read = min(chunk_size, max_bytes - bytes_read)
+            n = f.readinto(memoryview(buffer)[:to_read])
+            if not n:
+                break
+            if bytes_read == 0:
+                decoder = _get_wide_decoder(bytes(buffer[:n]))
+            if decoder is None:
+                newlines += buffer.count(b"\n", 0, n)
+                last_is_newline = buffer[n - 1] == 10
+            else:
+                text = decoder.decode(bytes(buffer[:n]))
+                newlines += text.count("\n")
+                last_is_newline = text.endswith("\n") if text else last_is_newline
+            bytes_read += n
+    return newlines, bytes_read, last_is_newline
+
+
+def _get_wide_decoder(chunk: bytes) -> codecs.IncrementalDecoder | None:
+    """Returns a decoder for the first chunk of a file in a wide encoding, where
+    the newlines have to be counted on the decoded text, or None."""
+    encoding = guess_encoding(chunk[:ENCODING_SAMPLE])
+    if is_wide_encoding(encoding):
+        return codecs.getincrementaldecoder(encoding)(errors="replace")
+    return None
+
+
 def get_row_count(file: str | Path) -> int:
-    """Returns the number of rows in a file."""
-    # TODO - Add closing file
-    return sum(1 for _ in open(file))
+    """Returns the number of rows in a file.
 
+    The file is read in binary chunks and only the newline bytes are counted,
+    a last line without a trailing newline is counted as a row.
 
-def get_character_count(line: str, character: str) -> int:
+    Args:
+        file (str | Path): Path to the file.
+
+    Returns:
+        int: Number of rows.
     """
-    Returns the number of times a character is found in a line.
+    newlines, bytes_read, last_is_newline = _count_newlines(file)
+    if bytes_read > 0 and not last_is_newline:
+        newlines += 1
+    return newlines
+
+
+def estimate_row_count(
+    file: str | Path, sample_bytes: int = ROW_COUNT_SAMPLE
+) -> tuple[int, bool]:
+    """Returns the number of rows in a file reading at most `sample_bytes`.
+
+    If the file is bigger than the sample, the number of rows is extrapolated
+    from the rows found in the first `sample_bytes` of the file. Compressed
+    files are always counted, as their size is not the size of the content.
+
+    Args:
+        file (str | Path): Path to the file.
+        sample_bytes (int, optional): Maximum number of bytes to read.
+            Defaults to ROW_COUNT_SAMPLE.
+
+    Returns:
+        tuple[int, bool]: Number of rows and a flag that is True when the count
+            is exact and False when it is an estimation.
     """
-    return sum(1 for char in line if char == character)
+    if is_compressed(file):
+        return get_row_count(file), True
+    file_size = Path(file).stat().st_size
+    if file_size <= sample_bytes:
+        return get_row_count(file), True
+    newlines, bytes_read, _ = _count_newlines(file, max_bytes=sample_bytes)
+    return round(newlines * file_size / bytes_read), False
 
 
-def compute_counters(data):
+def get_file_hash(file: str | Path, chunk_size: int = CHUNK_SIZE) -> str:
+    """Returns the BLAKE2b hash of the content of a file.
+
+    Args:
+        file (str | Path): Path to the file.
+        chunk_size (int, optional): Size of each read. Defaults to CHUNK_SIZE.
+
+    Returns:
+        str: Hexadecimal digest of the file.
     """
-    Returns the number of times a separator is in each line.
+    file_hash = hashlib.blake2b()
+    buffer = bytearray(chunk_size)
+    with open(file, "rb") as f:
+        while n := f.readinto(buffer):
+            file_hash.update(memoryview(buffer)[:n])
+    return file_hash.hexdigest()
+
+
+def get_partial_hash(file: str | Path, block_size: int = PARTIAL_HASH_BLOCK) -> str:
+    """Returns the BLAKE2b hash of the first and last `block_size` bytes of a
+    file and its size, the hash of the whole file if it is not bigger than
+    two blocks.
+
+    Args:
+        file (str | Path): Path to the file.
+        block_size (int, optional): Bytes read from each end of the file.
+            Defaults to PARTIAL_HASH_BLOCK.
+
+    Returns:
+        str: Hexadecimal digest.
     """
-    counters = np.zeros((len(data), len(SEPARATORS)))
-    for i, line in enumerate(data):
-        counters[i] = [get_character_count(line, sep) for sep in SEPARATORS]
-    return counters
+    size = Path(file).stat().st_size
+    if size <= 2 * block_size:
+        return get_file_hash(file)
+    file_hash = hashlib.blake2b(str(size).encode())
+    with open(file, "rb") as f:
+        file_hash.update(f.read(block_size))
+        f.seek(-block_size, io.SEEK_END)
+        file_hash.update(f.read(block_size))
+    return file_hash.hexdigest()
 
 
-def compute_measures(counters: pd.DataFrame) -> list:
-    """It computes statistics on the counters of the separators. To be used on
-    the evaluation criteria.
+def _count_separators(sample: bytes, at_eof: bool = True) -> np.ndarray:
+    """Counts the separators of each line of a sample in a vectorized way.
+
+    Separators and newlines between double quotes are ignored. The last line
+    is discarded when it was cut by the end of the sample.
+
+    Args:
+        sample (bytes): Bytes read from the beginning of a file.
+        at_eof (bool, optional): Flag to tell if the sample reaches the end of
+            the file. Defaults to True.
+
+    Returns:
+        np.ndarray: Matrix with one row per line and one column per separator
+            in `SEPARATORS`.
     """
-    sep_measures = []
-    for i in range(len(counters.T)):
-        mean = counters.T[:][i].mean()
-        std = counters.T[:][i].std()
-        var = counters.T[:][i].var()
-        min_ = counters.T[:][i].min()
-        max_ = counters.T[:][i].max()
-        median = np.median(counters.T[:][i])
-        sep_measures.append((SEPARATOR_NAMES[i], mean, std, var, min_, max_, median))
-    return sep_measures
+    data = np.frombuffer(sample, dtype=np.uint8)
+    if len(data) == 0:
+        return np.zeros((0, len(SEPARATORS)), dtype=np.int64)
+    outside_quotes = np.cumsum(data == ord('"')) % 2 == 0
+    newlines = (data == ord("\n")) & outside_quotes
+    line_ids = np.cumsum(newlines) - newlines
+    n_lines = int(line_ids[-1]) + 1
+    if not newlines[-1] and not at_eof:
+        n_lines -= 1
+
+    lookup = np.full(256, -1, dtype=np.int64)
+    for i, sep in enumerate(SEPARATORS):
+        lookup[ord(sep)] = i
+    separator_ids = lookup[data]
+    valid = (separator_ids >= 0) & outside_quotes & (line_ids < n_lines)
+    counters = np.bincount(
+        line_ids[valid] * len(SEPARATORS) + separator_ids[valid],
+        minlength=n_lines * len(SEPARATORS),
+    )
+    return counters.reshape(n_lines, len(SEPARATORS))
 
 
-def evaluate_criteria(df: pd.DataFrame):
-    """The evaluation criteria is to select the separator with less standard
-    deviation and with mean above zero.
+def _evaluate_separators(counters: np.ndarray) -> tuple[str, float]:
+    """Selects the separator with less standard deviation and with mean above
+    zero.
+
+    Args:
+        counters (np.ndarray): Separators counted per line.
+
+    Returns:
+        tuple[str, float]: Name of the separator and the share of lines having
+            the most common number of separators, as a confidence score.
     """
-    return df[df["mean"] > 0].sort_values(by="std").iloc[0]["name"]
+    if len(counters) == 0:
+        return "comma", 0.0
+    mean = counters.mean(axis=0)
+    std = np.where(mean > 0, counters.std(axis=0), np.inf)
+    if np.isinf(std).all():
+        return "comma", 0.0
+    i = int(np.argmin(std))
+    column = counters[:, i]
+    confidence = np.bincount(column).max() / len(column)
+    return SEPARATOR_NAMES[i], float(confidence)
+
+
+def detect_separator(
+    sample: bytes,
+    header: bool = True,
+    at_eof: bool = True,
+    sample_lines: int | None = SEPARATOR_SAMPLE_LINES,
+) -> tuple[str, float]:
+    """Returns the separator of a sample of a plain file and a confidence score.
+
+    Args:
+        sample (bytes): Bytes read from the beginning of a file.
+        header (bool, optional): Skip the first line. Defaults to True.
+        at_eof (bool, optional): Flag to tell if the sample reaches the end of
+            the file. Defaults to True.
+        sample_lines (int | None, optional): Maximum number of lines to
+            evaluate. Defaults to SEPARATOR_SAMPLE_LINES.
+
+    Returns:
+        tuple[str, float]: Name of the separator from `SEPARATOR_NAMES` and a
+            confidence score between 0 and 1.
+    """
+    counters = _count_separators(sample, at_eof=at_eof)
+    if header is True:
+        counters = counters[1:]
+    if sample_lines is not None:
+        counters = counters[:sample_lines]
+    return _evaluate_separators(counters)
+
 
+def _read_sample(file_path: str | Path, sample_bytes: int | None) -> tuple[bytes, bool]:
+    """Reads the first bytes of a file.
 
-def get_separator(file_path: Path, header=True) -> str:
+    Args:
+        file_path (str | Path): Path to the file.
+        sample_bytes (int | None): Number of bytes to read, None reads the whole
+            file.
+
+    Returns:
+        tuple[bytes, bool]: Bytes read and a flag that is True when the end of
+            the file was reached.
+    """
+    with open_binary(file_path) as f:
+        if sample_bytes is None:
+            return f.read(), True
+        sample = f.read(sample_bytes)
+        return sample, len(sample) < sample_bytes or not f.read(1)
+
+
+def get_separator(
+    file_path: str | Path,
+    header: bool = True,
+    sample_bytes: int | None = SEPARATOR_SAMPLE,
+    sample_lines: int | None = SEPARATOR_SAMPLE_LINES,
+) -> str:
     """Returns the separator of a given file.
-    It counts the chars ['\t', ' ', ',', ';', '|'] per line in a matrix
-    Then it compute the statistics: mean, std, var, min, max, median of the
-    counts.
+    It counts the chars ['\t', ' ', ',', ';', '|'] per line in a matrix, using
+    only the first `sample_bytes` and `sample_lines` of the file.
     The criteria is: The average of the counting is greater than 0.
     It selects the one with minumum standard deviation per evaluated separator.
-    """
-    data = open(file_path).readlines()
-    if header is True:
-        headers = data[0]
-        data = data[1:]
 
-    counters = compute_counters(data)
-    sep_measures = compute_measures(counters)
+    Args:
+        file_path (str | Path): Path to the file.
+        header (bool, optional): Skip the first line. Defaults to True.
+        sample_bytes (int | None, optional): Bytes to read from the file, None
+            reads the whole file. Defaults to SEPARATOR_SAMPLE.
+        sample_lines (int | None, optional): Maximum number of lines to
+            evaluate. Defaults to SEPARATOR_SAMPLE_LINES.
 
-    column_measures = ["name", "mean", "std", "var", "min_", "max_", "median"]
-    df_separators = pd.DataFrame(sep_measures, columns=column_measures)
-    sep = evaluate_criteria(df_separators)
+    Returns:
+        str: Name of the separator from `SEPARATOR_NAMES`.
+    """
+    sample, at_eof = _read_sample(file_path, sample_bytes)
+    encoding = guess_encoding(sample)
+    if is_wide_encoding(encoding):
+        sample = to_utf8(sample, encoding)
+    sep, _ = detect_separator(
+        sample, header=header, at_eof=at_eof, sample_lines=sample_lines
+    )
     return sep
+
+
+def get_sheet_row_count(worksheet, exact: bool = False) -> tuple[int, bool]:
+    """Returns the number of data rows of an Excel worksheet, without the
+    header.
+
+    The number of rows is taken from the dimension stored in the workbook when
+    it is available, otherwise the rows are streamed and the non-empty ones
+    counted as `pd.read_excel` would do.
+
+    Args:
+        worksheet (openpyxl.worksheet.worksheet.Worksheet): Worksheet opened in
+            read-only mode.
+        exact (bool, optional): Always stream the rows to count them. Defaults
+            to False.
+
+    Returns:
+        tuple[int, bool]: Number of rows and a flag that is True when the rows
+            were counted and False when they come from the metadata.
+    """
+    if not exact and worksheet.max_row is not None and worksheet.min_row is not None:
+        return worksheet.max_row - worksheet.min_row, False
+    if hasattr(worksheet, "reset_dimensions"):
+        worksheet.reset_dimensions()
+    rows = sum(
+        1
+        for row in worksheet.iter_rows(values_only=True)
+        if any(value is not None for value in row)
+    )
+    return max(rows - 1, 0), True
+
+
+def _guess_utf16(sample: bytes) -> str | None:
+    """Returns `utf-16-le` or `utf-16-be` if the sample looks like UTF-16
+    without a BOM, where most characters have a null byte in the same
+    position."""
+    pairs = len(sample) // 2
+    if pairs == 0:
+        return None
+    even_nulls = sample[0 : 2 * pairs : 2].count(0) / pairs
+    odd_nulls = sample[1 : 2 * pairs : 2].count(0) / pairs
+    if odd_nulls > UTF16_NULL_RATIO and even_nulls < 1 - UTF16_NULL_RATIO:
+        return "utf-16-le"
+    if even_nulls > UTF16_NULL_RATIO and odd_nulls < 1 - UTF16_NULL_RATIO:
+        return "utf-16-be"
+    return None
+
+
+@lru_cache(maxsize=65_536)
+def _get_script(char: str) -> str | None:
+    """Returns the script of a letter, as `LATIN`, `CYRILLIC`, `GREEK` or
+    `CJK` for ideographs and kana, and None for other characters."""
+    if not char.isalpha():
+        return None
+    script = unicodedata.name(char, "").split(" ")[0]
+    if script in ("CJK", "HIRAGANA", "KATAKANA"):
+        return "CJK"
+    return script
+
+
+@lru_cache(maxsize=65_536)
+def _is_symbol(char: str) -> bool:
+    """Returns True for the symbols, other numbers as superscripts and
+    fractions, and the private or unassigned characters."""
+    category = unicodedata.category(char)
+    return category[0] == "S" or category in ("No", "Co", "Cn")
+
+
+@lru_cache(maxsize=65_536)
+def _is_punctuation(char: str) -> bool:
+    """Returns True for the punctuation other than dashes, apostrophes and the
+    CJK punctuation written between ideographs."""
+    category = unicodedata.category(char)
+    if category[0] != "P" or category == "Pd" or char == "\u2019":
+        return False
+    return not unicodedata.name(char, "").startswith(("FULLWIDTH", "IDEOGRAPHIC"))
+
+
+@lru_cache(maxsize=65_536)
+def _is_accented(char: str) -> bool:
+    return _get_script(char) == "LATIN" and " WITH " in unicodedata.name(char, "")
+
+
+def _get_mess(text: str) -> float:
+    """Returns the ratio of the first `ENCODING_SCORE_CHARS` non-ASCII
+    characters of a decoded text that look like a wrong decoding, between 0
+    and 1.
+
+    Control characters, halfwidth katakana, symbols right after a letter,
+    punctuation between letters, capital letters right after a lowercase
+    letter, letters next to a letter of another script and too many accented
+    letters are counted as mess.
+    """
+    non_ascii = 0
+    mess = 0
+    accented = 0
+    end = 0
+    for match in islice(NON_ASCII.finditer(text), ENCODING_SCORE_CHARS):
+        i = match.start()
+        char = text[i]
+        previous = text[i - 1] if i > 0 else " "
+        following = text[i + 1] if i + 1 < len(text) else " "
+        script = _get_script(char)
+        non_ascii += 1
+        end = i + 1
+        accented += _is_accented(char)
+        if unicodedata.name(char, "").startswith("HALFWIDTH"):
+            mess += 1
+        elif _is_symbol(char):
+            mess += previous.isalpha()
+        elif _is_punctuation(char):
+            mess += previous.isalpha() and following.isalpha()
+        elif previous.islower() and char.isupper():
+            mess += 1
+        elif script is not None and _get_script(previous) not in (None, script):
+            mess += 1
+        # A non-ASCII next character is checked with this one as its previous.
+        elif (
+            script is not None
+            and following.isascii()
+            and _get_script(following) not in (None, script)
+        ):
+            mess += 1
+    if non_ascii == 0:
+        return 0.0
+    mess += len(CONTROL_CHARS.findall(text, 0, end))
+    letters = len(LETTERS.findall(text, 0, end))
+    if accented > ACCENT_RATIO * letters:
+        mess += accented
+    return min(mess / non_ascii, 1.0)
+
+
+def detect_encoding(sample: bytes) -> tuple[str, float]:
+    """Returns the encoding of a file from a sample of its first bytes and a
+    confidence score.
+
+    A BOM decides the encoding, then the position of null bytes tells UTF-16
+    without BOM. Samples that are not valid UTF-8 are decoded with each of the
+    `ENCODINGS` and scored by how plausible the decoded text is, as the bytes
+    of a file in a wrong encoding decode to control characters, symbols,
+    punctuation or capital letters in the middle of words, words mixing
+    scripts or too many accented letters. Ties go to the first of the
+    `ENCODINGS`.
+
+    Args:
+        sample (bytes): Bytes read from the beginning of a file.
+
+    Returns:
+        tuple[str, float]: Name of the encoding, as `utf-8-sig`, `utf-16`,
+            `utf-32`, `utf-16-le`, `utf-8` or one of the `ENCODINGS`, and the
+            ratio of the non-ASCII characters that look well decoded, as a
+            confidence score.
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig", 1.0
+    if sample.startswith((codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE)):
+        return "utf-32", 1.0
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16", 1.0
+    utf16 = _guess_utf16(sample)
+    if utf16 is not None:
+        return utf16, 1.0
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8", 1.0
+    except UnicodeDecodeError:
+        pass
+    scores = {}
+    for encoding in ENCODINGS:
+        try:
+            # The sample may end in the middle of a character.
+            text = codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+        except UnicodeDecodeError:
+            continue
+        scores[encoding] = 1 - _get_mess(text)
+    encoding = max(scores, key=scores.get)
+    return encoding, scores[encoding]
+
+
+def guess_encoding(sample: bytes) -> str:
+    """Guess the encoding of a file from a sample of its first bytes with
+    `detect_encoding`.
+
+    Args:
+        sample (bytes): Bytes read from the beginning of a file.
+
+    Returns:
+        str: Name of the encoding.
+    """
+    encoding, _ = detect_encoding(sample)
+    return encoding
+
+
+def is_wide_encoding(encoding: str | None) -> bool:
+    """Returns True for the encodings where a newline is not a single byte,
+    so the bytes of the file have to be decoded to count rows and separators.
+    """
+    return encoding is not None and encoding.startswith(("utf-16", "utf-32"))
+
+
+def to_utf8(sample: bytes, encoding: str) -> bytes:
+    """Returns a sample of a file in a wide encoding as UTF-8, ignoring a last
+    character cut in the middle.
+
+    Args:
+        sample (bytes): Bytes of the file.
+        encoding (str): Encoding of the file.
+
+    Returns:
+        bytes: The sample encoded as UTF-8.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    return decoder.decode(sample).encode("utf-8")
+
+
+@dataclass
+class FileScan:
+    """Metadata of a plain file collected by `scan_file`."""
+
+    rows: int
+    rows_exact: bool
+    separator: str
+    separator_confidence: float
+    header: str
+    encoding: str
+    encoding_confidence: float
+    line_length_mean: float
+    line_length_max: int
+    uncompressed_size: int
+
+
+def scan_file(
+    file_path: str | Path,
+    header: bool = True,
+    max_bytes: int | None = None,
+    sample_bytes: int = SEPARATOR_SAMPLE,
+    sample_lines: int | None = SEPARATOR_SAMPLE_LINES,
+    chunk_size: int = CHUNK_SIZE,
+) -> FileScan:
+    """Reads a plain file once and returns its row count, separator, header,
+    encoding and line length statistics.
+
+    The rows are counted over the binary chunks of the whole file, while the
+    separator, header, encoding and maximum line length come from the first
+    `sample_bytes` of the same read. Compressed files and files in archives
+    are decompressed while they are read and always read completely.
+
+    Args:
+        file_path (str | Path): Path to the file.
+        header (bool, optional): The first line is a header. Defaults to True.
+        max_bytes (int | None, optional): Stop after reading this many bytes and
+            estimate the number of rows. Defaults to None.
+        sample_bytes (int, optional): Bytes used to detect the separator.
+            Defaults to SEPARATOR_SAMPLE.
+        sample_lines (int | None, optional): Maximum number of lines used to
+            detect the separator. Defaults to SEPARATOR_SAMPLE_LINES.
+        chunk_size (int, optional): Size of each read. Defaults to CHUNK_SIZE.
+
+    Returns:
+        FileScan: Metadata of the file.
+    """
+    if is_compressed(file_path):
+        # The size of the content is only known once it is decompressed.
+        file_size = None
+        max_bytes = None
+    else:
+        file_size = Path(file_path).stat().st_size
+    newlines = 0
+    bytes_read = 0
+    last_is_newline = False
+    sample = bytearray()
+    buffer = bytearray(chunk_size)
+    decoder = None
+    with stage("count"), open_binary(file_path) as f:
+        while max_bytes is None or bytes_read < max_bytes:
+            to_read = chunk_size
+            if max_bytes is not None:
+                to_read = min(chunk_size, max_bytes - bytes_read)
+            n = f.readinto(memoryview(buffer)[:to_read])
+            if not n:
+                break
+            if bytes_read == 0:
+                decoder = _get_wide_decoder(bytes(buffer[:n]))
+            if len(sample) < sample_bytes:
+                sample += buffer[: min(n, sample_bytes - len(sample))]
+            if decoder is None:
+                newlines += buffer.count(b"\n", 0, n)
+                last_is_newline = buffer[n - 1] == 10
+            else:
+                text = decoder.decode(bytes(buffer[:n]))
+                newlines += text.count("\n")
+                last_is_newline = text.endswith("\n") if text else last_is_newline
+            bytes_read += n
+
+    if file_size is None:
+        file_size = bytes_read
+    rows_exact = bytes_read == file_size
+    if rows_exact:
+        rows = newlines + (1 if bytes_read > 0 and not last_is_newline else 0)
+    else:
+        rows = round(newlines * file_size / bytes_read)
+
+    sample_at_eof = len(sample) == file_size
+    with stage("separator"):
+        encoding, encoding_confidence = detect_encoding(bytes(sample))
+        text_encoding = encoding
+        text_sample = bytes(sample)
+        if is_wide_encoding(encoding):
+            text_encoding = "utf-8"
+            text_sample = to_utf8(text_sample, encoding)
+        separator, confidence = detect_separator(
+            text_sample,
+            header=header,
+            at_eof=sample_at_eof,
+            sample_lines=sample_lines,
+        )
+        lines = text_sample.split(b"\n")
+        if not sample_at_eof and len(lines) > 1:
+            lines = lines[:-1]
+        first_line = lines[0].rstrip(b"\r") if lines else b""
+    return FileScan(
+        rows=rows,
+        rows_exact=rows_exact,
+        separator=separator,
+        separator_confidence=confidence,
+        header=first_line.decode(text_encoding, errors="replace") if header else "",
+        encoding=encoding,
+        encoding_confidence=encoding_confidence,
+        line_length_mean=file_size / rows if rows else 0.0,
+        line_length_max=max(len(line) for line in lines) if lines else 0,
+        uncompressed_size=file_size,
+    )
+
+
+def get_json_layout(file: str | Path) -> str:
+    """Returns the layout of a JSON file.
+
+    Args:
+        file (str | Path): Path to the file.
+
+    Returns:
+        str: `array` when the document is a list of records, `lines` when it
+            is a JSON Lines file with a record per line and `object` otherwise.
+    """
+    with open_binary(file) as f:
+        first_line = f.readline()
+        while first_line and not first_line.strip():
+            first_line = f.readline()
+    first_line = first_line.strip().removeprefix(codecs.BOM_UTF8)
+    if first_line.startswith(b"["):
+        return "array"
+    try:
+        json.loads(first_line)
+    except ValueError:
+        return "object"
+    return "lines"
+
+
+def _count_json_array(file: str | Path, chunk_size: int = CHUNK_SIZE) -> int:
+    """Counts the elements of a JSON array decoding one element at a time.
+
+    Args:
+        file (str | Path): Path to the file.
+        chunk_size (int, optional): Size of each read. Defaults to CHUNK_SIZE.
+
+    Returns:
+        int: Number of elements in the array.
+    """
+    decoder = json.JSONDecoder()
+    count = 0
+    with io.TextIOWrapper(open_binary(file), encoding="utf-8-sig") as f:
+        buffer = f.read(chunk_size).lstrip()
+        pos = 1  # Skips the opening bracket
+        at_eof = False
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == "]":
+                return count
+            try:
+                _, end = decoder.raw_decode(buffer, pos)
+                complete = end < len(buffer) or at_eof
+            except json.JSONDecodeError:
+                if at_eof:
+                    raise
+                complete = False
+            if complete:
+                count += 1
+                pos = end
+                continue
+            chunk = f.read(chunk_size)
+            at_eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+
+def _count_xml_records(file: str | Path) -> int:
+    """Counts the children of the root element of a XML file, clearing each one
+    once it is parsed.
+
+    Args:
+        file (str | Path): Path to the file.
+
+    Returns:
+        int: Number of records.
+    """
+    count = 0
+    depth = 0
+    root = None
+    with open_binary(file) as f:
+        for event, element in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                root = element if root is None else root
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 1:
+                    count += 1
+                    root.clear()
+    return count
+
+
+def read_arff_header(file: str | Path) -> tuple[list[str], int]:
+    """Returns the attribute names of an ARFF file and the number of lines
+    before the data.
+
+    Args:
+        file (str | Path): Path to the file.
+
+    Returns:
+        tuple[list[str], int]: Attribute names and number of lines of the
+            header, including the `@data` line.
+    """
+    attribute = re.compile(
+        r"@attribute\s+(?:'([^']*)'|\"([^\"]*)\"|(\S+))", re.IGNORECASE
+    )
+    names = []
+    with open_binary(file) as f:
+        for i, line in enumerate(f):
+            text = line.decode("utf-8", errors="replace").strip()
+            if text.lower().startswith("@data"):
+                return names, i + 1
+            match = attribute.match(text)
+            if match:
+                names.append(next(group for group in match.groups() if group))
+    return names, 0
+
+
+def _count_arff_records(file: str | Path) -> int:
+    """Counts the non-empty and non-comment lines after the `@data` line of an
+    ARFF file.
+
+    Args:
+        file (str | Path): Path to the file.
+
+    Returns:
+        int: Number of records.
+    """
+    _, header_lines = read_arff_header(file)
+    count = 0
+    with open_binary(file) as f:
+        for i, line in enumerate(f):
+            line = line.strip()
+            if i >= header_lines and line and not line.startswith(b"%"):
+                count += 1
+    return count
+
+
+def get_record_count(file: str | Path, extension: str) -> int | None:
+    """Returns the number of records of a JSON, XML or ARFF file without loading
+    the whole document in memory.
+
+    Args:
+        file (str | Path): Path to the file.
+        extension (str): Extension of the file.
+
+    Returns:
+        int | None: Number of records, None if the format is not supported or
+            the JSON document is not a list of records.
+    """
+    extension = extension.lower()
+    if extension == ".json":
+        layout = get_json_layout(file)
+        if layout == "lines":
+            with open_binary(file) as f:
+                return sum(1 for line in f if line.strip())
+        elif layout == "array":
+            return _count_json_array(file)
+        return None
+    elif extension == ".xml":
+        return _count_xml_records(file)
+    elif extension == ".arff":
+        return _count_arff_records(file)
+    return None
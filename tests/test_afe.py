@@ -1,8 +1,29 @@
+import bz2
+import gzip
+import json
+import lzma
+import os
+import threading
+import time
+import zipfile
 from collections.abc import Iterable
+from pathlib import Path
 
 import pandas as pd
+import pytest
 
-from afes.afe import _get_descriptions, _get_files, explore_files
+from afes import afe, convert, generate, utils
+from afes.afe import (
+    _get_descriptions,
+    _get_files,
+    _walk_files,
+    convert_files,
+    explore_files,
+    generate_code,
+    profile_files,
+)
+from afes.stats import summarize_stats
+from afes.utils import get_file_hash
 
 
 def test__get_files(get_sample_data_path):
@@ -29,3 +50,518 @@ def test_explore(get_sample_data_path):
     df = explore_files(get_sample_data_path)
     assert isinstance(df, pd.DataFrame)
     assert "separator" in df.columns
+
+
+def test_explore_plain_files(tmp_path):
+    (tmp_path / "comma.csv").write_text("a,b\n1,2\n3,4\n")
+    (tmp_path / "pipe.txt").write_text("a|b\n1|2\n")
+    (tmp_path / "notes.md").write_text("not structured data")
+    df = explore_files(tmp_path).sort_values(by="name").reset_index(drop=True)
+    assert list(df["name"]) == ["comma", "pipe"]
+    assert list(df["rows"]) == [3, 2]
+    assert list(df["separator"]) == ["comma", "pipe"]
+    assert list(df["encoding"]) == ["utf-8", "utf-8"]
+
+
+def test_explore_files_low_encoding_confidence(tmp_path, capsys):
+    (tmp_path / "cyrillic.csv").write_bytes("\u0438\u043c\u044f;1\n".encode("cp1251"))
+    (tmp_path / "binary.csv").write_bytes(b"a;b\n" + bytes(range(0x80, 0x100)) * 4)
+    df = explore_files(tmp_path).set_index("name")
+    assert df.loc["cyrillic", "encoding"] == "cp1251"
+    out = capsys.readouterr().out
+    assert f"of {tmp_path / 'binary.csv'}" in out
+    assert "cyrillic" not in out
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_explore_files_in_parallel(tmp_path, executor):
+    for i in range(10):
+        (tmp_path / f"file_{i}.csv").write_text("a,b\n1,2\n" * (i + 1))
+    (tmp_path / "corrupt.xlsx").write_text("not an excel file")
+    all_files = sorted(tmp_path.iterdir())
+    df = _get_descriptions(all_files, workers=4, executor=executor)
+    expected = _get_descriptions(all_files)
+    assert len(df) == 10
+    assert list(df["name"]) == [f.stem for f in all_files if f.suffix == ".csv"]
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_explore_files_incremental(tmp_path):
+    (tmp_path / "same.csv").write_text("a,b\n1,2\n")
+    (tmp_path / "changed.csv").write_text("a,b\n1,2\n")
+    (tmp_path / "deleted.csv").write_text("a,b\n1,2\n")
+    df_previous = explore_files(tmp_path)
+
+    (tmp_path / "changed.csv").write_text("a,b\n1,2\n3,4\n")
+    (tmp_path / "deleted.csv").unlink()
+    (tmp_path / "new.csv").write_text("a;b\n1;2\n")
+    df = explore_files(tmp_path, since=df_previous).set_index("name")
+    assert df.loc["same", "status"] == "unchanged"
+    assert df.loc["changed", "status"] == "modified"
+    assert df.loc["changed", "rows"] == 3
+    assert df.loc["deleted", "status"] == "deleted"
+    assert df.loc["new", "status"] == "new"
+    assert df.loc["new", "separator"] == "semi_colon"
+
+    df_next = explore_files(tmp_path, since=df.reset_index())
+    assert "deleted" not in list(df_next["name"])
+    assert set(df_next["status"]) == {"unchanged"}
+
+
+def test_explore_excel_sheets(tmp_path):
+    with pd.ExcelWriter(tmp_path / "book.xlsx") as writer:
+        pd.DataFrame({"a": range(5)}).to_excel(writer, sheet_name="five", index=False)
+        pd.DataFrame({"a": range(3)}).to_excel(writer, sheet_name="three", index=False)
+    df = explore_files(tmp_path)
+    assert list(df["name"]) == ["five", "three"]
+    assert list(df["rows"]) == [5, 3]
+
+
+def test__walk_files_filters(tmp_path):
+    for folder in ["keep", "keep/deep", "skip", ".hidden"]:
+        (tmp_path / folder).mkdir()
+    for file in ["a.csv", "b.txt", "c.md", "keep/d.csv", "keep/deep/e.csv"]:
+        (tmp_path / file).write_text("a,b\n")
+    (tmp_path / "skip" / "f.csv").write_text("a,b\n")
+    (tmp_path / ".hidden" / "g.csv").write_text("a,b\n")
+
+    def names(**kwargs):
+        return [f.name for f, _ in _walk_files(tmp_path, **kwargs)]
+
+    assert names() == ["a.csv", "b.txt", "d.csv", "e.csv", "f.csv"]
+    assert names(exclude=["skip"], include=["*.csv"]) == ["a.csv", "d.csv", "e.csv"]
+    assert names(max_depth=1) == ["a.csv", "b.txt", "d.csv", "f.csv"]
+    assert "g.csv" in names(hidden=True)
+    assert all(stat.st_size == 4 for _, stat in _walk_files(tmp_path))
+
+
+@pytest.mark.parametrize("executor", ["thread", "async"])
+def test_explore_files_unreadable_folder(tmp_path, monkeypatch, capsys, executor):
+    for folder in ["locked", "open"]:
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "data.csv").write_text("a,b\n1,2\n")
+    scandir = os.scandir
+
+    def locked_scandir(path):
+        if Path(path).name == "locked":
+            raise PermissionError(f"Permission denied: '{path}'")
+        return scandir(path)
+
+    monkeypatch.setattr(afe.os, "scandir", locked_scandir)
+    df = explore_files(tmp_path, executor=executor)
+    assert df["path"].tolist() == [tmp_path / "open" / "data.csv"]
+    assert f"Error with {tmp_path / 'locked'}" in capsys.readouterr().out
+
+
+def test_explore_record_formats(tmp_path):
+    (tmp_path / "a.json").write_text('[{"a": 1}, {"a": 2}]')
+    (tmp_path / "b.xml").write_text("<data><row><a>1</a></row></data>")
+    (tmp_path / "c.json").write_text('{\n"a": {"b": 1}\n}')
+    df = explore_files(tmp_path)
+    assert list(df["rows"][:2]) == [2, 1]
+    assert pd.isna(df["rows"][2])
+
+
+def test_explore_compressed_files(tmp_path):
+    content = b"a;b\n1;x\n2;y\n"
+    (tmp_path / "a.csv.gz").write_bytes(gzip.compress(content))
+    (tmp_path / "b.txt.bz2").write_bytes(bz2.compress(content))
+    (tmp_path / "c.csv.xz").write_bytes(lzma.compress(content))
+    with zipfile.ZipFile(tmp_path / "d.zip", "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("folder/e.csv", content * 10)
+        archive.writestr("f.bin", b"skipped")
+    df = explore_files(tmp_path)
+
+    assert list(df["name"]) == ["a", "b", "c", "e"]
+    assert list(df["compression"]) == ["gzip", "bz2", "xz", "zip"]
+    assert list(df["rows"]) == [3, 3, 3, 30]
+    assert list(df["uncompressed_size"]) == [12, 12, 12, 120]
+    assert (df["separator"] == "semi_colon").all()
+    assert df["path"][3] == tmp_path / "d.zip" / "folder" / "e.csv"
+
+    python_file = tmp_path / "code.py"
+    generate_code(df, python_file=python_file, verbose=False)
+    namespace = {}
+    exec(python_file.read_text(), namespace)
+    assert len(namespace["df_a"]) == 2
+    assert len(namespace["df_e"]) == 29
+
+    again = explore_files(tmp_path, since=df)
+    assert (again["status"] == "unchanged").all()
+
+
+def test_explore_files_dedupe(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(afe, "PARTIAL_HASH_BLOCK", 16)
+    content = "a,b\n" + "1,2\n" * 20
+    changed = content[:40] + "9" + content[41:]
+    for folder in ["in", "copy", "other"]:
+        (tmp_path / folder).mkdir()
+    (tmp_path / "in" / "data.csv").write_text(content)
+    (tmp_path / "copy" / "data.csv").write_text(content)
+    (tmp_path / "other" / "data.csv").write_text(changed)
+    (tmp_path / "other" / "small.csv").write_text("a\n1\n")
+    (tmp_path / "other" / "head.csv").write_text("x" + content[1:])
+    for name in ["a.zip", "b.zip"]:
+        with zipfile.ZipFile(tmp_path / name, "w") as archive:
+            archive.writestr(zipfile.ZipInfo("x.csv"), "a\n1\n2\n")
+
+    df = explore_files(tmp_path, dedupe=True).set_index("path")
+    assert "2 duplicates of 2 files" in capsys.readouterr().out
+    duplicates = df["duplicate_of"].dropna().to_dict()
+    assert duplicates == {
+        tmp_path / "b.zip" / "x.csv": tmp_path / "a.zip" / "x.csv",
+        tmp_path / "in" / "data.csv": tmp_path / "copy" / "data.csv",
+    }
+    hashes = df["content_hash"]
+    assert hashes[tmp_path / "in" / "data.csv"] == get_file_hash(
+        tmp_path / "copy" / "data.csv"
+    )
+    # Same first and last blocks, told apart by the hash of the whole file.
+    assert hashes[tmp_path / "other" / "data.csv"] == get_file_hash(
+        tmp_path / "other" / "data.csv"
+    )
+    assert (
+        hashes[tmp_path / "other" / "data.csv"] != hashes[tmp_path / "in" / "data.csv"]
+    )
+    # Unique first block, not hashed.
+    assert pd.isna(hashes[tmp_path / "other" / "head.csv"])
+    assert pd.isna(hashes[tmp_path / "other" / "small.csv"])
+
+    df = df.reset_index()
+    python_file = tmp_path / "code.py"
+    generate_code(df, python_file=python_file, verbose=False)
+    code = python_file.read_text()
+    assert code.count("pd.read_csv") == 5
+    assert "is a duplicate of" in code
+    profile_files(df, output_path=tmp_path / "reports", profile_tool="afes")
+    assert "Skipping 2 duplicated files" in capsys.readouterr().out
+
+
+def test_explore_files_datasets(tmp_path, capsys):
+    (tmp_path / "daily").mkdir()
+    for day in range(1, 4):
+        (tmp_path / "daily" / f"sales_2026-01-0{day}.csv").write_text(
+            "date,store,amount\n" + f"2026-01-0{day},north,{day}.5\n" * day
+        )
+    (tmp_path / "daily" / "stores.csv").write_text("store,city\nnorth,Lyon\n")
+
+    df = explore_files(tmp_path, datasets=True)
+    assert "1 datasets of more than one file, 3 files" in capsys.readouterr().out
+    datasets = df.set_index(df["path"].map(lambda path: path.name))["dataset"]
+    assert datasets["sales_2026-01-02.csv"] == "sales"
+    assert datasets["stores.csv"] == "stores"
+    assert df["fingerprint"].nunique() == 2
+
+    python_file = tmp_path / "code.py"
+    generate_code(df, python_file=python_file, verbose=False, typed=True)
+    code = python_file.read_text()
+    assert code.startswith("import glob")
+    assert code.count("pd.read_csv") == 2
+    namespace = {}
+    exec(code, namespace)
+    assert len(namespace["df_sales"]) == 6
+    assert len(namespace["df_stores"]) == 1
+
+    profile_files(df, output_path=tmp_path / "reports", profile_tool="afes")
+    report = json.loads((tmp_path / "reports" / "sales_afes.json").read_text())
+    assert report["rows"] == 6
+    assert not (tmp_path / "reports" / "sales_2026-01-01_afes.json").exists()
+
+
+@pytest.mark.parametrize(
+    "engine, typed",
+    [
+        ("pandas", True),
+        ("pandas-chunked", True),
+        ("pyarrow-dataset", True),
+        ("pyarrow-dataset", False),
+    ],
+)
+def test_generate_code_datasets_typed(tmp_path, monkeypatch, engine, typed):
+    if engine == "pyarrow-dataset":
+        pytest.importorskip("pyarrow")
+    monkeypatch.setattr(generate, "BIG_FILE", 10)
+    (tmp_path / "sales_2026-01-01.csv").write_text("store,amount\nnorth,3\nsouth,4\n")
+    (tmp_path / "sales_2026-01-02.csv").write_text("store,amount\nnorth,3.5\nsouth,\n")
+    df = explore_files(tmp_path, datasets=True)
+    python_file = tmp_path / "code.py"
+    generate_code(
+        df, python_file=python_file, verbose=False, typed=typed, engine=engine
+    )
+
+    if typed:
+        assert df["schema"][0]["dtype"]["amount"] == "float32"
+    namespace = {}
+    exec(python_file.read_text(), namespace)
+    if engine == "pandas":
+        sales = namespace["df_sales"]
+    elif engine == "pandas-chunked":
+        sales = pd.concat(namespace["df_sales"], ignore_index=True)
+    else:
+        sales = namespace["df_sales"].to_table().to_pandas()
+    assert sales["amount"].tolist()[:3] == [3, 4, 3.5]
+    assert sales["amount"].isna().sum() == 1
+
+
+class LatencyShim:
+    """Wraps file system functions to wait `latency` seconds per call, as a
+    network mount, and counts the calls in flight."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def wrap(self, function):
+        def wrapper(*args, **kwargs):
+            with self.lock:
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                time.sleep(self.latency)
+                return function(*args, **kwargs)
+            finally:
+                with self.lock:
+                    self.in_flight -= 1
+
+        return wrapper
+
+
+def test_explore_files_async(tmp_path, monkeypatch):
+    for i in range(4):
+        folder = tmp_path / f"folder_{i}" / "sub"
+        folder.mkdir(parents=True)
+        for j in range(10):
+            (folder.parent / f"{j}.csv").write_text("a,b\n1,2\n")
+            (folder / f"{j}.txt").write_text("a|b\n1|2\n3|4\n")
+    (tmp_path / "top.csv").write_text("a\n1\n")
+    expected = explore_files(tmp_path)
+
+    shim = LatencyShim(latency=0.02)
+    monkeypatch.setattr(afe, "_scan_folder", shim.wrap(afe._scan_folder))
+    monkeypatch.setattr(utils, "open_binary", shim.wrap(utils.open_binary))
+    start = time.perf_counter()
+    df = explore_files(tmp_path, executor="async")
+    elapsed = time.perf_counter() - start
+
+    pd.testing.assert_frame_equal(df, expected)
+    assert shim.max_in_flight > 8
+    # 90 calls of 20 ms one after the other would take 1.8 seconds.
+    assert elapsed < 1
+    with pytest.raises(Exception):
+        explore_files(tmp_path / "missing", executor="async")
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_explore_files_with_stats(tmp_path, capsys, executor):
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    (data_path / "a.csv").write_text("a,b\n" + "1,2\n" * 10)
+    (data_path / "b.json").write_text('[{"a": 1}, {"a": 2}]')
+    trace_file = tmp_path / "trace.json"
+
+    df = explore_files(
+        data_path, workers=2, executor=executor, trace_file=trace_file
+    ).set_index("name")
+    assert df.loc["a", "count_bytes"] == 44
+    assert df.loc["a", "count_seconds"] > 0
+    assert df.loc["b", "records_bytes"] > 0
+    assert pd.isna(df.loc["b", "count_seconds"])
+    assert (df["walk_seconds"] > 0).all()
+    assert "separator" in capsys.readouterr().out
+
+    summary = summarize_stats(df.reset_index())
+    assert summary.loc["count", "bytes"] == 44
+    assert summary.loc["walk", "files"] == 2
+    events = json.loads(trace_file.read_text())["traceEvents"]
+    assert {"walk", "stat", "count", "separator", "records"} == {
+        event["name"] for event in events
+    }
+    assert "count_seconds" not in explore_files(data_path).columns
+
+
+FAKE_SWEETVIZ = """
+class Report:
+    def __init__(self, df):
+        self.df = df
+
+    def show_html(self, filepath, open_browser):
+        with open(filepath, "w") as f:
+            f.write(str(len(self.df)))
+
+
+def analyze(df):
+    return Report(df)
+"""
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_profile_files(tmp_path, monkeypatch, capsys, workers):
+    fake_modules = tmp_path / "modules"
+    fake_modules.mkdir()
+    (fake_modules / "sweetviz.py").write_text(FAKE_SWEETVIZ)
+    monkeypatch.syspath_prepend(str(fake_modules))
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    (data_path / "small.csv").write_text("a,b\n1,2\n")
+    (data_path / "big.csv").write_text("a,b\n" + "1,2\n" * 20)
+    pd.DataFrame({"a": range(20)}).to_excel(
+        data_path / "book.xlsx", sheet_name="numbers", index=False
+    )
+    output_path = tmp_path / "reports"
+
+    df = explore_files(data_path)
+    profile_files(
+        df,
+        output_path=output_path,
+        profile_tool="sweetviz",
+        sample_rows=10,
+        workers=workers,
+        max_memory="1KiB",
+    )
+    assert (output_path / "small_sweetviz.html").read_text() == "1"
+    assert (output_path / "big_reservoir_50.00pct_sweetviz.html").read_text() == "10"
+    assert df.set_index("name").loc["big", "sample_fraction"] == 0.5
+    assert (
+        output_path / "numbers_reservoir_50.00pct_sweetviz.html"
+    ).read_text() == "10"
+    assert df.set_index("name").loc["numbers", "sample_fraction"] == 0.5
+
+    capsys.readouterr()
+    profile_files(df, output_path=output_path, profile_tool="sweetviz", sample_rows=10)
+    assert "Skipping 3 reports that are up to date" in capsys.readouterr().out
+
+
+def test_profile_files_with_afes(tmp_path):
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    (data_path / "data.csv").write_text("a,b\n" + "1,x\n2,y\n" * 10)
+    output_path = tmp_path / "reports"
+
+    profile_files(
+        explore_files(data_path), output_path=output_path, profile_tool="afes"
+    )
+    stats = json.loads((output_path / "data_afes.json").read_text())
+    assert stats["rows"] == 20
+    assert stats["columns"]["a"]["mean"] == 1.5
+    assert (output_path / "data_afes.html").exists()
+
+
+def test_profile_files_corrupt_workbook(tmp_path, capsys):
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    pd.DataFrame({"a": range(3)}).to_excel(data_path / "a.xlsx", index=False)
+    (data_path / "b.csv").write_text("a,b\n1,x\n2,y\n")
+    df = explore_files(data_path)
+    (data_path / "a.xlsx").write_text("not a workbook")
+    output_path = tmp_path / "reports"
+
+    profile_files(df, output_path=output_path, profile_tool="afes")
+    assert f"Error with {data_path / 'a.xlsx'}" in capsys.readouterr().out
+    assert (output_path / "b_afes.json").exists()
+
+
+@pytest.mark.parametrize(
+    "to, partition_by", [("parquet", None), ("feather", None), ("parquet", ["a"])]
+)
+def test_convert_files(tmp_path, to, partition_by):
+    pytest.importorskip("pyarrow")
+    data_path = tmp_path / "data"
+    (data_path / "sub").mkdir(parents=True)
+    (data_path / "a.csv").write_text("a,b\n" + "1,x\n2,y\n3,\n" * 5)
+    (data_path / "sub" / "b.txt").write_text("a|b\n1|x\n")
+    output_path = tmp_path / "converted"
+
+    df = explore_files(data_path)
+    convert_files(
+        df,
+        output_path=output_path,
+        to=to,
+        row_group_size=4,
+        partition_by=partition_by,
+    )
+    converted = dict(zip(df["name"], df["converted_path"]))
+    suffix = f".{to}"
+    assert converted["a"] == output_path / f"a{suffix}"
+    assert converted["b"] == output_path / "sub" / f"b{suffix}"
+    read = pd.read_parquet if to == "parquet" else pd.read_feather
+    loaded = read(converted["a"])
+    assert len(loaded) == 15
+    assert loaded["a"].astype(int).sum() == 30
+    if partition_by is None:
+        assert list(loaded["b"])[:2] == ["x", "y"]
+        assert pd.isna(loaded["b"][2])
+    else:
+        assert (converted["a"] / "a=1").is_dir()
+
+    python_file = tmp_path / "code.py"
+    generate_code(df, python_file=python_file, verbose=False)
+    namespace = {}
+    exec(python_file.read_text(), namespace)
+    assert len(namespace["df_a"]) == 15
+
+
+@pytest.mark.parametrize(
+    "to, partition_by", [("parquet", None), ("feather", None), ("parquet", ["a"])]
+)
+def test_convert_files_types_change(tmp_path, to, partition_by):
+    pytest.importorskip("pyarrow")
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    rows = [f"{i % 2},{i},{i}" for i in range(6)] + ["1,x,1.5", "0,8,", "1,9,9"]
+    (data_path / "data.csv").write_text("a,b,c\n" + "\n".join(rows) + "\n")
+    output_path = tmp_path / "converted"
+    output_path.mkdir()
+    converted = output_path / f"data.{to}"
+    converted.write_text("old")
+
+    df = explore_files(data_path)
+    convert_files(
+        df,
+        output_path=output_path,
+        to=to,
+        row_group_size=4,
+        partition_by=partition_by,
+        overwrite=True,
+    )
+    read = pd.read_parquet if to == "parquet" else pd.read_feather
+    loaded = read(df["converted_path"][0])
+    assert len(loaded) == 9
+    assert sorted(loaded["b"].astype(str)) == sorted(
+        [str(i) for i in range(6)] + ["x", "8", "9"]
+    )
+    assert loaded["c"].dtype == "float64"
+    assert [path.name for path in output_path.iterdir()] == [f"data.{to}"]
+
+
+def test_convert_files_failure(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    (data_path / "data.csv").write_text("a,b\n" + "1,x\n" * 10)
+    output_path = tmp_path / "converted"
+    df = explore_files(data_path)
+
+    def chunks(*args, **kwargs):
+        yield pd.DataFrame({"a": [1], "b": ["x"]})
+        raise OSError("read error")
+
+    monkeypatch.setattr(convert, "iter_file_chunks", chunks)
+    convert_files(df, output_path=output_path, row_group_size=1)
+    assert pd.isna(df["converted_path"][0])
+    assert list(output_path.iterdir()) == []
+
+
+def test_convert_files_corrupt_workbook(tmp_path, capsys):
+    pytest.importorskip("pyarrow")
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    pd.DataFrame({"a": range(3)}).to_excel(data_path / "a.xlsx", index=False)
+    (data_path / "b.csv").write_text("a,b\n1,x\n2,y\n")
+    df = explore_files(data_path)
+    (data_path / "a.xlsx").write_text("not a workbook")
+
+    convert_files(df, output_path=tmp_path / "converted")
+    assert f"Error with {data_path / 'a.xlsx'}" in capsys.readouterr().out
+    assert df["converted_path"].notna().tolist() == [False, True]
@@ -0,0 +1,43 @@
+import pytest
+
+from afes.config import ROOT_DIR
+
+
+@pytest.fixture
+def benchmarks(monkeypatch):
+    monkeypatch.syspath_prepend(str(ROOT_DIR))
+    from benchmarks import run
+
+    return run
+
+
+def test_make_tree(tmp_path, benchmarks):
+    from benchmarks.data import make_tree
+
+    root = make_tree(tmp_path, scale="tiny")
+    assert (root / "tall" / "tall.csv").exists()
+    assert (root / "workbooks" / "book.xlsx").exists()
+    assert len(list((root / "many").rglob("*.csv"))) == 20
+    with pytest.raises(Exception):
+        make_tree(tmp_path, scale="huge")
+
+
+def test_run_benchmarks(tmp_path, benchmarks):
+    results = benchmarks.run_benchmarks(
+        scale="tiny",
+        repeat=1,
+        names=["get_row_count", "explore_files"],
+        data_dir=tmp_path,
+        isolate=False,
+    )
+    assert set(results) == {"get_row_count", "explore_files"}
+    assert results["explore_files"]["files_per_s"] > 0
+    assert results["get_row_count"]["mb_per_s"] > 0
+    assert results["get_row_count"]["peak_rss_mib"] > 0
+
+
+def test_compare(benchmarks):
+    baseline = {"a": {"seconds": 1.0}, "b": {"seconds": 1.0}}
+    results = {"a": {"seconds": 1.1}, "b": {"seconds": 1.5}, "c": {"seconds": 9}}
+    assert benchmarks.compare(results, baseline) == ["b"]
+    assert benchmarks.compare(results, baseline, tolerance=0.05) == ["a", "b"]
@@ -0,0 +1,86 @@
+import os
+import zipfile
+
+from afes.afe import _get_cache_options, explore_files
+from afes.cache import ExplorationCache
+
+
+def test_exploration_cache(tmp_path):
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    (data_path / "a.csv").write_text("a,b\n1,2\n")
+    (data_path / "b.csv").write_text("a;b\n1;2\n3;4\n")
+    cache_dir = tmp_path / "cache"
+
+    df_first = explore_files(data_path, cache=True, cache_dir=cache_dir)
+    df_second = explore_files(data_path, cache=True, cache_dir=cache_dir)
+    assert df_first.equals(df_second)
+
+    cache = ExplorationCache(cache_dir)
+    options = _get_cache_options(estimate_rows=False)
+    assert cache.get(data_path / "a.csv", options=options) is not None
+    assert cache.hits == 1
+    cache.close()
+
+
+def test_exploration_cache_archive(tmp_path):
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    with zipfile.ZipFile(data_path / "a.zip", "w") as archive:
+        archive.writestr("x.csv", "a,b\n1,2\n")
+        archive.writestr("y.csv", "a;b\n1;2\n3;4\n")
+    cache_dir = tmp_path / "cache"
+
+    df_first = explore_files(data_path, cache=True, cache_dir=cache_dir)
+    df_second = explore_files(data_path, cache=True, cache_dir=cache_dir)
+    assert df_second["path"].tolist() == [
+        data_path / "a.zip" / "x.csv",
+        data_path / "a.zip" / "y.csv",
+    ]
+    assert df_first.equals(df_second)
+
+
+def test_exploration_cache_invalidation(tmp_path):
+    file_path = tmp_path / "a.csv"
+    file_path.write_text("a,b\n1,2\n")
+    cache = ExplorationCache(tmp_path / "cache")
+    assert cache.get(file_path) is None
+    cache.put(file_path, [{"path": file_path, "name": "a", "rows": 2}])
+    assert cache.get(file_path) == [{"path": file_path, "name": "a", "rows": 2}]
+
+    file_path.write_text("a,b\n1,2\n3,4\n")
+    os.utime(file_path, ns=(0, 0))
+    assert cache.get(file_path) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+    cache.close()
+
+
+def test_exploration_cache_hash(tmp_path):
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    file_path = data_path / "a.csv"
+    file_path.write_text("a,b\n1,2\n")
+    cache_dir = tmp_path / "cache"
+    for cache_hash in [False, True]:
+        explore_files(data_path, cache=True, cache_dir=cache_dir, cache_hash=cache_hash)
+
+    # Same size and modification time, different content.
+    stat = file_path.stat()
+    file_path.write_text("a;b\n1;2\n")
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    df = explore_files(data_path, cache=True, cache_dir=cache_dir)
+    assert df["separator"][0] == "comma"
+    df = explore_files(data_path, cache=True, cache_dir=cache_dir, cache_hash=True)
+    assert df["separator"][0] == "semi_colon"
+
+
+def test_exploration_cache_eviction(tmp_path):
+    cache = ExplorationCache(tmp_path / "cache", max_entries=2)
+    for i in range(5):
+        file_path = tmp_path / f"{i}.csv"
+        file_path.write_text("a\n")
+        cache.put(file_path, [{"path": file_path, "name": str(i)}])
+    cache.evict()
+    count = cache.connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+    assert count == 2
+    cache.close()
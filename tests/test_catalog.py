@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+
+from afes.__main__ import explore
+from afes.afe import explore_files
+from afes.catalog import load_catalog, save_catalog
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".json", ".sqlite"])
+def test_catalog(tmp_path, suffix):
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    (data_path / "a.csv").write_text("a,b\n1,2\n")
+    (data_path / "b.csv").write_text("a;b\n1;2\n3;4\n")
+    (data_path / "c.csv").write_text("a,b\n1,2\n")
+    df = explore_files(data_path, dedupe=True)
+    df["schema"] = [{"dtype": {"a": "int8"}, "parse_dates": []}, None, None]
+
+    catalog_file = save_catalog(df, tmp_path / f"catalog{suffix}")
+    loaded = load_catalog(catalog_file)
+    assert loaded["path"].tolist() == df["path"].tolist()
+    assert loaded["duplicate_of"].tolist() == df["duplicate_of"].tolist()
+    assert loaded["schema"].tolist() == df["schema"].tolist()
+    assert loaded["rows"].dtype == "Int64"
+    pd.testing.assert_frame_equal(
+        loaded.drop(columns=["rows_exact"]),
+        df.drop(columns=["rows_exact"]),
+        check_dtype=False,
+    )
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".json", ".sqlite"])
+def test_catalog_incremental(tmp_path, suffix):
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    (data_path / "a.csv").write_text("a,b\n1,2\n")
+    catalog_file = tmp_path / f"catalog{suffix}"
+    explore(str(data_path), incremental=str(catalog_file))
+
+    (data_path / "b.csv").write_text("a;b\n1;2\n")
+    df = explore(str(data_path), incremental=str(catalog_file)).set_index("name")
+    assert df.loc["a", "status"] == "unchanged"
+    assert df.loc["b", "status"] == "new"
+    loaded = load_catalog(catalog_file).set_index("name")
+    assert loaded["status"].to_dict() == {"a": "unchanged", "b": "new"}
+
+
+def test_catalog_not_valid(tmp_path):
+    with pytest.raises(Exception):
+        save_catalog(pd.DataFrame(), tmp_path / "catalog.csv")
+    with pytest.raises(Exception):
+        load_catalog(tmp_path / "missing.parquet")
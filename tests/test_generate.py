@@ -1,7 +1,11 @@
+import sqlite3
+
 import pandas as pd
 import pytest
 
-from afes.generate import generate_code, generate_pandas_code
+from afes import generate
+from afes.afe import explore_files
+from afes.generate import generate_code, generate_pandas_code, generate_sql_code
 
 
 @pytest.mark.parametrize(
@@ -15,7 +19,11 @@ from afes.generate import generate_code, generate_pandas_code
         ("test_txt.csv", ".txt", "space", True),
         ("test_csv.xls", ".xls", None, True),
         ("test_csv.xlsx", ".xlsx", None, True),
-        ("test_csv.json", ".json", None, False),
+        ("test_csv.json", ".json", None, True),
+        ("test_csv.xml", ".xml", None, True),
+        ("test_csv.parquet", ".parquet", None, True),
+        ("test_csv.feather", ".feather", None, True),
+        ("test_csv.sav", ".sav", None, False),
     ],
 )
 def test_generate_code(tmp_path, file_name, extension, sep, expected):
@@ -31,3 +39,185 @@ def test_generate_pandas_code(tmp_path):
     df = pd.DataFrame()
     generate_pandas_code(df=df, verbose=False, python_file=file_path)
     assert file_path.exists()
+
+
+def test_generate_code_arff(tmp_path):
+    file_path = tmp_path / "iris.arff"
+    file_path.write_text(
+        "@RELATION iris\n@ATTRIBUTE a NUMERIC\n@ATTRIBUTE b STRING\n@DATA\n1,x\n"
+    )
+    code = generate_code(file_path=file_path, file_name="iris", extension=".arff")
+    assert "skiprows = 4" in code
+    assert "names = ['a', 'b']" in code
+
+
+def test_generate_pandas_code_typed(tmp_path):
+    data_path = tmp_path / "data.csv"
+    n = 1_000
+    pd.DataFrame(
+        {
+            "id": range(n),
+            "small": [i % 100 for i in range(n)],
+            "nullable": [None if i % 7 == 0 else i % 3 for i in range(n)],
+            "ratio": [i / 4 for i in range(n)],
+            "price": [i / 3 for i in range(n)],
+            "color": ["red", "green", "blue", "red"] * (n // 4),
+            "day": pd.date_range("2024-01-01", periods=n).strftime("%Y-%m-%d"),
+            "text": [f"row_{i}" for i in range(n)],
+        }
+    ).to_csv(data_path, index=False)
+    df = explore_files(tmp_path)
+    python_file = tmp_path / "code.py"
+    generate_pandas_code(df, verbose=False, python_file=python_file, typed=True)
+
+    schema = df["schema"][0]
+    assert schema["dtype"] == {
+        "id": "int16",
+        "small": "int8",
+        "nullable": "Int8",
+        "ratio": "float32",
+        "color": "category",
+    }
+    assert schema["parse_dates"] == ["day"]
+    namespace = {}
+    exec(python_file.read_text(), namespace)
+    typed = namespace["df_data"]
+    untyped = pd.read_csv(data_path)
+    assert typed.memory_usage(deep=True).sum() < untyped.memory_usage(deep=True).sum()
+    assert str(typed["day"].dtype).startswith("datetime64")
+    assert (typed["price"] == untyped["price"]).all()
+
+
+def test_generate_pandas_code_typed_incomplete_sample(tmp_path, monkeypatch):
+    monkeypatch.setattr(generate, "SCHEMA_SAMPLE_ROWS", 100)
+    rows = [f"{i},{i % 2},{i}.5,{'ab'[i % 2]}" for i in range(150)]
+    rows += [",1,0.1,a", "70000,,1e300,b"]
+    (tmp_path / "data.csv").write_text("v,flag,x,city\n" + "\n".join(rows) + "\n")
+    df = explore_files(tmp_path)
+    python_file = tmp_path / "code.py"
+    generate_pandas_code(df, verbose=False, python_file=python_file, typed=True)
+
+    # Numbers are left to pandas, as the rows after the sample can differ.
+    assert df["schema"][0]["dtype"] == {"city": "category"}
+    assert "usecols" not in python_file.read_text()
+    namespace = {}
+    exec(python_file.read_text(), namespace)
+    typed = namespace["df_data"]
+    assert len(typed) == 152
+    assert typed["v"].isna().sum() == 1
+    assert typed["x"].iloc[-1] == 1e300
+    assert typed["v"].dtype == "float64"
+    assert typed["city"].dtype == "category"
+
+
+def test_generate_sql_code(tmp_path):
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    (data_path / "sales.csv").write_text(
+        "id,city,amount,day\n1,Lyon,2.5,2024-01-01\n2,,3.0,2024-01-02\n"
+    )
+    (data_path / "codes.txt").write_text("code\tname\nA\tapple\nB\tbanana\n")
+    df = explore_files(data_path)
+
+    postgres_file = tmp_path / "load.sql"
+    generate_sql_code(df, target="postgres", verbose=False, python_file=postgres_file)
+    sql = postgres_file.read_text()
+    assert '"city" VARCHAR(4)' in sql
+    assert '"amount" DOUBLE PRECISION' in sql
+    assert '"day" TIMESTAMP' in sql
+    assert "DELIMITER E'\\t'" in sql
+
+    sqlite_file = tmp_path / "load.py"
+    database = tmp_path / "afes.sqlite"
+    generate_sql_code(
+        df,
+        target="sqlite",
+        verbose=False,
+        python_file=sqlite_file,
+        database=database,
+    )
+    exec(sqlite_file.read_text(), {})
+    con = sqlite3.connect(database)
+    assert con.execute("SELECT * FROM sales").fetchall() == [
+        (1, "Lyon", 2.5, "2024-01-01"),
+        (2, None, 3.0, "2024-01-02"),
+    ]
+    assert con.execute("SELECT count(*) FROM codes").fetchone() == (2,)
+    con.close()
+
+    with pytest.raises(Exception):
+        generate_sql_code(df, target="oracle", python_file=tmp_path / "x.sql")
+
+
+def test_generate_pandas_code_encodings(tmp_path):
+    data_path = tmp_path / "data"
+    data_path.mkdir()
+    text = "name;price\n\u201cquoted\u201d;3\u20ac\ncaf\xe9;4\n"
+    (data_path / "win.csv").write_bytes(text.encode("cp1252"))
+    (data_path / "wide.csv").write_bytes(text.encode("utf-16"))
+    (data_path / "plain.csv").write_text("a;b\n1;2\n")
+    df = explore_files(data_path)
+    assert list(df["encoding"]) == ["utf-8", "utf-16", "cp1252"]
+
+    python_file = tmp_path / "code.py"
+    generate_pandas_code(df, verbose=False, python_file=python_file)
+    code = python_file.read_text()
+    assert "encoding = 'cp1252'" in code
+    assert "plain.csv', sep = ';')" in code
+    namespace = {}
+    exec(code, namespace)
+    for name in ["df_win", "df_wide"]:
+        assert namespace[name]["name"][0] == "\u201cquoted\u201d"
+        assert namespace[name]["price"][0] == "3\u20ac"
+
+    sql_file = tmp_path / "load.sql"
+    generate_sql_code(df, target="postgres", verbose=False, python_file=sql_file)
+    sql = sql_file.read_text()
+    assert "ENCODING 'WIN1252'" in sql
+    assert "-- Load" in sql
+
+
+@pytest.mark.parametrize(
+    "engine,expected",
+    [
+        ("pandas-chunked", "chunksize = 1000"),
+        ("pyarrow-dataset", "ds.CsvFileFormat("),
+        ("duckdb", "duckdb.read_csv("),
+        ("polars-lazy", "pl.scan_csv("),
+    ],
+)
+def test_generate_pandas_code_engines(tmp_path, monkeypatch, engine, expected):
+    monkeypatch.setattr(generate, "BIG_FILE", 100)
+    monkeypatch.setattr(generate, "CHUNK_MEMORY", 35_000)
+    data = pd.DataFrame({"id": range(2_500), "name": ["a", "b"] * 1_250})
+    data.to_csv(tmp_path / "big.csv", sep=";", index=False)
+    (tmp_path / "small.csv").write_text("id;name\n1;a\n")
+    (tmp_path / "latin.csv").write_bytes("id;name\n1;café\n".encode("latin-1") * 10)
+    df = explore_files(tmp_path)
+    python_file = tmp_path / "code.py"
+    generate_pandas_code(df, verbose=False, python_file=python_file, engine=engine)
+    code = python_file.read_text()
+    assert expected in code
+    assert "pd.read_csv('" + str(tmp_path / "small.csv") + "', sep = ';')" in code
+    if engine in ["duckdb", "polars-lazy"]:
+        # Only UTF-8 files are scanned, the rest are read in chunks.
+        assert code.count("chunksize = ") == 1
+        return
+    namespace = {}
+    exec(code, namespace)
+    if engine == "pandas-chunked":
+        chunks = list(namespace["df_big"])
+        assert [len(chunk) for chunk in chunks] == [1_000, 1_000, 500]
+        assert pd.concat(chunks)["name"].tolist() == data["name"].tolist()
+    else:
+        table = namespace["df_big"].to_table()
+        assert table.num_rows == 2_500
+        assert table.column_names == ["id", "name"]
+        assert namespace["df_latin"].to_table()["name"][0].as_py() == "café"
+
+
+def test_generate_pandas_code_engine_not_valid(tmp_path):
+    with pytest.raises(Exception):
+        generate_pandas_code(
+            pd.DataFrame(), python_file=tmp_path / "code.py", engine="spark"
+        )
@@ -0,0 +1,34 @@
+import subprocess
+import sys
+
+HEAVY_MODULES = ["pandas", "numpy", "tqdm", "pyarrow", "afes.afe"]
+IMPORT_TIME_BUDGET = 0.5  # Seconds to import the command line interface
+
+
+def _import_times(*args: str) -> dict[str, float]:
+    """Returns the cumulative seconds to import each module while running
+    Python with `args`, from the output of `-X importtime`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, module = line.split("|")
+            if cumulative.strip().isdigit():
+                times[module.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def test_cli_import_time():
+    times = _import_times("-c", "import afes.__main__")
+    assert not [module for module in HEAVY_MODULES if module in times]
+    assert times["afes.__main__"] < IMPORT_TIME_BUDGET
+
+
+def test_cli_help_without_heavy_imports():
+    times = _import_times("-m", "afes", "--help")
+    assert not [module for module in HEAVY_MODULES if module in times]
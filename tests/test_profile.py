@@ -0,0 +1,129 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from afes.profile import (
+    iter_file_chunks,
+    load_file_with_pandas,
+    load_sample_with_pandas,
+    profile_with_afes,
+)
+
+
+@pytest.mark.parametrize(
+    "file_name, content",
+    [
+        ("data.csv", "a,b\n1,x\n2,y\n"),
+        ("data.json", '[{"a": 1, "b": "x"}, {"a": 2, "b": "y"}]'),
+        ("data.json", '{"a": 1, "b": "x"}\n{"a": 2, "b": "y"}\n'),
+        (
+            "data.xml",
+            "<data><row><a>1</a><b>x</b></row><row><a>2</a><b>y</b></row></data>",
+        ),
+        (
+            "data.arff",
+            "@RELATION r\n@ATTRIBUTE a NUMERIC\n@ATTRIBUTE b STRING\n@DATA\n1,x\n2,y\n",
+        ),
+    ],
+)
+def test_load_file_with_pandas(tmp_path, file_name, content):
+    file_path = tmp_path / file_name
+    file_path.write_text(content)
+    df = load_file_with_pandas(
+        file_path=file_path, file_name="data", extension=file_path.suffix, sep="comma"
+    )
+    assert list(df.columns) == ["a", "b"]
+    assert list(df["a"]) == [1, 2]
+
+
+@pytest.mark.parametrize("sample_strategy", ["head", "reservoir", "stratified"])
+def test_load_sample_with_pandas(tmp_path, sample_strategy):
+    file_path = tmp_path / "data.csv"
+    x = np.arange(10_000)
+    pd.DataFrame({"x": x, "y": np.where(x % 10 == 0, "a", "b")}).to_csv(
+        file_path, index=False
+    )
+    df, fraction = load_sample_with_pandas(
+        file_path=file_path,
+        file_name="data",
+        extension=".csv",
+        sep="comma",
+        rows=10_000,
+        sample_rows=500,
+        sample_strategy=sample_strategy,
+        chunksize=700,
+        seed=0,
+    )
+    assert len(df) == 500
+    assert fraction == 0.05
+    assert df["x"].is_unique
+    if sample_strategy == "head":
+        assert list(df["x"]) == list(range(500))
+    elif sample_strategy == "stratified":
+        assert (df["y"] == "a").sum() == 50
+    else:
+        assert df["x"].max() > 5_000
+
+
+def test_load_sample_with_pandas_stratified_bounded(tmp_path):
+    file_path = tmp_path / "data.csv"
+    x = np.arange(50_000)
+    group = np.where(x < 49_000, "big", x % 900)
+    pd.DataFrame({"group": group, "x": x}).to_csv(file_path, index=False)
+
+    def sample(stratify_by):
+        return load_sample_with_pandas(
+            file_path=file_path,
+            file_name="data",
+            extension=".csv",
+            sep="comma",
+            sample_rows=1_000,
+            sample_strategy="stratified",
+            stratify_by=stratify_by,
+            chunksize=7_000,
+            seed=0,
+        )
+
+    df, fraction = sample("group")
+    assert len(df) == 1_000
+    assert fraction == 0.02
+    assert df["group"].nunique() == 901
+    with pytest.raises(Exception):
+        sample(None)
+
+
+def test_profile_with_afes(tmp_path):
+    file_path = tmp_path / "data.csv"
+    x = np.arange(20_000)
+    df = pd.DataFrame(
+        {"x": x, "y": np.where(x % 4 == 0, "a", "b"), "z": np.where(x % 5, x, np.nan)}
+    )
+    df.to_csv(file_path, index=False)
+    stats = profile_with_afes(
+        chunks=iter_file_chunks(
+            file_path=file_path,
+            file_name="data",
+            extension=".csv",
+            sep="comma",
+            chunksize=3_000,
+        ),
+        file_name="data",
+        output_path=tmp_path,
+    )
+    assert stats == json.loads((tmp_path / "data_afes.json").read_text())
+    assert "<table>" in (tmp_path / "data_afes.html").read_text()
+    assert stats["rows"] == 20_000
+    x_stats, y_stats, z_stats = stats["columns"].values()
+    assert x_stats["type"] == "numeric"
+    assert x_stats["min"] == 0 and x_stats["max"] == 19_999
+    assert x_stats["mean"] == pytest.approx(df["x"].mean())
+    assert x_stats["std"] == pytest.approx(df["x"].std(ddof=0))
+    assert x_stats["quantiles"]["0.5"] == pytest.approx(df["x"].median(), rel=0.02)
+    assert x_stats["distinct"] == pytest.approx(20_000, rel=0.03)
+    assert x_stats["top"] == []
+    assert y_stats["type"] == "categorical"
+    assert y_stats["distinct"] == 2
+    assert y_stats["top"] == [["b", 15_000], ["a", 5_000]]
+    assert z_stats["nulls"] == 4_000 and z_stats["count"] == 16_000
@@ -1,8 +1,25 @@
+import gzip
 import math
+import zipfile
 
+import pandas as pd
 import pytest
 
-from afes.utils import get_human_readable_size
+from afes.utils import (
+    detect_encoding,
+    detect_separator,
+    estimate_row_count,
+    get_extension,
+    get_human_readable_size,
+    get_record_count,
+    get_row_count,
+    get_separator,
+    get_sheet_row_count,
+    guess_encoding,
+    open_binary,
+    scan_file,
+    split_archive_path,
+)
 
 
 @pytest.mark.parametrize(
@@ -21,3 +38,189 @@ from afes.utils import get_human_readable_size
 def test_get_human_readable_size(size, expected):
     returned = get_human_readable_size(size)
     assert returned == expected
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        (b"", 0),
+        (b"a,b\n", 1),
+        (b"a,b\n1,2\n", 2),
+        (b"a,b\n1,2", 2),
+        (b"a,b\r\n1,2\r\n", 2),
+        ("a;b\ncaf\xe9;1\n".encode("latin-1"), 2),
+    ],
+)
+def test_get_row_count(tmp_path, content, expected):
+    file_path = tmp_path / "file.csv"
+    file_path.write_bytes(content)
+    assert get_row_count(file_path) == expected
+
+
+def test_estimate_row_count(tmp_path):
+    file_path = tmp_path / "file.csv"
+    file_path.write_bytes(b"1234,5678\n" * 1_000)
+    assert estimate_row_count(file_path) == (1_000, True)
+    assert estimate_row_count(file_path, sample_bytes=1_000) == (1_000, False)
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        ("a,b,c\n1,2,3\n4,5,6\n", "comma"),
+        ("a;b;c\n1;2;3\n4;5;6\n", "semi_colon"),
+        ("a|b|c\n1|2|3\n4|5|6\n", "pipe"),
+        ("a\tb\tc\n1\t2\t3\n4\t5\t6\n", "tab"),
+        ("a b c\n1 2 3\n4 5 6\n", "space"),
+        ('a,b\n1,"x;y;z"\n2,"x;y"\n', "comma"),
+    ],
+)
+def test_get_separator(tmp_path, content, expected):
+    file_path = tmp_path / "file.csv"
+    file_path.write_text(content)
+    assert get_separator(file_path) == expected
+
+
+def test_get_separator_reads_a_sample(tmp_path):
+    file_path = tmp_path / "file.csv"
+    file_path.write_text("a,b\n" + "1,2\n" * 100 + "1;2;3;4\n" * 1_000)
+    assert get_separator(file_path, sample_bytes=200) == "comma"
+    assert get_separator(file_path, sample_lines=50) == "comma"
+
+
+def test_detect_separator_confidence():
+    sep, confidence = detect_separator(b"a|b|c\n1|2|3\n4|5|6\n7|8\n")
+    assert sep == "pipe"
+    assert confidence == pytest.approx(2 / 3)
+
+
+def test_scan_file(tmp_path):
+    file_path = tmp_path / "file.csv"
+    file_path.write_bytes("col_a;col_b\ncaf\xe9;1\n".encode("latin-1"))
+    scan = scan_file(file_path)
+    assert scan.rows == 2
+    assert scan.rows_exact
+    assert scan.separator == "semi_colon"
+    assert scan.header == "col_a;col_b"
+    assert scan.encoding == "latin-1"
+    assert scan.line_length_max == len("col_a;col_b")
+
+
+TEXT = "name;price\n\u201cquoted\u201d;3 \u20ac\ncaf\xe9;4\n"
+
+
+@pytest.mark.parametrize(
+    "sample, expected",
+    [
+        (TEXT.encode("utf-8"), "utf-8"),
+        (TEXT.encode("utf-8-sig"), "utf-8-sig"),
+        (TEXT.encode("utf-16"), "utf-16"),
+        (TEXT.encode("utf-16-le"), "utf-16-le"),
+        (TEXT.encode("utf-16-be"), "utf-16-be"),
+        (TEXT.encode("utf-32"), "utf-32"),
+        (TEXT.encode("cp1252"), "cp1252"),
+        ("caf\xe9\x81;1\n".encode("latin-1"), "latin-1"),
+        ("a\xe7\xe3o;n\xe3o\ncora\xe7\xe3o;3\n".encode("latin-1"), "latin-1"),
+        ("\u0438\u043c\u044f;\u0446\u0435\u043d\u0430\n".encode("cp1251"), "cp1251"),
+        (
+            "\u03cc\u03bd\u03bf\u03bc\u03b1;\u03c4\u03b9\u03bc\u03ae\n".encode(
+                "cp1253"
+            ),
+            "cp1253",
+        ),
+        (
+            "\u540d\u524d;\u3053\u3093\u306b\u3061\u306f\n".encode("shift_jis"),
+            "shift_jis",
+        ),
+        ("\u540d\u5b57;\u4ef7\u683c\n".encode("gb18030"), "gb18030"),
+        (b"", "utf-8"),
+    ],
+)
+def test_guess_encoding(sample, expected):
+    assert guess_encoding(sample) == expected
+
+
+def test_detect_encoding_confidence():
+    assert detect_encoding(TEXT.encode("cp1252")) == ("cp1252", 1.0)
+    encoding, confidence = detect_encoding(bytes(range(0x80, 0x100)) * 4)
+    assert confidence < 0.5
+
+
+@pytest.mark.parametrize("encoding", ["utf-16", "utf-16-le", "utf-32", "cp1252"])
+def test_scan_file_encodings(tmp_path, encoding):
+    file_path = tmp_path / "file.csv"
+    file_path.write_bytes(TEXT.encode(encoding))
+    scan = scan_file(file_path, chunk_size=7)
+    assert scan.encoding == encoding
+    assert scan.rows == 3
+    assert scan.separator == "semi_colon"
+    assert scan.header == "name;price"
+    assert get_row_count(file_path) == 3
+    assert get_separator(file_path) == "semi_colon"
+
+
+def test_scan_file_estimates_rows(tmp_path):
+    file_path = tmp_path / "file.csv"
+    file_path.write_bytes(b"a,b\n" + b"1,2\n" * 999)
+    scan = scan_file(file_path, max_bytes=400)
+    assert scan.rows == 1_000
+    assert not scan.rows_exact
+    assert scan.separator == "comma"
+
+
+@pytest.mark.parametrize("exact", [False, True])
+def test_get_sheet_row_count(tmp_path, exact):
+    file_path = tmp_path / "book.xlsx"
+    with pd.ExcelWriter(file_path) as writer:
+        pd.DataFrame({"a": range(10)}).to_excel(writer, sheet_name="s1", index=False)
+        pd.DataFrame({"a": []}).to_excel(writer, sheet_name="s2", index=False)
+    with pd.ExcelFile(file_path, engine="openpyxl") as excel_file:
+        counts = [
+            get_sheet_row_count(worksheet, exact=exact)
+            for worksheet in excel_file.book.worksheets
+        ]
+    assert counts == [(10, exact), (0, exact)]
+
+
+@pytest.mark.parametrize(
+    "file_name, content, expected",
+    [
+        ("array.json", '[{"a": 1}, {"a": "x],"}, 2]', 3),
+        ("lines.json", '{"a": 1}\n{"a": 2}\n\n', 2),
+        ("object.json", '{\n"a": [1, 2]\n}', None),
+        ("data.xml", "<data><row><a>1</a></row><row><a>2</a></row></data>", 2),
+        ("data.arff", "@RELATION r\n@ATTRIBUTE a NUMERIC\n@DATA\n1\n% c\n2\n", 2),
+    ],
+)
+def test_get_record_count(tmp_path, file_name, content, expected):
+    file_path = tmp_path / file_name
+    file_path.write_text(content)
+    assert get_record_count(file_path, file_path.suffix) == expected
+
+
+@pytest.mark.parametrize(
+    "file_name, expected",
+    [
+        ("data.csv", (".csv", None)),
+        ("data.v1.csv.gz", (".csv", "gzip")),
+        ("data.TXT.BZ2", (".TXT", "bz2")),
+        ("data.json.zst", (".json", "zstd")),
+        ("data.zip", (".zip", None)),
+    ],
+)
+def test_get_extension(file_name, expected):
+    assert get_extension(file_name) == expected
+
+
+def test_open_binary(tmp_path):
+    (tmp_path / "a.csv.gz").write_bytes(gzip.compress(b"a,b\n1,2\n"))
+    with zipfile.ZipFile(tmp_path / "b.zip", "w") as archive:
+        archive.writestr("folder/c.csv", "a|b\n1|2\n3|4\n")
+    member = tmp_path / "b.zip" / "folder" / "c.csv"
+    assert split_archive_path(member) == (tmp_path / "b.zip", "folder/c.csv")
+    with open_binary(tmp_path / "a.csv.gz") as f:
+        assert f.read() == b"a,b\n1,2\n"
+    assert get_row_count(tmp_path / "a.csv.gz") == 2
+    scan = scan_file(member, max_bytes=4)
+    assert (scan.rows, scan.rows_exact, scan.separator) == (3, True, "pipe")
+    assert scan.uncompressed_size == 12